@@ -1 +1,5 @@
 # Makes the backend directory a Python package.
+# Configuration is read at import time, so load .env before any submodule.
+from backend.env import load_env
+
+load_env()
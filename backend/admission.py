@@ -0,0 +1,222 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from starlette.responses import JSONResponse
+
+try:
+    from backend.metrics import registry
+except ImportError:
+    from metrics import registry  # type: ignore
+
+_degraded: ContextVar[bool] = ContextVar("admission_degraded", default=False)
+
+# Endpoint -> (max in flight, max queued, queue timeout ms, degraded mode) defaults; each can be
+# overridden with <ENDPOINT>_MAX_IN_FLIGHT, <ENDPOINT>_MAX_QUEUE, <ENDPOINT>_QUEUE_TIMEOUT_MS and
+# <ENDPOINT>_DEGRADED_MODE. "chat" is not an HTTP route: chat_socket takes a slot per WebSocket message
+# and, when degraded, answers with the fallback reply.
+DEFAULT_LIMITS = {
+    "onboarding": (32, 64, 2000, True),
+    "calories": (64, 128, 1000, True),
+    "calories_batch": (8, 16, 2000, False),
+    "search": (16, 32, 2000, False),
+    "chat": (16, 32, 2000, False),
+}
+ROUTES = {
+    "/onboarding-summary": "onboarding",
+    "/onboarding-summary/stream": "onboarding",
+    "/calories": "calories",
+    "/calories/batch": "calories_batch",
+    "/search": "search",
+}
+
+REJECTIONS = registry.counter(
+    "admission_rejections_total",
+    "Requests rejected by admission control, by endpoint and reason (queue_full, queue_timeout).",
+    ["endpoint", "reason"],
+)
+DEGRADED = registry.counter(
+    "admission_degraded_total",
+    "Requests served in local-only degraded mode instead of being rejected, by endpoint and reason.",
+    ["endpoint", "reason"],
+)
+
+
+def is_degraded() -> bool:
+    """True inside a request that was shed into degraded mode; Dedalus must not be called."""
+    return _degraded.get()
+
+
+@contextmanager
+def degraded_mode() -> Iterator[None]:
+    token = _degraded.set(True)
+    try:
+        yield
+    finally:
+        _degraded.reset(token)
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Caps concurrent requests to one endpoint, with a bounded FIFO wait queue.
+
+    A request beyond ``max_in_flight`` waits for a free slot for at most
+    ``queue_timeout`` seconds. It is shed straight away when ``max_queue``
+    requests are already waiting. ``Retry-After`` hints are derived from a
+    moving average of how long admitted requests hold their slot.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float, degrade: bool):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.degrade = degrade
+        self.active = 0
+        self.admitted = 0
+        self.rejected = dict.fromkeys(("queue_full", "queue_timeout"), 0)
+        self.degraded = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_seconds = 1.0
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdmissionLimiter":
+        in_flight, queue, timeout_ms, degrade = DEFAULT_LIMITS[name]
+        prefix = name.upper()
+        raw_degrade = os.getenv(f"{prefix}_DEGRADED_MODE", "on" if degrade else "off")
+        return cls(
+            name,
+            max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", in_flight)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", queue)),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_MS", timeout_ms)) / 1000,
+            degrade=raw_degrade.strip().lower() in {"1", "true", "yes", "on"},
+        )
+
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to be admitted (at least 1)."""
+        backlog = (len(self._waiters) + 1) / self.max_in_flight
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    def _shed(self, reason: str) -> Shed:
+        if self.degrade:
+            self.degraded += 1
+            DEGRADED.inc(endpoint=self.name, reason=reason)
+        else:
+            self.rejected[reason] += 1
+            REJECTIONS.inc(endpoint=self.name, reason=reason)
+        return Shed(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raises ``Shed`` when the request must not run normally."""
+        if self.active < self.max_in_flight and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait expired; keep the slot.
+                self.admitted += 1
+                return
+            waiter.cancel()
+            raise self._shed("queue_timeout") from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        if held_seconds is not None:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * held_seconds
+        # Hand the slot straight to the next live waiter so the count never dips.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "degraded": self.degraded,
+            "degraded_mode": self.degrade,
+            "mean_service_seconds": round(self._service_seconds, 3),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying each endpoint's ``AdmissionLimiter`` to POST requests.
+
+    Shed requests get a fast ``429`` (queue full) or ``503`` (queue wait timed
+    out) with ``Retry-After``, or, for endpoints in degraded mode, run without
+    a slot and with Dedalus calls replaced by local estimates. The slot is
+    held until the response body is finished, so streamed responses count.
+    """
+
+    def __init__(self, app, limiters: Optional[Dict[str, AdmissionLimiter]] = None):
+        self.app = app
+        self.limiters = limiters if limiters is not None else admission_limiters
+
+    async def __call__(self, scope, receive, send):
+        name = ROUTES.get(scope.get("path", "")) if scope["type"] == "http" and scope["method"] == "POST" else None
+        limiter = self.limiters.get(name) if name else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Shed as shed:
+            if limiter.degrade:
+                with degraded_mode():
+                    await self.app(scope, receive, send)
+                return
+            status = 429 if shed.reason == "queue_full" else 503
+            response = JSONResponse(
+                {"detail": f"{limiter.name} is overloaded ({shed.reason.replace('_', ' ')}); retry later."},
+                status_code=status,
+                headers={"Retry-After": str(shed.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - start)
+
+
+admission_limiters = {name: AdmissionLimiter.from_env(name) for name in DEFAULT_LIMITS}
@@ -1,40 +1,57 @@
 import asyncio
+import logging
 import os
-from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
 
 try:
-    from dotenv import load_dotenv  # type: ignore
+    from backend.env import load_env
 except ImportError:
-    load_dotenv = None
+    from env import load_env  # type: ignore
+
+load_env()
 
 try:
-    from backend.calorie_estimator import local_calorie_estimate
+    from backend.calorie_estimator import local_calorie_estimate, local_calorie_estimate_batch
+    from backend.hedging import hedger, latency_budget
+    from backend.menu_index import MenuIndex
+    from backend.menu_registry import MenuSnapshot
+    from backend.metrics import LOCAL_FALLBACKS, SKIPPED_ESTIMATES, stage_timer
+    from backend.prompt_builder import build_onboarding_prompt
+    from backend.summary_cache import summary_cache
     from backend.dedalus_runner import (
         DedalusConfig,
-        run_dedalus_calorie_estimator,
+        run_cached_calorie_estimator,
+        run_cached_calorie_estimator_batch,
         run_dedalus_research,
+        stream_dedalus_research,
     )
 except ImportError:
-    from calorie_estimator import local_calorie_estimate  # type: ignore
+    from calorie_estimator import local_calorie_estimate, local_calorie_estimate_batch  # type: ignore
+    from hedging import hedger, latency_budget  # type: ignore
+    from menu_index import MenuIndex  # type: ignore
+    from menu_registry import MenuSnapshot  # type: ignore
+    from metrics import LOCAL_FALLBACKS, SKIPPED_ESTIMATES, stage_timer  # type: ignore
+    from prompt_builder import build_onboarding_prompt  # type: ignore
+    from summary_cache import summary_cache  # type: ignore
     from dedalus_runner import (  # type: ignore
         DedalusConfig,
-        run_dedalus_calorie_estimator,
+        run_cached_calorie_estimator,
+        run_cached_calorie_estimator_batch,
         run_dedalus_research,
+        stream_dedalus_research,
     )
 
-BACKEND_DIR = Path(__file__).resolve().parent
-ENV_PATH = BACKEND_DIR / ".env"
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "8"))
+# Halls the onboarding flow ranks exactly; 0 estimates every hall remotely.
+ONBOARDING_TOP_K = int(os.getenv("ONBOARDING_TOP_K", "3"))
 
-if load_dotenv:
-    load_dotenv(ENV_PATH)
-elif ENV_PATH.exists():
-    for line in ENV_PATH.read_text().splitlines():
-        line = line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        os.environ.setdefault(key.strip(), value.strip().strip('"').strip("'"))
+
+def _remaining(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - asyncio.get_running_loop().time())
 
 
 async def score_meal(
@@ -42,114 +59,371 @@ async def score_meal(
     meal_diet: Iterable[str],
     user_prefs: Iterable[str],
     goal: str,
+    estimate: Dict[str, Any] | None = None,
+    deadline: float | None = None,
 ) -> Tuple[float, Dict[str, Any]]:
-    """Score a meal for the given user goal and dietary needs."""
+    """Score a meal for the given user goal and dietary needs.
+
+    ``estimate`` is an already-fetched remote estimate (e.g. from a batch call);
+    without one the cached single-meal estimator is consulted, waiting at most
+    until ``deadline`` (event-loop time) before falling back to a local estimate.
+    """
     prefs = list(user_prefs)
     if not all(pref in meal_diet for pref in prefs):
         return 0.0, {}
+    return await _score_compatible_meal(meal_name, prefs, goal, estimate, deadline)
 
-    remote = await run_dedalus_calorie_estimator(meal_name, list(prefs))
+
+async def _score_compatible_meal(
+    meal_name: str,
+    prefs: List[str],
+    goal: str,
+    estimate: Dict[str, Any] | None = None,
+    deadline: float | None = None,
+    remote_pending: bool = False,
+) -> Tuple[float, Dict[str, Any]]:
+    """Score one meal; ``remote_pending`` means a remote estimate is already running in the background."""
+    remote = estimate
+    provisional = remote_pending
+    if remote is None and not remote_pending:
+        try:
+            finished, remote = await hedger.race(
+                run_cached_calorie_estimator(meal_name, list(prefs)),
+                _remaining(deadline),
+                "onboarding",
+            )
+            provisional = not finished
+        except Exception:
+            logger.exception("Remote calorie estimate failed for %r; using local estimate", meal_name)
+            remote = None
+    source = "dedalus"
     if isinstance(remote, dict):
         calories = remote.get("estimated_calories")
+        if remote.get("tier") in ("index", "local"):
+            source = remote["tier"]
     else:
         calories = remote
 
     if calories is None:
-        calories = local_calorie_estimate(meal_name, list(prefs))
+        source = "local"
+        LOCAL_FALLBACKS.inc()
+        with stage_timer("local_estimate"):
+            calories = local_calorie_estimate(meal_name, list(prefs))
 
+    score = _meal_score(goal, calories)
+    return score, {"meal": meal_name, "calories": calories, "source": source, "provisional": provisional}
+
+
+def _meal_score(goal: str, calories: float) -> float:
     if goal.lower() == "build muscle":
-        score = float(calories)
-    elif goal.lower() == "lose weight":
-        score = max(0.0, 500 - float(calories))
-    else:
-        score = 100.0
+        return float(calories)
+    if goal.lower() == "lose weight":
+        return max(0.0, 500 - float(calories))
+    return 100.0
 
-    return score, {"meal": meal_name, "calories": calories}
+
+def _score_interval(goal: str, low: float, high: float) -> Tuple[float, float]:
+    """Score bounds for a meal whose calories lie in ``[low, high]`` (scores are monotonic in calories)."""
+    a, b = _meal_score(goal, low), _meal_score(goal, high)
+    return min(a, b), max(a, b)
 
 
 async def score_dining_halls(
-    dining_halls: Dict[str, List[Dict[str, Any]]],
+    dining_halls: Dict[str, List[Dict[str, Any]]] | MenuIndex | MenuSnapshot,
     user_profile: Dict[str, Any],
+    concurrency: int | None = None,
+    budget: float | None = None,
+    top_k: int | None = None,
 ) -> List[Dict[str, Any]]:
-    """Return a sorted list of dining halls with scores and qualifying meals."""
-    ranked: List[Dict[str, Any]] = []
-    prefs = user_profile.get("dietary_preferences", [])
+    """Return a sorted list of dining halls with scores and qualifying meals.
+
+    Meals that do not carry every dietary preference are dropped up front by
+    the menu's tag index and never reach an estimator. Qualifying meals are
+    then estimated through the batch estimator, so a menu costs one or a few
+    LLM calls. Meals the batch could not answer are scored concurrently, with
+    at most ``concurrency`` estimator calls in flight. A meal whose scoring
+    fails is skipped rather than cancelling the rest of the batch.
+
+    ``budget`` caps, in seconds, how long remote estimates may hold up the
+    ranking. Meals still waiting on Dedalus when it runs out are scored with
+    the local estimate and marked ``provisional``; the remote calls finish in
+    the background and fill the estimate cache for the next request.
+
+    With ``top_k``, only halls that could still make the top ``top_k`` are
+    estimated remotely (see ``_rank_top_k``); every hall then carries an
+    ``approximate`` flag.
+    """
+    prefs = list(user_profile.get("dietary_preferences", []))
     goal = user_profile.get("goal", "maintain weight")
+    limit = max(1, concurrency or DEFAULT_SCORING_CONCURRENCY)
+    deadline = asyncio.get_running_loop().time() + budget if budget is not None else None
 
-    for hall_name, meals in dining_halls.items():
-        hall_score = 0.0
-        suggestions: List[Dict[str, Any]] = []
+    with stage_timer("filter"):
+        if isinstance(dining_halls, MenuSnapshot):
+            index = dining_halls.index
+        elif isinstance(dining_halls, MenuIndex):
+            index = dining_halls
+        else:
+            index = MenuIndex(dining_halls)
+        jobs = [(hall.name, meal.name) for hall, meal in index.compatible_meals(prefs)]
 
-        for meal in meals:
-            score, detail = await score_meal(
-                meal_name=meal["meal"],
-                meal_diet=meal.get("dietary", []),
-                user_prefs=prefs,
-                goal=goal,
-            )
-            hall_score += score
-            if detail:
-                suggestions.append(detail)
-
-        ranked.append(
-            {
-                "dining_hall": hall_name,
-                "score": hall_score,
-                "suggested_meals": suggestions,
-            }
-        )
+    if top_k and top_k < len(index.halls):
+        return await _rank_top_k(index, jobs, prefs, goal, limit, deadline, top_k)
+
+    results = await _score_jobs(jobs, prefs, goal, limit, deadline)
 
-    ranked.sort(key=lambda x: x["score"], reverse=True)
+    # gather() preserves input order, so halls and suggestions keep menu order.
+    with stage_timer("ranking"):
+        halls = _empty_halls(index)
+        _add_results(halls, jobs, results)
+        ranked = list(halls.values())
+        ranked.sort(key=lambda x: x["score"], reverse=True)
     return ranked
 
 
-async def generate_onboarding_summary(
-    user_profile: Dict[str, Any],
-    dining_halls: Dict[str, List[Dict[str, Any]]],
-) -> Dict[str, Any]:
-    """Produce a textual summary and supporting data for the onboarding flow."""
-    ranked_halls = await score_dining_halls(dining_halls, user_profile)
+async def _score_jobs(
+    jobs: List[Tuple[str, str]],
+    prefs: List[str],
+    goal: str,
+    limit: int,
+    deadline: float | None,
+) -> List[Any]:
+    """Estimate and score ``(hall, meal)`` jobs; failed meals come back as exceptions."""
+    if not jobs:
+        return []
+    semaphore = asyncio.Semaphore(limit)
+    batch_pending = False
+    try:
+        with stage_timer("batch_estimate"):
+            finished, batch = await hedger.race(
+                run_cached_calorie_estimator_batch(
+                    [(name, prefs) for _, name in jobs],
+                    max_concurrency=limit,
+                ),
+                _remaining(deadline),
+                "onboarding",
+            )
+        batch_pending = not finished
+        estimates = {name: estimate for (_, name), estimate in zip(jobs, batch or [])}
+    except Exception:
+        logger.exception("Batch calorie estimate failed; scoring meals individually")
+        estimates = {}
 
-    prompt = f"""
-You are a campus dining assistant. Craft a concise, positive message for a student who just completed onboarding.
+    async def bounded_score(meal_name: str) -> Tuple[float, Dict[str, Any]]:
+        estimate = estimates.get(meal_name)
+        if estimate is not None or batch_pending:
+            return await _score_compatible_meal(meal_name, prefs, goal, estimate, remote_pending=batch_pending)
+        async with semaphore:
+            return await _score_compatible_meal(meal_name, prefs, goal, deadline=deadline)
 
-User profile:
-{user_profile}
+    return await asyncio.gather(
+        *(bounded_score(name) for _, name in jobs),
+        return_exceptions=True,
+    )
 
-Pre-scored dining halls (higher score = better fit):
-{ranked_halls}
 
-Dining hall data supplied:
-{dining_halls}
+def _empty_halls(index: MenuIndex) -> Dict[str, Dict[str, Any]]:
+    return {hall.name: {"dining_hall": hall.name, "score": 0.0, "suggested_meals": []} for hall in index.halls}
 
-Respond with a short block of text (2-3 paragraphs) that:
-1. Highlights the top dining hall choices and why they match the student's goals/preferences.
-2. Suggests at least one meal item that fits their diet from each top pick.
-3. Encourages them to explore the app further.
-"""
 
-    recommendation = await run_dedalus_research(
-        prompt,
-        DedalusConfig(model="openai/gpt-4.1"),
+def _add_results(halls: Dict[str, Dict[str, Any]], jobs: List[Tuple[str, str]], results: List[Any]) -> None:
+    for (hall_name, meal_name), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            logger.error("Scoring %r at %s failed: %r", meal_name, hall_name, result)
+            continue
+        score, detail = result
+        halls[hall_name]["score"] += score
+        if detail:
+            halls[hall_name]["suggested_meals"].append(detail)
+
+
+async def _rank_top_k(
+    index: MenuIndex,
+    jobs: List[Tuple[str, str]],
+    prefs: List[str],
+    goal: str,
+    limit: int,
+    deadline: float | None,
+    top_k: int,
+) -> List[Dict[str, Any]]:
+    """Branch-and-bound ranking that estimates remotely only halls that can reach the top ``top_k``.
+
+    Every hall starts with a score interval summed from the local estimator's
+    per-meal calorie ranges. A hall is refined (its meals estimated through
+    the normal remote path, making its score exact) while its upper bound
+    reaches the k-th best lower bound; refinement repeats in case a remote
+    estimate landed outside its local range. Once ``deadline`` has passed no
+    further round starts. The remaining halls keep their interval midpoint as
+    score and are marked ``approximate``.
+    """
+    with stage_timer("bounds"):
+        local = local_calorie_estimate_batch([name for _, name in jobs], prefs)
+        hall_jobs: Dict[str, List[int]] = {hall.name: [] for hall in index.halls}
+        low = dict.fromkeys(hall_jobs, 0.0)
+        high = dict.fromkeys(hall_jobs, 0.0)
+        for i, (hall_name, _) in enumerate(jobs):
+            meal_low, meal_high = _score_interval(goal, local["low"][i], local["high"][i])
+            low[hall_name] += meal_low
+            high[hall_name] += meal_high
+            hall_jobs[hall_name].append(i)
+
+    halls = _empty_halls(index)
+    refined: set = set()
+    while True:
+        threshold = sorted(low.values(), reverse=True)[top_k - 1]
+        pending = [name for name in hall_jobs if name not in refined and high[name] >= threshold]
+        if not pending or (refined and deadline is not None and not _remaining(deadline)):
+            break
+        selected = [i for name in pending for i in hall_jobs[name]]
+        results = await _score_jobs([jobs[i] for i in selected], prefs, goal, limit, deadline)
+        _add_results(halls, [jobs[i] for i in selected], results)
+        for name in pending:
+            low[name] = high[name] = halls[name]["score"]
+            refined.add(name)
+
+    with stage_timer("ranking"):
+        skipped = 0
+        for name, hall in halls.items():
+            hall["approximate"] = name not in refined
+            if name in refined:
+                continue
+            hall["score"] = (low[name] + high[name]) / 2
+            hall["score_low"], hall["score_high"] = low[name], high[name]
+            hall["suggested_meals"] = [
+                {
+                    "meal": jobs[i][1],
+                    "calories": local["estimated_calories"][i],
+                    "source": "local",
+                    "provisional": False,
+                }
+                for i in hall_jobs[name]
+            ]
+            skipped += len(hall_jobs[name])
+        SKIPPED_ESTIMATES.inc(skipped)
+        ranked = list(halls.values())
+        ranked.sort(key=lambda x: x["score"], reverse=True)
+    return ranked
+
+
+def _summary_prompt(user_profile: Dict[str, Any], ranked_halls: List[Dict[str, Any]]) -> str:
+    prompt = build_onboarding_prompt(user_profile, ranked_halls)
+    logger.debug(
+        "Onboarding prompt: ~%d tokens, %d halls, %d meals (%d omitted%s)",
+        prompt.tokens,
+        prompt.halls,
+        prompt.meals,
+        prompt.omitted_meals,
+        ", truncated to budget" if prompt.truncated else "",
     )
+    return prompt.text
+
+
+def _summary_key(dining_halls: Dict[str, List[Dict[str, Any]]] | MenuSnapshot, user_profile: Dict[str, Any]) -> str:
+    if isinstance(dining_halls, MenuSnapshot):
+        # A registered menu's version id is already its content hash.
+        return summary_cache.key_for_menu(dining_halls.version, user_profile)
+    return summary_cache.key(dining_halls, user_profile)
 
-    if recommendation:
-        return {
-            "summary": recommendation.strip(),
-            "ranked_halls": ranked_halls,
-        }
 
+def fallback_summary(ranked_halls: List[Dict[str, Any]]) -> str:
+    """Deterministic summary used when Dedalus returns nothing."""
     lines = ["Thanks for completing onboarding! Here are great spots to try next:"]
     for hall in ranked_halls[:3]:
         meal_names = ", ".join(m["meal"] for m in hall["suggested_meals"]) or "options that suit your preferences"
         lines.append(f"- {hall['dining_hall']}: {meal_names}")
     lines.append("Open the dining view to see live menus and more recommendations.")
+    return "\n".join(lines)
+
+
+async def generate_onboarding_summary(
+    user_profile: Dict[str, Any],
+    dining_halls: Dict[str, List[Dict[str, Any]]] | MenuSnapshot,
+) -> Dict[str, Any]:
+    """Produce a textual summary and supporting data for the onboarding flow.
+
+    Summaries are shared by students with the same goal and dietary
+    preferences on the same menu, so a cached one skips the Dedalus call.
+    """
+    with stage_timer("scoring"):
+        ranked_halls = await score_dining_halls(
+            dining_halls,
+            user_profile,
+            budget=latency_budget("onboarding"),
+            top_k=ONBOARDING_TOP_K,
+        )
+
+    cache_key = _summary_key(dining_halls, user_profile)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return {
+            "summary": cached,
+            "ranked_halls": ranked_halls,
+        }
+
+    with stage_timer("summary"):
+        recommendation = await run_dedalus_research(
+            _summary_prompt(user_profile, ranked_halls),
+            DedalusConfig(model="openai/gpt-4.1"),
+        )
+
+    if recommendation:
+        summary = recommendation.strip()
+        summary_cache.set(cache_key, summary)
+        return {
+            "summary": summary,
+            "ranked_halls": ranked_halls,
+        }
+
     return {
-        "summary": "\n".join(lines),
+        "summary": fallback_summary(ranked_halls),
         "ranked_halls": ranked_halls,
     }
 
 
+async def stream_onboarding_summary(
+    user_profile: Dict[str, Any],
+    dining_halls: Dict[str, List[Dict[str, Any]]] | MenuSnapshot,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(event, data)`` pairs for the streaming onboarding flow.
+
+    Emits ``ranked_halls`` as soon as scoring finishes, then ``summary_delta``
+    events as summary text is generated, and finally a ``done`` event carrying
+    the full summary. A cached summary is sent as a single delta.
+    """
+    ranked_halls = await score_dining_halls(
+        dining_halls,
+        user_profile,
+        budget=latency_budget("onboarding"),
+        top_k=ONBOARDING_TOP_K,
+    )
+    yield "ranked_halls", {"ranked_halls": ranked_halls}
+
+    cache_key = _summary_key(dining_halls, user_profile)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield "summary_delta", {"text": cached}
+        yield "done", {"summary": cached, "source": "cache"}
+        return
+
+    parts: List[str] = []
+    async for text in stream_dedalus_research(
+        _summary_prompt(user_profile, ranked_halls),
+        DedalusConfig(model="openai/gpt-4.1"),
+    ):
+        parts.append(text)
+        yield "summary_delta", {"text": text}
+
+    summary = "".join(parts).strip()
+    source = "dedalus"
+    if summary:
+        summary_cache.set(cache_key, summary)
+    else:
+        summary = fallback_summary(ranked_halls)
+        source = "fallback"
+        yield "summary_delta", {"text": summary}
+    yield "done", {"summary": summary, "source": source}
+
+
 def generate_onboarding_summary_sync(
     user_profile: Dict[str, Any],
     dining_halls: Dict[str, List[Dict[str, Any]]],
@@ -0,0 +1,567 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+try:
+    from backend import dedalus_runner
+    from backend.cascade import DEFAULT_FAST_MODEL, DEFAULT_LARGE_MODEL, CascadePolicy
+    from backend.cassette import PASSTHROUGH, RECORD, REPLAY, Cassette, DedalusTransport
+    from backend.estimate_cache import EstimateCache
+    from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, canned_estimate, use_fake_dedalus
+    from backend.main import app
+    from backend.nutrition_index import NutritionIndex
+    from backend.summary_cache import summary_cache
+except ImportError:
+    import dedalus_runner  # type: ignore
+    from cascade import DEFAULT_FAST_MODEL, DEFAULT_LARGE_MODEL, CascadePolicy  # type: ignore
+    from cassette import PASSTHROUGH, RECORD, REPLAY, Cassette, DedalusTransport  # type: ignore
+    from estimate_cache import EstimateCache  # type: ignore
+    from fake_dedalus import FakeDedalusRunner, LatencyProfile, canned_estimate, use_fake_dedalus  # type: ignore
+    from main import app  # type: ignore
+    from nutrition_index import NutritionIndex  # type: ignore
+    from summary_cache import summary_cache  # type: ignore
+
+BACKEND_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BACKEND_DIR / "bench_results"
+
+DISHES = [
+    "Tofu Bowl", "Chicken Caesar Salad", "Grilled Salmon", "Cheese Pizza", "Quinoa Salad",
+    "Beef Burger", "Lentil Soup", "Vegetable Stir Fry", "Chicken Burrito", "Pasta Alfredo",
+    "Shrimp Fried Rice", "Falafel Wrap", "Turkey Sandwich", "Mushroom Risotto", "Pork Ramen",
+    "Chickpea Curry", "Egg Omelette", "Berry Smoothie", "Black Bean Tacos", "Tempeh Poke",
+]
+# Dishes the local keyword estimator does not recognize, so the cascade has to ask a model.
+UNFAMILIAR_DISHES = ["Shakshuka", "Bibimbap", "Pupusa", "Khachapuri", "Jollof", "Chilaquiles"]
+QUALIFIERS = ["", "Spicy ", "Grilled ", "Crispy ", "Roasted ", "Classic ", "Loaded ", "Light "]
+TAGS = ["vegan", "vegetarian", "gluten-free", "dairy-free", "halal", "pescatarian"]
+GOALS = ["Build Muscle", "Lose Weight", "Maintain Weight"]
+
+# List prices in USD per million (input, output) tokens; only used to compare policies.
+MODEL_PRICES = {
+    DEFAULT_LARGE_MODEL: (2.00, 8.00),
+    DEFAULT_FAST_MODEL: (0.40, 1.60),
+}
+CASCADE_POLICIES = {
+    "large-only": CascadePolicy(index_confidence=math.inf, local_confidence=math.inf, fast_model=None),
+    "fast-then-large": CascadePolicy(index_confidence=math.inf, local_confidence=math.inf),
+    "cascade": CascadePolicy(index_confidence=math.inf),
+    "cascade+index": CascadePolicy(),
+}
+# Dishes learned by neither the index nor the local estimator; any index answer for them is a false hit.
+NOVEL_DISHES = [
+    "Pad Thai", "Beef Pho", "Pork Gyoza", "Seafood Paella", "Moussaka", "Potato Pierogi",
+    "Chicken Tamales", "Lamb Biryani", "Fish Ceviche", "Goulash", "Dal Makhani", "Arepa",
+]
+# Rewrites of a learned dish name that a menu might plausibly use for the same dish.
+VARIANTS: List[Callable[[str, random.Random], str]] = [
+    lambda dish, rng: rng.choice(QUALIFIERS[1:]) + dish,
+    lambda dish, rng: " ".join(reversed(dish.split())),
+    lambda dish, rng: f"{dish} ({rng.choice(['V', 'GF', 'DF'])})",
+    lambda dish, rng: f"House {dish.lower()}",
+    lambda dish, rng: f"{dish} with {rng.choice(['Rice', 'Greens', 'Fries', 'Herbs'])}",
+]
+SYLLABLES = ["ka", "ro", "mi", "tsu", "len", "bor", "qua", "zed", "vin", "pa", "shu", "nor", "tel", "gri"]
+
+
+@dataclass
+class Scenario:
+    name: str
+    requests: int
+    concurrency: int
+    halls: int = 6
+    meals_per_hall: int = 15
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    concurrency: int
+    errors: int
+    wall_seconds: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_traced_mb: float
+    upstream_calls: int
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def make_menu(rng: random.Random, halls: int, meals_per_hall: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": f"Hall {h}",
+            "meals": [
+                {
+                    "meal": rng.choice(QUALIFIERS) + rng.choice(DISHES),
+                    "dietary": rng.sample(TAGS, rng.randint(0, 3)),
+                }
+                for _ in range(meals_per_hall)
+            ],
+        }
+        for h in range(halls)
+    ]
+
+
+def make_request(scenario: Scenario, rng: random.Random) -> tuple[str, Dict[str, Any]]:
+    if scenario.name == "calories":
+        meal = rng.choice(QUALIFIERS) + rng.choice(DISHES)
+        return "/calories", {"meal_name": meal, "dietary_restrictions": rng.sample(TAGS, rng.randint(0, 2))}
+    if scenario.name == "search":
+        return "/search", {"query": f"Dining highlights #{rng.randint(0, 50)}"}
+    return "/onboarding-summary", {
+        "user_profile": {
+            "age": rng.randint(18, 25),
+            "weight": rng.randint(110, 220),
+            "dietary_preferences": rng.sample(TAGS, rng.randint(0, 1)),
+            "goal": rng.choice(GOALS),
+        },
+        "dining_halls": make_menu(rng, scenario.halls, scenario.meals_per_hall),
+    }
+
+
+async def run_scenario(
+    scenario: Scenario,
+    runner: FakeDedalusRunner,
+    seed: int,
+    trace_memory: bool = True,
+) -> ScenarioResult:
+    rng = random.Random(seed)
+    payloads = [make_request(scenario, rng) for _ in range(scenario.requests)]
+    latencies: List[float] = []
+    errors = 0
+    calls_before = runner.calls
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in payloads:
+        queue.put_nowait(item)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            while not queue.empty():
+                path, body = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(path, json=body)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        # tracemalloc slows allocation-heavy code; disable it for pure latency runs.
+        peak = 0
+        if trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+        wall = time.perf_counter() - wall_start
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    ms = [x * 1000 for x in latencies]
+    return ScenarioResult(
+        name=scenario.name,
+        requests=scenario.requests,
+        concurrency=scenario.concurrency,
+        errors=errors,
+        wall_seconds=round(wall, 4),
+        throughput_rps=round(len(latencies) / wall, 2) if wall else 0.0,
+        p50_ms=round(percentile(ms, 50), 2),
+        p95_ms=round(percentile(ms, 95), 2),
+        p99_ms=round(percentile(ms, 99), 2),
+        mean_ms=round(statistics.fmean(ms), 2) if ms else 0.0,
+        peak_traced_mb=round(peak / 1e6, 2),
+        upstream_calls=runner.calls - calls_before,
+        params={"halls": scenario.halls, "meals_per_hall": scenario.meals_per_hall}
+        if scenario.name == "onboarding"
+        else {},
+    )
+
+
+@dataclass
+class PolicyResult:
+    policy: str
+    estimates: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    tiers: Dict[str, int]
+    calls_by_model: Dict[str, int]
+    cost_usd_per_1k_estimates: float
+
+
+async def run_policy(
+    name: str,
+    policy: CascadePolicy,
+    meals: List[tuple[str, List[str]]],
+    runner: FakeDedalusRunner,
+    concurrency: int,
+) -> PolicyResult:
+    """Estimate every meal (uncached) under ``policy`` and price the upstream usage."""
+    latencies: List[float] = []
+    tiers: Dict[str, int] = {}
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def estimate(meal: str, restrictions: List[str]) -> None:
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            try:
+                result = await dedalus_runner.run_dedalus_calorie_estimator(meal, restrictions)
+            except Exception:
+                result = None
+            latencies.append(time.perf_counter() - start)
+        if result is None:
+            errors += 1
+        else:
+            tiers[result.get("tier", "unknown")] = tiers.get(result.get("tier", "unknown"), 0) + 1
+
+    saved = dedalus_runner.cascade_policy, dedalus_runner.nutrition_index
+    dedalus_runner.cascade_policy, dedalus_runner.nutrition_index = policy, NutritionIndex(path=None)
+    try:
+        with use_fake_dedalus(runner):
+            await asyncio.gather(*(estimate(meal, restrictions) for meal, restrictions in meals))
+            await dedalus_runner.wait_for_learning()
+    finally:
+        dedalus_runner.cascade_policy, dedalus_runner.nutrition_index = saved
+
+    cost = 0.0
+    for model, usage in runner.usage().items():
+        input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES[DEFAULT_LARGE_MODEL])
+        cost += (usage["input_tokens"] * input_price + usage["output_tokens"] * output_price) / 1e6
+    ms = [x * 1000 for x in latencies]
+    return PolicyResult(
+        policy=name,
+        estimates=len(meals),
+        errors=errors,
+        p50_ms=round(percentile(ms, 50), 2),
+        p95_ms=round(percentile(ms, 95), 2),
+        mean_ms=round(statistics.fmean(ms), 2) if ms else 0.0,
+        tiers=tiers,
+        calls_by_model=dict(runner.calls_by_model),
+        cost_usd_per_1k_estimates=round(cost * 1000 / len(meals), 4) if meals else 0.0,
+    )
+
+
+async def run_cascade_benchmark(
+    estimates: int,
+    latency: LatencyProfile,
+    fast_latency: LatencyProfile,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    concurrency: int = 8,
+    policies: Optional[Dict[str, CascadePolicy]] = None,
+) -> List[Dict[str, Any]]:
+    """Compare latency and cost per single-meal estimate under each cascade policy."""
+    rng = random.Random(seed)
+    dishes = DISHES + UNFAMILIAR_DISHES
+    meals = [(rng.choice(QUALIFIERS) + rng.choice(dishes), rng.sample(TAGS, rng.randint(0, 2))) for _ in range(estimates)]
+    results = []
+    for name, policy in (policies or CASCADE_POLICIES).items():
+        runner = FakeDedalusRunner(
+            latency=latency,
+            model_latency={DEFAULT_FAST_MODEL: fast_latency},
+            error_rate=error_rate,
+            seed=seed,
+        )
+        results.append(asdict(await run_policy(name, policy, meals, runner, concurrency)))
+    return results
+
+
+def _filler_name(rng: random.Random) -> str:
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title() for _ in range(2))
+
+
+def run_index_benchmark(
+    filler: int = 5000,
+    lookups: int = 2000,
+    threshold: Optional[float] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Measure nutrition index lookup latency and hit rates.
+
+    The index learns every benchmark dish (as the fake model would decompose
+    it) plus ``filler`` made-up dishes. Half of the lookups are rewrites of a
+    learned dish and should resolve locally; the other half are novel dishes
+    and should not. Calorie error is against what the model says for the
+    rewritten name itself.
+    """
+    rng = random.Random(seed)
+    threshold = CascadePolicy().index_confidence if threshold is None else threshold
+    index = NutritionIndex(path=None, max_records=filler + len(DISHES) * 4)
+    learned = DISHES + UNFAMILIAR_DISHES
+    for _ in range(filler):
+        name = _filler_name(rng)
+        index.learn(name, [], {"estimated_calories": rng.randint(150, 900), "ingredient_list": name.lower().split()})
+    learn_us = []
+    for dish in learned:
+        start = time.perf_counter()
+        index.learn(dish, [], canned_estimate(dish, []), source="benchmark")
+        learn_us.append((time.perf_counter() - start) * 1e6)
+
+    lookup_us: List[float] = []
+    hits = false_hits = 0
+    errors: List[float] = []
+    for i in range(lookups):
+        novel = i % 2 == 1
+        meal = rng.choice(NOVEL_DISHES) if novel else rng.choice(VARIANTS)(rng.choice(learned), rng)
+        start = time.perf_counter()
+        match = index.lookup(meal, [])
+        lookup_us.append((time.perf_counter() - start) * 1e6)
+        if match is None or match.confidence < threshold:
+            continue
+        if novel:
+            false_hits += 1
+            continue
+        hits += 1
+        expected = canned_estimate(meal, [])["estimated_calories"]
+        errors.append(abs(match.estimated_calories - expected) / expected)
+
+    near_duplicates = lookups - lookups // 2
+    return {
+        "records": len(index),
+        "threshold": threshold,
+        "lookups": lookups,
+        "lookup_p50_us": round(percentile(lookup_us, 50), 1),
+        "lookup_p95_us": round(percentile(lookup_us, 95), 1),
+        "learn_p50_us": round(percentile(learn_us, 50), 1),
+        "hit_rate": round(hits / near_duplicates, 3) if near_duplicates else 0.0,
+        "false_hit_rate": round(false_hits / (lookups // 2), 3) if lookups > 1 else 0.0,
+        "calorie_error_p50": round(percentile(errors, 50), 3),
+        "calorie_error_p95": round(percentile(errors, 95), 3),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def _live_dedalus(transport: DedalusTransport) -> Iterator[DedalusTransport]:
+    """Send calls to the real Dedalus API through ``transport`` (used to record cassettes)."""
+    saved_pool = dedalus_runner.client_pool
+    dedalus_runner.client_pool = dedalus_runner.DedalusClientPool(saved_pool.config, transport)
+    try:
+        yield transport
+    finally:
+        dedalus_runner.client_pool = saved_pool
+
+
+async def run_benchmark(
+    scenarios: List[Scenario],
+    latency: LatencyProfile,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    warm_cache: bool = False,
+    trace_memory: bool = True,
+    runner_factory: Callable[..., FakeDedalusRunner] = FakeDedalusRunner,
+    transport: Optional[DedalusTransport] = None,
+) -> Dict[str, Any]:
+    """Run each scenario against the app and return a comparable report.
+
+    Dedalus is faked unless ``transport`` records the live API or replays a cassette.
+    """
+    transport = transport or DedalusTransport()
+    if transport.mode == RECORD:
+        backend = _live_dedalus(transport)
+    else:
+        backend = use_fake_dedalus(runner_factory(latency=latency, error_rate=error_rate, seed=seed), transport)
+    results = []
+    with backend as runner:
+        # Upstream calls are counted by whatever actually serves them.
+        counter = runner if transport.mode == PASSTHROUGH else transport
+        # Fake outputs must never land in the real on-disk caches.
+        saved = dedalus_runner.calorie_cache, dedalus_runner.nutrition_index, summary_cache.store
+        try:
+            for scenario in scenarios:
+                if not warm_cache or scenario is scenarios[0]:
+                    dedalus_runner.calorie_cache = EstimateCache(path=None)
+                    dedalus_runner.nutrition_index = NutritionIndex(path=None)
+                    summary_cache.store = EstimateCache(path=None)
+                results.append(asdict(await run_scenario(scenario, counter, seed, trace_memory)))
+            await dedalus_runner.wait_for_learning()
+        finally:
+            dedalus_runner.calorie_cache, dedalus_runner.nutrition_index, summary_cache.store = saved
+            await dedalus_runner.client_pool.close()
+
+    return {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "fake_dedalus": {"latency": asdict(latency), "error_rate": error_rate, "seed": seed},
+        "transport": transport.stats(),
+        "warm_cache": warm_cache,
+        "trace_memory": trace_memory,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "scenarios": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regressions of ``report`` against ``baseline``."""
+    regressions = []
+    previous = {s["name"]: s for s in baseline.get("scenarios", [])}
+    for current in report["scenarios"]:
+        base = previous.get(current["name"])
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[key] and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{current['name']} {key}: {base[key]} -> {current[key]}")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{current['name']} throughput_rps: {base['throughput_rps']} -> {current['throughput_rps']}"
+            )
+    return regressions
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    header = f"{'scenario':<12}{'req':>6}{'conc':>6}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'peakMB':>8}{'calls':>7}"
+    print(header)
+    for s in report["scenarios"]:
+        print(
+            f"{s['name']:<12}{s['requests']:>6}{s['concurrency']:>6}{s['errors']:>5}{s['throughput_rps']:>9}"
+            f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['peak_traced_mb']:>8}{s['upstream_calls']:>7}"
+        )
+
+
+def _print_cascade(results: List[Dict[str, Any]]) -> None:
+    print(f"{'policy':<17}{'n':>6}{'err':>5}{'p50':>9}{'p95':>9}{'mean':>9}{'$/1k':>9}  tiers")
+    for r in results:
+        tiers = ", ".join(f"{tier}={count}" for tier, count in sorted(r["tiers"].items()))
+        print(
+            f"{r['policy']:<17}{r['estimates']:>6}{r['errors']:>5}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+            f"{r['mean_ms']:>9}{r['cost_usd_per_1k_estimates']:>9}  {tiers}"
+        )
+
+
+def _print_index(result: Dict[str, Any]) -> None:
+    print(
+        f"nutrition index: {result['records']} records, lookup p50 {result['lookup_p50_us']}us "
+        f"p95 {result['lookup_p95_us']}us, hit rate {result['hit_rate']:.1%} on near-duplicates, "
+        f"false hits {result['false_hit_rate']:.1%} on novel dishes, "
+        f"calorie error p50 {result['calorie_error_p50']:.1%} p95 {result['calorie_error_p95']:.1%}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the API against a local fake Dedalus runner.")
+    parser.add_argument("--scenarios", default="calories,search,onboarding")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--halls", type=int, default=6)
+    parser.add_argument("--meals-per-hall", type=int, default=15)
+    parser.add_argument("--latency", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median fake upstream latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the estimate cache between scenarios")
+    parser.add_argument("--no-trace-memory", action="store_true", help="Skip tracemalloc peak tracking")
+    parser.add_argument("--cascade", action="store_true", help="Also compare calorie cascade policies")
+    parser.add_argument("--cascade-estimates", type=int, default=200)
+    parser.add_argument("--fast-latency-ms", type=float, help="Median fake latency of the fast model")
+    parser.add_argument("--nutrition-index", action="store_true", help="Also benchmark nutrition index lookups")
+    parser.add_argument("--index-records", type=int, default=5000, help="Made-up dishes to fill the index with")
+    recorded = parser.add_mutually_exclusive_group()
+    recorded.add_argument("--record", type=Path, help="Call the live Dedalus API and record a cassette")
+    recorded.add_argument("--replay", type=Path, help="Serve Dedalus calls from a recorded cassette")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep for the recorded latencies")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "latest.json")
+    parser.add_argument("--compare", type=Path, help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown vs. baseline")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        Scenario(name, args.requests, args.concurrency, args.halls, args.meals_per_hall)
+        for name in args.scenarios.split(",")
+        if name
+    ]
+    latency = LatencyProfile(kind=args.latency, median=args.latency_ms / 1000, spread=args.latency_ms / 2000)
+    transport = None
+    if args.record:
+        transport = DedalusTransport(RECORD, Cassette(args.record))
+    elif args.replay:
+        transport = DedalusTransport(REPLAY, Cassette.load(args.replay), replay_latency=args.replay_latency)
+    report = asyncio.run(
+        run_benchmark(
+            scenarios,
+            latency,
+            args.error_rate,
+            args.seed,
+            args.warm_cache,
+            trace_memory=not args.no_trace_memory,
+            transport=transport,
+        )
+    )
+    _print_report(report)
+    if transport is not None:
+        stats = report["transport"]
+        print(f"\n{stats['mode']}: {stats['calls']} calls, {stats['misses']} misses")
+        print(f"{stats['entries']} recorded calls in {stats['cassette']}")
+    if args.cascade:
+        fast_ms = args.fast_latency_ms or args.latency_ms * 0.4
+        fast_latency = LatencyProfile(kind=args.latency, median=fast_ms / 1000, spread=fast_ms / 2000)
+        report["cascade"] = asyncio.run(
+            run_cascade_benchmark(
+                args.cascade_estimates, latency, fast_latency, args.error_rate, args.seed, args.concurrency
+            )
+        )
+        print()
+        _print_cascade(report["cascade"])
+    if args.nutrition_index:
+        report["nutrition_index"] = run_index_benchmark(args.index_records, seed=args.seed)
+        print()
+        _print_index(report["nutrition_index"])
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved report to {args.output}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,369 @@
 import re
-import random
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+# NumPy is imported on the first batch estimate (see ``numpy_available``); when it
+# is missing, batch estimates fall back to plain Python arithmetic.
+_NOT_IMPORTED = object()
+np: Any = _NOT_IMPORTED
 
 # ------------------------------
-# Local Calorie Estimator
+# Keyword tables
 # ------------------------------
-def local_calorie_estimate(meal_name: str, dietary_restrictions: List[str] = None) -> Dict:
-    """
-    Returns estimated calories, confidence, and reasoning using heuristics.
-    """
-    if dietary_restrictions is None:
-        dietary_restrictions = []
+# Dish keywords describe a whole single-serving plate.
+DISH_TABLE: Dict[str, Tuple[int, int]] = {
+    "salad": (150, 350),
+    "burger": (600, 900),
+    "cheeseburger": (700, 1000),
+    "pizza": (600, 900),
+    "pasta": (400, 700),
+    "spaghetti": (400, 700),
+    "lasagna": (500, 800),
+    "mac and cheese": (450, 750),
+    "soup": (150, 350),
+    "chili": (300, 500),
+    "stew": (300, 550),
+    "bowl": (300, 500),
+    "poke": (400, 650),
+    "sandwich": (350, 650),
+    "wrap": (350, 600),
+    "burrito": (600, 1000),
+    "taco": (350, 600),
+    "quesadilla": (500, 800),
+    "nachos": (600, 1000),
+    "stir fry": (350, 600),
+    "fried rice": (450, 700),
+    "curry": (400, 700),
+    "pho": (350, 550),
+    "ramen": (450, 750),
+    "noodles": (400, 650),
+    "sushi": (300, 550),
+    "omelette": (250, 450),
+    "pancakes": (350, 650),
+    "waffles": (350, 600),
+    "oatmeal": (150, 300),
+    "smoothie": (200, 400),
+    "parfait": (200, 350),
+    "risotto": (450, 700),
+    "paella": (450, 700),
+    "casserole": (350, 600),
+    "skewers": (250, 450),
+    "hot dog": (250, 450),
+    "dumplings": (300, 500),
+    "falafel": (350, 550),
+    "hummus plate": (300, 500),
+}
 
-    meal = meal_name.lower()
-    # Basic calorie table
-    calorie_table = {
-        "salad": (150, 350),
-        "burger": (600, 900),
-        "chicken": (300, 600),
-        "tofu": (200, 400),
-        "pasta": (400, 700),
-        "pizza": (600, 900),
-        "soup": (150, 350),
-    }
+# Component keywords add to the plate (or make one up when no dish matched).
+COMPONENT_TABLE: Dict[str, Tuple[int, int]] = {
+    "chicken": (100, 250),
+    "beef": (150, 300),
+    "steak": (200, 350),
+    "pork": (150, 300),
+    "bacon": (80, 150),
+    "sausage": (150, 250),
+    "ham": (60, 120),
+    "turkey": (100, 200),
+    "lamb": (150, 300),
+    "salmon": (150, 300),
+    "tuna": (100, 200),
+    "shrimp": (60, 150),
+    "fish": (100, 250),
+    "cod": (80, 180),
+    "tofu": (100, 200),
+    "tempeh": (150, 250),
+    "seitan": (100, 200),
+    "egg": (70, 150),
+    "eggs": (140, 220),
+    "beans": (100, 220),
+    "lentil": (120, 230),
+    "chickpea": (120, 230),
+    "quinoa": (120, 220),
+    "rice": (150, 250),
+    "potato": (100, 250),
+    "potatoes": (150, 300),
+    "fries": (250, 450),
+    "bread": (80, 200),
+    "cheese": (80, 200),
+    "avocado": (100, 200),
+    "guacamole": (80, 180),
+    "caesar": (100, 200),
+    "ranch": (100, 180),
+    "pesto": (80, 180),
+    "alfredo": (200, 350),
+    "peanut": (90, 190),
+    "nuts": (90, 190),
+    "mushroom": (10, 40),
+    "broccoli": (20, 60),
+    "spinach": (10, 40),
+    "kale": (15, 50),
+    "vegetable": (30, 100),
+    "vegetables": (40, 120),
+    "veggie": (30, 100),
+    "corn": (60, 130),
+    "fruit": (50, 120),
+    "berries": (40, 90),
+    "granola": (120, 250),
+    "yogurt": (80, 180),
+    "chocolate": (120, 250),
+}
+
+# Modifier keywords scale the whole estimate.
+MODIFIER_TABLE: Dict[str, float] = {
+    "fried": 1.25,
+    "crispy": 1.2,
+    "breaded": 1.2,
+    "creamy": 1.2,
+    "loaded": 1.3,
+    "double": 1.4,
+    "grilled": 0.9,
+    "roasted": 0.95,
+    "baked": 0.95,
+    "steamed": 0.85,
+    "light": 0.85,
+    "mini": 0.6,
+    "side": 0.5,
+}
+
+DEFAULT_RANGE: Tuple[int, int] = (350, 600)
+# Base plate used when only components matched (e.g. "Grilled Chicken").
+COMPONENT_BASE_RANGE: Tuple[int, int] = (200, 350)
+
+# One entry per keyword: (term, kind, low, high, factor)
+_TERMS: List[Tuple[str, str, int, int, float]] = (
+    [(t, "dish", low, high, 1.0) for t, (low, high) in DISH_TABLE.items()]
+    + [(t, "component", low, high, 1.0) for t, (low, high) in COMPONENT_TABLE.items()]
+    + [(t, "modifier", 0, 0, f) for t, f in MODIFIER_TABLE.items()]
+)
+_TERM_INDEX = {term: i for i, (term, *_rest) in enumerate(_TERMS)}
+
+# A single alternation over every keyword (longest first, so "fried rice" wins
+# over "fried"), with an optional plural suffix. Compiled on first use so that
+# importing this module stays cheap.
+MATCHER_PATTERN = (
+    r"\b(" + "|".join(re.escape(t) for t in sorted(_TERM_INDEX, key=len, reverse=True)) + r")(?:e?s)?\b"
+)
+_matcher: Optional[Pattern[str]] = None
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def numpy_available() -> bool:
+    global np
+    if np is _NOT_IMPORTED:
+        try:
+            import numpy  # type: ignore
+        except ImportError:
+            np = None
+        else:
+            np = numpy
+    return np is not None
 
-    base_low, base_high = (350, 600)
-    matched_terms = []
 
-    for term, (low, high) in calorie_table.items():
-        if term in meal:
-            base_low, base_high = low, high
-            matched_terms.append(term)
-            break
+def keyword_matcher() -> Pattern[str]:
+    global _matcher
+    if _matcher is None:
+        _matcher = re.compile(MATCHER_PATTERN)
+    return _matcher
 
+
+def install_matcher(matcher: Pattern[str]) -> bool:
+    """Use a prebuilt matcher (e.g. from a warm-state snapshot) if it matches the current tables."""
+    global _matcher
+    if matcher.pattern != MATCHER_PATTERN:
+        return False
+    _matcher = matcher
+    return True
+
+
+def _match_terms(meal_name: str) -> List[int]:
+    """Return the distinct keyword indices found in ``meal_name``, in order of appearance."""
+    text = _NON_WORD.sub(" ", meal_name.lower())
+    seen: List[int] = []
+    for match in keyword_matcher().finditer(text):
+        index = _TERM_INDEX[match.group(1)]
+        if index not in seen:
+            seen.append(index)
+    return seen
+
+
+def _dietary_adjustment(dietary_restrictions: Iterable[str]) -> Tuple[float, List[str]]:
+    restrictions = {d.lower() for d in dietary_restrictions}
     adjustment = 1.0
     reasons = []
-
-    if any(d in ["vegan", "vegetarian"] for d in dietary_restrictions):
+    if restrictions & {"vegan", "vegetarian"}:
         adjustment *= 0.85
         reasons.append("Lower calories for plant-based meal.")
-    if "gluten-free" in dietary_restrictions:
+    if "gluten-free" in restrictions:
         adjustment *= 0.95
         reasons.append("Gluten-free meals often slightly lighter.")
+    return adjustment, reasons
+
+
+def _confidence(has_dish: bool, has_component: bool) -> float:
+    if has_dish and has_component:
+        return 0.85
+    if has_dish:
+        return 0.8
+    if has_component:
+        return 0.7
+    return 0.6
+
+
+# ------------------------------
+# Local Calorie Estimator
+# ------------------------------
+def local_calorie_range(meal_name: str, dietary_restrictions: List[str] = None) -> Dict:
+    """
+    Returns a deterministic point estimate with low/high bounds, confidence, and reasoning.
+    Dish ranges are averaged, component ranges are added, and modifiers scale the result.
+    """
+    if dietary_restrictions is None:
+        dietary_restrictions = []
+
+    dish_ranges = []
+    component_low = component_high = 0
+    factor = 1.0
+    matched_terms = []
+    for index in _match_terms(meal_name):
+        term, kind, low, high, term_factor = _TERMS[index]
+        matched_terms.append(term)
+        if kind == "dish":
+            dish_ranges.append((low, high))
+        elif kind == "component":
+            component_low += low
+            component_high += high
+        else:
+            factor *= term_factor
+
+    if dish_ranges:
+        base_low = sum(low for low, _ in dish_ranges) / len(dish_ranges)
+        base_high = sum(high for _, high in dish_ranges) / len(dish_ranges)
+    elif component_high:
+        base_low, base_high = COMPONENT_BASE_RANGE
+    else:
+        base_low, base_high = DEFAULT_RANGE
+
+    adjustment, reasons = _dietary_adjustment(dietary_restrictions)
+    scale = factor * adjustment
+    low = int((base_low + component_low) * scale)
+    high = int((base_high + component_high) * scale)
 
-    est_calories = int(random.uniform(base_low, base_high) * adjustment)
-    confidence = 0.6 if not matched_terms else 0.8
-    '''
     return {
         "meal": meal_name,
-        "estimated_calories": est_calories,
-        "confidence": confidence,
-        "reasoning": (
-            f"Matched keywords: {', '.join(matched_terms) if matched_terms else 'none'}. "
-            + " ".join(reasons) if reasons else ""
+        "estimated_calories": (low + high) // 2,
+        "low": low,
+        "high": high,
+        "confidence": _confidence(bool(dish_ranges), bool(component_high)),
+        "matched_terms": matched_terms,
+        "reasoning": " ".join(
+            [f"Matched keywords: {', '.join(matched_terms) if matched_terms else 'none'}."] + reasons
         ),
     }
-    '''
-    return est_calories
 
+
+def local_calorie_estimate(meal_name: str, dietary_restrictions: List[str] = None) -> int:
+    """
+    Returns a deterministic calorie point estimate using keyword heuristics.
+    """
+    return local_calorie_range(meal_name, dietary_restrictions)["estimated_calories"]
+
+
+def local_calorie_estimate_batch(
+    meal_names: Sequence[str],
+    dietary_restrictions: List[str] = None,
+) -> Dict[str, List]:
+    """
+    Estimate many meals at once; ``dietary_restrictions`` applies to every meal.
+    Returns parallel lists: ``estimated_calories``, ``low``, ``high`` and ``confidence``.
+
+    Keyword matching runs once per name; the range arithmetic is done over
+    arrays (NumPy when installed) instead of per-meal Python loops.
+    """
+    adjustment, _ = _dietary_adjustment(dietary_restrictions or [])
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, name in enumerate(meal_names):
+        for index in _match_terms(name):
+            rows.append(row)
+            cols.append(index)
+
+    if not numpy_available():
+        return _batch_python(len(meal_names), rows, cols, adjustment)
+
+    n = len(meal_names)
+    kinds = np.array([kind for _, kind, *_ in _TERMS])
+    lows = np.array([low for _, _, low, _, _ in _TERMS], dtype=float)
+    highs = np.array([high for _, _, _, high, _ in _TERMS], dtype=float)
+    factors = np.array([f for *_, f in _TERMS], dtype=float)
+    rows_a = np.asarray(rows, dtype=np.intp)
+    cols_a = np.asarray(cols, dtype=np.intp)
+
+    is_dish = kinds[cols_a] == "dish"
+    is_component = kinds[cols_a] == "component"
+
+    dish_count = np.bincount(rows_a[is_dish], minlength=n)
+    dish_low = np.bincount(rows_a[is_dish], weights=lows[cols_a[is_dish]], minlength=n)
+    dish_high = np.bincount(rows_a[is_dish], weights=highs[cols_a[is_dish]], minlength=n)
+    comp_low = np.bincount(rows_a[is_component], weights=lows[cols_a[is_component]], minlength=n)
+    comp_high = np.bincount(rows_a[is_component], weights=highs[cols_a[is_component]], minlength=n)
+    scale = np.ones(n)
+    np.multiply.at(scale, rows_a, factors[cols_a])
+    scale *= adjustment
+
+    has_dish = dish_count > 0
+    has_component = comp_high > 0
+    safe_count = np.maximum(dish_count, 1)
+    base_low = np.where(
+        has_dish, dish_low / safe_count, np.where(has_component, COMPONENT_BASE_RANGE[0], DEFAULT_RANGE[0])
+    )
+    base_high = np.where(
+        has_dish, dish_high / safe_count, np.where(has_component, COMPONENT_BASE_RANGE[1], DEFAULT_RANGE[1])
+    )
+    low = ((base_low + comp_low) * scale).astype(int)
+    high = ((base_high + comp_high) * scale).astype(int)
+    confidence = np.select(
+        [has_dish & has_component, has_dish, has_component],
+        [0.85, 0.8, 0.7],
+        default=0.6,
+    )
+    return {
+        "estimated_calories": ((low + high) // 2).tolist(),
+        "low": low.tolist(),
+        "high": high.tolist(),
+        "confidence": confidence.tolist(),
+    }
+
+
+def _batch_python(n: int, rows: List[int], cols: List[int], adjustment: float) -> Dict[str, List]:
+    dish_count = [0] * n
+    dish_low = [0.0] * n
+    dish_high = [0.0] * n
+    comp_low = [0.0] * n
+    comp_high = [0.0] * n
+    scale = [1.0] * n
+    for row, index in zip(rows, cols):
+        _, kind, low, high, factor = _TERMS[index]
+        if kind == "dish":
+            dish_count[row] += 1
+            dish_low[row] += low
+            dish_high[row] += high
+        elif kind == "component":
+            comp_low[row] += low
+            comp_high[row] += high
+        else:
+            scale[row] *= factor
+
+    result: Dict[str, List] = {"estimated_calories": [], "low": [], "high": [], "confidence": []}
+    for row in range(n):
+        if dish_count[row]:
+            base_low, base_high = dish_low[row] / dish_count[row], dish_high[row] / dish_count[row]
+        elif comp_high[row]:
+            base_low, base_high = COMPONENT_BASE_RANGE
+        else:
+            base_low, base_high = DEFAULT_RANGE
+        low = int((base_low + comp_low[row]) * (scale[row] * adjustment))
+        high = int((base_high + comp_high[row]) * (scale[row] * adjustment))
+        result["estimated_calories"].append((low + high) // 2)
+        result["low"].append(low)
+        result["high"].append(high)
+        result["confidence"].append(_confidence(bool(dish_count[row]), bool(comp_high[row])))
+    return result
@@ -0,0 +1,100 @@
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+try:
+    from backend.metrics import registry
+except ImportError:
+    from metrics import registry  # type: ignore
+
+INDEX_TIER = "index"
+LOCAL_TIER = "local"
+FAST_TIER = "fast"
+LARGE_TIER = "large"
+
+DEFAULT_FAST_MODEL = "openai/gpt-4.1-mini"
+DEFAULT_LARGE_MODEL = "openai/gpt-4.1"
+
+# Words a model may use instead of a number when asked for its confidence.
+_CONFIDENCE_WORDS = {"very high": 0.95, "high": 0.9, "medium": 0.6, "moderate": 0.6, "low": 0.3, "very low": 0.1}
+
+CASCADE_TIERS = registry.counter(
+    "calorie_cascade_answers_total",
+    "Single-meal calorie estimates by the cascade tier that answered (index, local, fast, large).",
+    ["tier"],
+)
+CASCADE_ESCALATIONS = registry.counter(
+    "calorie_cascade_escalations_total",
+    "Fast-model estimates escalated to the large model, by reason (low_confidence, parse_error, error).",
+    ["reason"],
+)
+
+
+def _threshold(name: str, default: str) -> float:
+    """Confidence threshold from ``name``; ``off`` disables the tier (nothing can reach it)."""
+    raw = os.getenv(name, default).strip().lower()
+    return math.inf if raw in ("", "off", "none") else float(raw)
+
+
+@dataclass
+class CascadePolicy:
+    """Which tier answers a single-meal calorie estimate.
+
+    A near-duplicate of a meal the models already decomposed (see
+    ``nutrition_index``) answers when its match confidence is at least
+    ``index_confidence``. Next, the local estimate is used when its
+    ``local_confidence`` score is at least ``local_confidence``. Otherwise ``fast_model`` is
+    asked, and its answer is kept when it parses and reports a confidence of
+    at least ``fast_confidence``; anything else is escalated to ``large_model``.
+    ``fast_model=None`` skips straight to the large model.
+    """
+
+    local_confidence: float = 0.75
+    index_confidence: float = 0.75
+    fast_model: Optional[str] = DEFAULT_FAST_MODEL
+    fast_confidence: float = 0.7
+    large_model: str = DEFAULT_LARGE_MODEL
+
+    @classmethod
+    def from_env(cls) -> "CascadePolicy":
+        fast_model = os.getenv("CALORIE_FAST_MODEL", DEFAULT_FAST_MODEL).strip()
+        return cls(
+            local_confidence=_threshold("CALORIE_LOCAL_CONFIDENCE", "0.75"),
+            index_confidence=_threshold("CALORIE_INDEX_CONFIDENCE", "0.75"),
+            fast_model=None if fast_model.lower() in ("", "off", "none") else fast_model,
+            fast_confidence=_threshold("CALORIE_FAST_CONFIDENCE", "0.7"),
+            large_model=os.getenv("CALORIE_LARGE_MODEL", DEFAULT_LARGE_MODEL).strip(),
+        )
+
+
+def local_confidence(local: dict) -> float:
+    """Cascade confidence of a ``local_calorie_range`` result.
+
+    The keyword confidence only says what kind of terms matched, so it is
+    capped by how tight the calorie range is: a range as wide as its midpoint
+    caps it at 0.5.
+    """
+    midpoint = (local["low"] + local["high"]) / 2
+    spread = (local["high"] - local["low"]) / midpoint if midpoint > 0 else 1.0
+    return round(min(local["confidence"], 1.0 - spread / 2), 3)
+
+
+def reported_confidence(value: Any) -> Optional[float]:
+    """Normalize a model's self-reported confidence to 0..1; None when it is missing or unreadable."""
+    if isinstance(value, str):
+        word = value.strip().lower().rstrip("%")
+        if word in _CONFIDENCE_WORDS:
+            return _CONFIDENCE_WORDS[word]
+        try:
+            value = float(word)
+        except ValueError:
+            return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if 1 < value <= 100:
+        value = value / 100
+    return value if 0 <= value <= 1 else None
+
+
+cascade_policy = CascadePolicy.from_env()
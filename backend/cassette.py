@@ -0,0 +1,293 @@
+import asyncio
+import atexit
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    from backend.estimate_cache import BACKEND_DIR
+except ImportError:
+    from estimate_cache import BACKEND_DIR  # type: ignore
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+DEFAULT_CASSETTE_PATH = BACKEND_DIR / ".cache" / "dedalus_cassette.jsonl.gz"
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a call that the cassette does not contain."""
+
+
+class RecordedError(RuntimeError):
+    """Replays an upstream failure captured while recording."""
+
+
+def chunk_text(chunk: Any) -> str:
+    """Return the text delta carried by a streamed completion chunk, if any."""
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    delta = getattr(choices[0], "delta", None)
+    return getattr(delta, "content", None) or ""
+
+
+def _text_chunk(text: str) -> Any:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=None)])
+
+
+def call_key(model: Any, input: Any, mcp_servers: Any) -> str:
+    """Stable key of one Dedalus call; streamed and blocking calls share it."""
+    payload = json.dumps([str(model or ""), str(input), sorted(str(s) for s in mcp_servers or [])])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class Cassette:
+    """Recorded Dedalus calls, saved as (optionally gzip-compressed) JSON lines.
+
+    Each entry holds the prompt, model, MCP servers, output text, total latency
+    and, for streams, time to first chunk and chunk count. Repeated calls with
+    the same key are replayed in the order they were recorded, wrapping around.
+    """
+
+    def __init__(self, path: Optional[Path] = None, entries: Optional[List[Dict[str, Any]]] = None):
+        self.path = path
+        self.entries: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        for entry in entries or []:
+            self._index(entry)
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        path = Path(path)
+        entries = []
+        if path.exists():
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entries.append(json.loads(line))
+        header = entries.pop(0) if entries and "cassette" in entries[0] else {"cassette": CASSETTE_VERSION}
+        if header["cassette"] != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {header['cassette']} in {path}")
+        return cls(path, entries)
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self.entries.append(entry)
+        self._by_key.setdefault(entry["key"], []).append(entry)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._index(entry)
+            self._dirty = True
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                return None
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+            return recorded[cursor % len(recorded)]
+
+    def save(self, path: Optional[Path] = None) -> Optional[Path]:
+        path = Path(path or self.path) if (path or self.path) else None
+        if path is None:
+            return None
+        with self._lock:
+            lines = [{"cassette": CASSETTE_VERSION}] + self.entries
+            self._dirty = False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(tmp, "wt", encoding="utf-8") as fh:
+            for line in lines:
+                fh.write(json.dumps(line, separators=(",", ":")) + "\n")
+        os.replace(tmp, path)
+        return path
+
+    def save_if_dirty(self) -> None:
+        if self._dirty:
+            self.save()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DedalusTransport:
+    """Sits between the app and ``DedalusRunner``: passthrough, record or replay.
+
+    ``record`` forwards every call to the real runner and appends what it saw
+    to the cassette; ``replay`` serves calls from the cassette without the SDK
+    or the network, sleeping for the recorded latency when ``replay_latency``
+    is set. Replaying an unrecorded call raises ``CassetteMiss``.
+    """
+
+    def __init__(self, mode: str = PASSTHROUGH, cassette: Optional[Cassette] = None, replay_latency: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown Dedalus transport {mode!r}; expected one of {', '.join(MODES)}")
+        if mode != PASSTHROUGH and cassette is None:
+            raise ValueError(f"The {mode} transport needs a cassette")
+        self.mode = mode
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+        self.calls = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "DedalusTransport":
+        mode = os.getenv("DEDALUS_TRANSPORT", PASSTHROUGH).strip().lower() or PASSTHROUGH
+        if mode == PASSTHROUGH:
+            return cls()
+        path = Path(os.getenv("DEDALUS_CASSETTE", str(DEFAULT_CASSETTE_PATH)))
+        cassette = Cassette.load(path)
+        if mode == RECORD:
+            # Scripts rarely close the client pool, so flush the cassette at exit as well.
+            atexit.register(cassette.save_if_dirty)
+        raw_latency = os.getenv("DEDALUS_REPLAY_LATENCY", "off")
+        return cls(mode, cassette, replay_latency=raw_latency.strip().lower() in {"1", "true", "yes", "on"})
+
+    def wrap(self, runner: Any) -> Any:
+        """Runner the pool should hand out in place of ``runner`` (unused in replay mode)."""
+        if self.mode == RECORD:
+            return RecordingRunner(self, runner)
+        if self.mode == REPLAY:
+            return ReplayRunner(self)
+        return runner
+
+    def close(self) -> None:
+        if self.mode == RECORD:
+            self.cassette.save_if_dirty()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "cassette": str(self.cassette.path) if self.cassette and self.cassette.path else None,
+            "entries": len(self.cassette) if self.cassette else 0,
+            "calls": self.calls,
+            "misses": self.misses,
+        }
+
+
+class RecordingRunner:
+    """Forwards calls to the real runner and records each one on the transport's cassette."""
+
+    def __init__(self, transport: DedalusTransport, runner: Any):
+        self.transport = transport
+        self.runner = runner
+
+    def run(self, input: Any = None, model: Any = None, mcp_servers: Any = None, stream: bool = False, **kwargs: Any):
+        self.transport.calls += 1
+        entry = {
+            "key": call_key(model, input, mcp_servers),
+            "model": str(model or ""),
+            "input": str(input),
+            "mcp_servers": list(mcp_servers or []),
+        }
+        call = dict(input=input, model=model, mcp_servers=mcp_servers, **kwargs)
+        if stream:
+            return self._stream(entry, call)
+        return self._complete(entry, call)
+
+    def _finish(self, entry: Dict[str, Any], start: float, error: Optional[BaseException] = None) -> None:
+        entry["latency"] = round(time.monotonic() - start, 4)
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        self.transport.cassette.add(entry)
+
+    async def _complete(self, entry: Dict[str, Any], call: Dict[str, Any]):
+        start = time.monotonic()
+        try:
+            result = await self.runner.run(**call)
+        except Exception as exc:
+            self._finish(entry, start, exc)
+            raise
+        entry["output"] = str(getattr(result, "final_output", "") or "")
+        self._finish(entry, start)
+        return result
+
+    async def _stream(self, entry: Dict[str, Any], call: Dict[str, Any]) -> AsyncIterator[Any]:
+        start = time.monotonic()
+        parts: List[str] = []
+        error: Optional[BaseException] = None
+        stream = None
+        try:
+            stream = self.runner.run(stream=True, **call)
+            if inspect.isawaitable(stream):
+                stream = await stream
+            async for chunk in stream:
+                if not parts:
+                    entry["ttft"] = round(time.monotonic() - start, 4)
+                parts.append(chunk_text(chunk))
+                yield chunk
+            entry["complete"] = True
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            # Streams closed early (e.g. once the needed JSON fields arrived) replay as cut short.
+            entry.setdefault("complete", False)
+            entry["output"] = "".join(parts)
+            entry["chunks"] = len(parts)
+            self._finish(entry, start, error)
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+class ReplayRunner:
+    """Serves recorded calls deterministically, in the shape ``DedalusRunner`` returns them."""
+
+    def __init__(self, transport: DedalusTransport):
+        self.transport = transport
+
+    def run(self, input: Any = None, model: Any = None, mcp_servers: Any = None, stream: bool = False, **_: Any):
+        self.transport.calls += 1
+        entry = self.transport.cassette.next(call_key(model, input, mcp_servers))
+        if entry is None:
+            self.transport.misses += 1
+        if stream:
+            return self._stream(entry, model)
+        return self._complete(entry, model)
+
+    @staticmethod
+    def _check(entry: Optional[Dict[str, Any]], model: Any) -> Dict[str, Any]:
+        if entry is None:
+            raise CassetteMiss(f"No recorded Dedalus call for model {model!r} and this prompt")
+        if entry.get("error"):
+            raise RecordedError(entry["error"])
+        return entry
+
+    async def _complete(self, entry: Optional[Dict[str, Any]], model: Any):
+        if entry is not None and self.transport.replay_latency:
+            await asyncio.sleep(entry.get("latency", 0.0))
+        entry = self._check(entry, model)
+        return SimpleNamespace(final_output=entry.get("output", ""))
+
+    async def _stream(self, entry: Optional[Dict[str, Any]], model: Any) -> AsyncIterator[Any]:
+        latency = self.transport.replay_latency and entry is not None
+        if latency:
+            await asyncio.sleep(entry.get("ttft", 0.0))
+        entry = self._check(entry, model)
+        output = entry.get("output", "")
+        count = max(1, entry.get("chunks") or 1)
+        size = -(-len(output) // count) or 1
+        pieces = [output[i:i + size] for i in range(0, len(output), size)] or [""]
+        per_chunk = max(0.0, entry.get("latency", 0.0) - entry.get("ttft", 0.0)) / len(pieces) if latency else 0.0
+        for index, piece in enumerate(pieces):
+            if index and per_chunk:
+                await asyncio.sleep(per_chunk)
+            yield _text_chunk(piece)
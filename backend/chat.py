@@ -0,0 +1,228 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+try:
+    from backend.admission import is_degraded
+    from backend.dedalus_runner import DedalusConfig, stream_dedalus_research
+    from backend.menu_registry import menu_registry
+except ImportError:
+    from admission import is_degraded  # type: ignore
+    from dedalus_runner import DedalusConfig, stream_dedalus_research  # type: ignore
+    from menu_registry import menu_registry  # type: ignore
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "openai/gpt-4.1")
+# Compatible meals from the session's registered menu listed in each prompt.
+CHAT_MENU_MEALS = 12
+# Preferences a client may set, and whether each holds a list of strings; values are capped so
+# a client cannot grow its session or every prompt without bound.
+CHAT_PREFERENCES = {"goal": False, "dietary_preferences": True, "menu_version": False}
+CHAT_PREFERENCE_CHARS = 100
+CHAT_PREFERENCE_ITEMS = 20
+FALLBACK_REPLY = "Sorry, I can't make recommendations right now. Please try again in a moment."
+
+CHAT_PROMPT_HEADER = """You are a friendly campus dining assistant chatting with a student. Answer their latest message
+with short, concrete meal and dining hall recommendations that respect their preferences.
+
+Student preferences: {preferences}
+"""
+
+
+class ChatSession:
+    """Server-side state of one conversation: preferences, a rolling summary and recent turns."""
+
+    __slots__ = ("session_id", "preferences", "summary", "turns", "last_active")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.preferences: Dict[str, Any] = {}
+        self.summary: List[str] = []
+        self.turns: Deque[Tuple[str, str]] = deque()
+        self.last_active = time.monotonic()
+
+
+class ChatSessionStore:
+    """Bounded, in-memory chat sessions.
+
+    At most ``max_sessions`` sessions are kept (least recently active evicted
+    first), and sessions idle for ``idle_ttl`` seconds expire. Each session
+    keeps its last ``max_turns`` turns verbatim; older turns are folded into a
+    one-line-per-turn summary capped at ``summary_chars`` characters, oldest
+    lines dropped first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_turns: int = 12,
+        summary_chars: int = 1200,
+        idle_ttl: float = 1800.0,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.max_turns = max(2, max_turns)
+        self.summary_chars = summary_chars
+        self.idle_ttl = idle_ttl
+        self.expired = 0
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ChatSessionStore":
+        return cls(
+            max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "1000")),
+            max_turns=int(os.getenv("CHAT_MAX_TURNS", "12")),
+            summary_chars=int(os.getenv("CHAT_SUMMARY_CHARS", "1200")),
+            idle_ttl=float(os.getenv("CHAT_SESSION_TTL", "1800")),
+        )
+
+    def _expire(self, now: float) -> None:
+        # Sessions are ordered by last activity, so expired ones sit at the front.
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_active < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def open(self, session_id: Optional[str] = None) -> ChatSession:
+        """Resume ``session_id`` if it is still live, otherwise start a new session."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(secrets.token_urlsafe(12))
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            session.last_active = now
+            self._sessions.move_to_end(session.session_id)
+            return session
+
+    def touch(self, session: ChatSession) -> None:
+        with self._lock:
+            session.last_active = time.monotonic()
+            if session.session_id in self._sessions:
+                self._sessions.move_to_end(session.session_id)
+
+    def set_preferences(self, session: ChatSession, update: Dict[str, Any]) -> None:
+        """Apply a client's preference update (``None`` clears a field); raises ``ValueError`` if it is invalid."""
+        session.preferences.update(clean_preferences(update))
+        for name in [name for name, value in session.preferences.items() if value is None]:
+            del session.preferences[name]
+        self.touch(session)
+
+    def add_turn(self, session: ChatSession, role: str, text: str) -> None:
+        session.turns.append((role, text))
+        while len(session.turns) > self.max_turns:
+            old_role, old_text = session.turns.popleft()
+            line = " ".join(old_text.split())
+            session.summary.append(f"{old_role}: {line[:160]}{'...' if len(line) > 160 else ''}")
+        while session.summary and sum(len(line) + 1 for line in session.summary) > self.summary_chars:
+            session.summary.pop(0)
+        self.touch(session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "turns": sum(len(s.turns) for s in sessions),
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def _clean_text(name: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string.")
+    value = value.strip()
+    if len(value) > CHAT_PREFERENCE_CHARS:
+        raise ValueError(f"{name} is longer than {CHAT_PREFERENCE_CHARS} characters.")
+    return value
+
+
+def clean_preferences(update: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a preference update against ``CHAT_PREFERENCES``; raises ``ValueError`` naming the first bad field."""
+    cleaned: Dict[str, Any] = {}
+    for name, value in update.items():
+        if name not in CHAT_PREFERENCES:
+            raise ValueError(f"Unknown preference {name!r}; expected one of {', '.join(CHAT_PREFERENCES)}.")
+        if value is None:
+            cleaned[name] = None
+        elif CHAT_PREFERENCES[name]:
+            if not isinstance(value, list) or len(value) > CHAT_PREFERENCE_ITEMS:
+                raise ValueError(f"{name} must be a list of at most {CHAT_PREFERENCE_ITEMS} strings.")
+            cleaned[name] = [_clean_text(name, item) for item in value]
+        else:
+            cleaned[name] = _clean_text(name, value)
+    return cleaned
+
+
+def _format_preferences(preferences: Dict[str, Any]) -> str:
+    parts = []
+    for name, value in preferences.items():
+        if name == "menu_version":
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value) or "none"
+        parts.append(f"{name.replace('_', ' ')}={value}")
+    return "; ".join(parts) or "none given"
+
+
+def _menu_lines(preferences: Dict[str, Any]) -> List[str]:
+    version = preferences.get("menu_version")
+    snapshot = menu_registry.get(version) if isinstance(version, str) else None
+    if snapshot is None:
+        return []
+    lines = []
+    for hall, meal in snapshot.index.compatible_meals(preferences.get("dietary_preferences") or []):
+        lines.append(f"- {meal.name} ({hall.name})")
+        if len(lines) >= CHAT_MENU_MEALS:
+            break
+    return lines
+
+
+def build_chat_prompt(session: ChatSession, message: str) -> str:
+    """Prompt for the next reply: preferences, summary of older turns, recent turns, new message."""
+    sections = [CHAT_PROMPT_HEADER.format(preferences=_format_preferences(session.preferences))]
+    menu = _menu_lines(session.preferences)
+    if menu:
+        sections.append("Meals on today's menu that fit their diet:\n" + "\n".join(menu) + "\n")
+    if session.summary:
+        sections.append("Earlier in the conversation:\n" + "\n".join(session.summary) + "\n")
+    if session.turns:
+        sections.append("Recent messages:\n" + "\n".join(f"{role}: {text}" for role, text in session.turns) + "\n")
+    sections.append(f"student: {message}\nassistant:")
+    return "\n".join(sections)
+
+
+async def stream_chat_reply(store: ChatSessionStore, session: ChatSession, message: str) -> AsyncIterator[str]:
+    """Stream the reply to ``message`` and record both turns in the session.
+
+    In degraded mode Dedalus is not called and the fallback reply is sent.
+    """
+    prompt = build_chat_prompt(session, message)
+    store.add_turn(session, "student", message)
+    parts: List[str] = []
+    if not is_degraded():
+        async for text in stream_dedalus_research(prompt, DedalusConfig(model=CHAT_MODEL)):
+            parts.append(text)
+            yield text
+    reply = "".join(parts).strip()
+    if not reply:
+        reply = FALLBACK_REPLY
+        yield reply
+    store.add_turn(session, "assistant", reply)
+
+
+chat_sessions = ChatSessionStore.from_env()
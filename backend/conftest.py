@@ -0,0 +1,31 @@
+import pytest
+
+from backend import dedalus_runner, main
+from backend import summary_cache as summary_cache_module
+from backend.estimate_cache import EstimateCache
+from backend.nutrition_index import NutritionIndex
+
+
+@pytest.fixture(autouse=True)
+def isolated_calorie_cache(monkeypatch):
+    """Give every test an empty, in-memory calorie estimate cache."""
+    cache = EstimateCache(path=None)
+    for module in (dedalus_runner, main):
+        monkeypatch.setattr(module, "calorie_cache", cache)
+    yield cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_summary_cache(monkeypatch):
+    """Give every test an empty, in-memory onboarding summary cache."""
+    monkeypatch.setattr(summary_cache_module.summary_cache, "store", EstimateCache(path=None))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_nutrition_index(monkeypatch):
+    """Give every test an empty, in-memory nutrition index."""
+    index = NutritionIndex(path=None)
+    for module in (dedalus_runner, main):
+        monkeypatch.setattr(module, "nutrition_index", index)
+    yield index
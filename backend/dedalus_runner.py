@@ -1,28 +1,69 @@
 import asyncio
-import json
+import inspect
+import logging
 import os
-import re
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Any, AsyncIterator, Iterable, Optional
 
 try:
-    from dedalus_labs import AsyncDedalus, DedalusRunner  # type: ignore
-except ImportError:  # SDK not available in this environment
-    AsyncDedalus = None  # type: ignore
-    DedalusRunner = None  # type: ignore
+    from backend.env import load_env
+except ImportError:
+    from env import load_env  # type: ignore
 
-try:
-    from dedalus_labs.utils.streaming import stream_async  # type: ignore
-except ImportError:  # optional helper
-    stream_async = None  # type: ignore
+load_env()
+
+# The SDK is imported on first use (see ``_load_sdk``) to keep cold starts fast.
+AsyncDedalus = None
+DedalusRunner = None
+DefaultAsyncHttpxClient = None
+_sdk_loaded = False
 
 try:
-    from dotenv import load_dotenv  # type: ignore
-except ImportError:  # provide a no-op loader if library missing
-    def load_dotenv(*_, **__):  # type: ignore
-        return False
+    from backend.admission import is_degraded
+    from backend.calorie_estimator import local_calorie_range
+    from backend.cassette import REPLAY, DedalusTransport, chunk_text
+    from backend.cascade import (
+        CASCADE_ESCALATIONS,
+        CASCADE_TIERS,
+        FAST_TIER,
+        INDEX_TIER,
+        LARGE_TIER,
+        LOCAL_TIER,
+        cascade_policy,
+        local_confidence,
+        reported_confidence,
+    )
+    from backend.estimate_cache import calorie_cache, make_cache_key
+    from backend.json_stream import JSONStreamParser, parse_json_tolerant
+    from backend.metrics import REMOTE_ESTIMATES, stage_timer
+    from backend.nutrition_index import nutrition_index
+    from backend.prompt_builder import estimate_tokens
+    from backend.scheduler import BACKGROUND, scheduler
+    from backend.singleflight import SingleFlight
+except ImportError:
+    from admission import is_degraded  # type: ignore
+    from calorie_estimator import local_calorie_range  # type: ignore
+    from cassette import REPLAY, DedalusTransport, chunk_text  # type: ignore
+    from cascade import (  # type: ignore
+        CASCADE_ESCALATIONS,
+        CASCADE_TIERS,
+        FAST_TIER,
+        INDEX_TIER,
+        LARGE_TIER,
+        LOCAL_TIER,
+        cascade_policy,
+        local_confidence,
+        reported_confidence,
+    )
+    from estimate_cache import calorie_cache, make_cache_key  # type: ignore
+    from json_stream import JSONStreamParser, parse_json_tolerant  # type: ignore
+    from metrics import REMOTE_ESTIMATES, stage_timer  # type: ignore
+    from nutrition_index import nutrition_index  # type: ignore
+    from prompt_builder import estimate_tokens  # type: ignore
+    from scheduler import BACKGROUND, scheduler  # type: ignore
+    from singleflight import SingleFlight  # type: ignore
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -43,24 +84,268 @@ def _ensure_api_key() -> str | None:
     return dedalus_key
 
 
+def _load_sdk() -> bool:
+    """Import the Dedalus SDK once; return whether it is available."""
+    global AsyncDedalus, DedalusRunner, DefaultAsyncHttpxClient, _sdk_loaded
+    if not _sdk_loaded:
+        _sdk_loaded = True
+        try:
+            from dedalus_labs import AsyncDedalus, DedalusRunner, DefaultAsyncHttpxClient  # type: ignore
+        except ImportError:  # SDK not available in this environment
+            pass
+    return AsyncDedalus is not None and DedalusRunner is not None
+
+
+@dataclass
+class PoolConfig:
+    """HTTP connection pool limits for the shared Dedalus client."""
+
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_connections=int(os.getenv("DEDALUS_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(
+                os.getenv("DEDALUS_MAX_KEEPALIVE_CONNECTIONS", cls.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(os.getenv("DEDALUS_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+        )
+
+
+class DedalusClientPool:
+    """Owns one AsyncDedalus client (and its HTTP pool) shared by every request.
+
+    The FastAPI lifespan calls ``start``/``close``; scripts that never run the
+    lifespan get a client lazily on first use. A client is bound to the event
+    loop it was created on, so a new loop (e.g. a fresh ``asyncio.run``) gets a
+    fresh client.
+
+    Calls go through ``transport`` (``DEDALUS_TRANSPORT``), which can record
+    them to a cassette or replay a cassette without the SDK or network.
+    """
+
+    def __init__(self, config: PoolConfig | None = None, transport: DedalusTransport | None = None):
+        self.config = config or PoolConfig.from_env()
+        self.transport = transport or DedalusTransport.from_env()
+        self._client = None
+        self._runner = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def start(self):
+        """Create the shared client and runner if they do not exist yet."""
+        if not _ensure_api_key():
+            return None
+        return await self.get_runner()
+
+    async def get_runner(self):
+        if self.transport.mode == REPLAY:
+            if self._runner is None:
+                self._runner = self.transport.wrap(None)
+            return self._runner
+        if not _load_sdk():
+            return None
+        loop = asyncio.get_running_loop()
+        if self._runner is not None and self._loop is loop:
+            return self._runner
+
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._runner is not None and self._loop is loop:
+                return self._runner
+            await self._drop_client(loop)
+
+            http_client = None
+            if DefaultAsyncHttpxClient is not None:
+                import httpx
+
+                http_client = DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.config.max_connections,
+                        max_keepalive_connections=self.config.max_keepalive_connections,
+                        keepalive_expiry=self.config.keepalive_expiry,
+                    )
+                )
+            self._client = AsyncDedalus(http_client=http_client) if http_client else AsyncDedalus()
+            self._runner = self.transport.wrap(DedalusRunner(self._client))
+            self._loop = loop
+            return self._runner
+
+    async def _drop_client(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Let go of a client from another loop before a rebuild; the transport stays open."""
+        client, self._client, self._runner = self._client, None, None
+        owner = self._loop
+        if client is None:
+            return
+        if owner is loop:
+            await client.close()
+        elif owner is not None and owner.is_running():
+            # Its sockets belong to that loop, so close it there without waiting here.
+            asyncio.run_coroutine_threadsafe(client.close(), owner)
+        # Otherwise the owning loop is gone and so are its sockets.
+
+    async def close(self) -> None:
+        """Close the shared client and the transport; only the lifespan shutdown calls this."""
+        client, self._client, self._runner = self._client, None, None
+        self.transport.close()
+        if client is not None:
+            await client.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool limits plus active/idle connection counts."""
+        active = idle = 0
+        client = self._client
+        http_client = getattr(client, "_client", None)
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        for conn in getattr(pool, "connections", []):
+            if conn.is_idle():
+                idle += 1
+            else:
+                active += 1
+        return {
+            "started": client is not None,
+            "active_connections": active,
+            "idle_connections": idle,
+            "max_connections": self.config.max_connections,
+            "max_keepalive_connections": self.config.max_keepalive_connections,
+            "keepalive_expiry": self.config.keepalive_expiry,
+            "transport": self.transport.stats(),
+        }
+
+
+client_pool = DedalusClientPool()
+
+# Identical concurrent estimator/research calls share one remote request.
+inflight = SingleFlight()
+
+
 async def _build_runner():
-    if AsyncDedalus is None or DedalusRunner is None:
-        return None
-    client = AsyncDedalus()
-    return DedalusRunner(client)
+    return await client_pool.get_runner()
+
+
+# Requested first in the prompt so streaming can stop as soon as it arrives.
+CALORIE_FIELD = "estimated_calories"
+# What the nutrition index learns from; they follow the calorie and confidence fields.
+INGREDIENT_FIELDS = ("ingredient_list", "ingredient_calories")
+# Answers computed locally from the index or keywords; cheaper to recompute than to cache.
+LOCAL_TIERS = (INDEX_TIER, LOCAL_TIER)
+# Accepted answers whose streams stopped early are drained in the background for their
+# ingredients, at most this many at once.
+LEARN_MAX_PENDING = int(os.getenv("NUTRITION_LEARN_MAX_PENDING", "4"))
+LEARN_TIMEOUT = float(os.getenv("NUTRITION_LEARN_TIMEOUT", "30"))
+_learning: set[asyncio.Task] = set()
 
 
 async def run_dedalus_calorie_estimator(meal_name: str, dietary_restrictions: list[str]):
     """
-    Uses Dedalus AI to estimate calories for a meal.
-    Returns a JSON dict if available, otherwise None.
+    Estimate calories for a meal through the model cascade (see ``cascade.CascadePolicy``).
+    Returns a JSON dict whose ``tier`` names the answering tier, or None.
+    Concurrent calls for the same meal and restrictions share one remote request.
     """
-    if not _ensure_api_key():
+    if is_degraded():
+        return _index_estimate(meal_name, dietary_restrictions) or _local_estimate(
+            local_calorie_range(meal_name, dietary_restrictions)
+        )
+    key = ("calories", make_cache_key(meal_name, dietary_restrictions))
+    return await inflight.do(key, lambda: _estimate_calories_cascade(meal_name, dietary_restrictions))
+
+
+def _local_estimate(local: dict) -> dict:
+    CASCADE_TIERS.inc(tier=LOCAL_TIER)
+    return {CALORIE_FIELD: local[CALORIE_FIELD], "confidence": local_confidence(local), "tier": LOCAL_TIER}
+
+
+def _index_estimate(meal_name: str, dietary_restrictions: list[str]) -> dict | None:
+    """Answer from a learned near-duplicate meal, if one matches confidently enough."""
+    match = nutrition_index.lookup(meal_name, dietary_restrictions)
+    if match is None or match.confidence < cascade_policy.index_confidence:
         return None
+    CASCADE_TIERS.inc(tier=INDEX_TIER)
+    return {
+        CALORIE_FIELD: match.estimated_calories,
+        "confidence": match.confidence,
+        "tier": INDEX_TIER,
+        "matched_meal": match.meal_name,
+    }
+
+
+async def _estimate_calories_cascade(meal_name: str, dietary_restrictions: list[str]):
+    policy = cascade_policy
+    indexed = _index_estimate(meal_name, dietary_restrictions)
+    if indexed is not None:
+        return indexed
+    local = local_calorie_range(meal_name, dietary_restrictions)
+    if local_confidence(local) >= policy.local_confidence:
+        return _local_estimate(local)
+
+    if policy.fast_model:
+        try:
+            fast, rest = await _stream_estimate(
+                meal_name, dietary_restrictions, model=policy.fast_model, fields=(CALORIE_FIELD, "confidence")
+            )
+        except Exception:
+            logger.warning("Fast-model calorie estimate failed for %r; escalating", meal_name, exc_info=True)
+            CASCADE_ESCALATIONS.inc(reason="error")
+        else:
+            if fast is not None and (reported_confidence(fast.get("confidence")) or 0.0) >= policy.fast_confidence:
+                CASCADE_TIERS.inc(tier=FAST_TIER)
+                await _learn(meal_name, dietary_restrictions, fast, policy.fast_model, rest)
+                fast["tier"] = FAST_TIER
+                return fast
+            # A rejected answer is never indexed, so it cannot come back as an index hit.
+            if rest is not None:
+                await _aclose(rest.stream)
+            CASCADE_ESCALATIONS.inc(reason="parse_error" if fast is None else "low_confidence")
+
+    large, rest = await _stream_estimate(meal_name, dietary_restrictions, model=policy.large_model)
+    if large is not None:
+        CASCADE_TIERS.inc(tier=LARGE_TIER)
+        await _learn(meal_name, dietary_restrictions, large, policy.large_model, rest)
+        large["tier"] = LARGE_TIER
+    return large
+
+
+@dataclass
+class _StreamRest:
+    """The unread rest of an estimate stream that stopped before its ingredients arrived."""
+
+    stream: Any
+    parser: JSONStreamParser
+
+
+async def _estimate_calories_remote(
+    meal_name: str,
+    dietary_restrictions: list[str],
+    model: str = "openai/gpt-4.1",
+    fields: tuple[str, ...] = (CALORIE_FIELD,),
+):
+    """Stream one estimate from ``model``, stopping once every key in ``fields`` has arrived."""
+    estimate, rest = await _stream_estimate(meal_name, dietary_restrictions, model, fields)
+    if rest is not None:
+        await _aclose(rest.stream)
+    return estimate
+
+
+async def _stream_estimate(
+    meal_name: str,
+    dietary_restrictions: list[str],
+    model: str = "openai/gpt-4.1",
+    fields: tuple[str, ...] = (CALORIE_FIELD,),
+) -> tuple[Optional[dict], Optional[_StreamRest]]:
+    """Like ``_estimate_calories_remote``, but a stream stopped before the ingredients is returned open.
+
+    The caller hands it to ``_learn`` if it keeps the answer and closes it otherwise.
+    """
+    if not _ensure_api_key():
+        return None, None
 
     runner = await _build_runner()
     if runner is None:
-        return None
+        return None, None
 
     query = f"""
     You are a professional nutritionist and culinary expert. Your task is to estimate the caloric content of a meal given its name and dietary restrictions. To do this, you must first synthesize a plausible, standard recipe for a SINGLE serving that strictly adheres to the dietary restrictions.
@@ -70,43 +355,338 @@ async def run_dedalus_calorie_estimator(meal_name: str, dietary_restrictions: li
     - Meal name: {meal_name}
     - Dietary restrictions: {', '.join(dietary_restrictions) or 'None'}
 
-    Provide your final answer in a JSON object with the keys 'estimated_calories' (integer), 'ingredient_list' (array of strings, contains each ingredient in the recipe), 'ingredient_calories' (array of integers, contains the calories for each ingredient in 'ingredient_list'), 'justification' (string, explaining the synthesized recipe and calculation)
+    Provide your final answer in a JSON object with the keys 'estimated_calories' (integer), 'ingredient_list' (array of strings, contains each ingredient in the recipe), 'ingredient_calories' (array of integers, contains the calories for each ingredient in 'ingredient_list'), 'justification' (string, explaining the synthesized recipe and calculation), 'confidence' (number from 0 to 1, how sure you are of 'estimated_calories'). Put 'estimated_calories' first and 'confidence' second.
     """
 
-    result = await runner.run(
-        input=query,
-        model="openai/gpt-4.1",
-        mcp_servers=[],
-    )
-    output = result.final_output
-    cleaned = re.sub(r'//.*', '', output)
+    # The completion is streamed and parsed as it arrives; once the wanted
+    # fields are in, the rest (ingredients, justification) is not waited for.
+    parser = JSONStreamParser(start="{")
+    rest = None
+    async with scheduler.slot():
+        with stage_timer("remote_estimate"):
+            stream = runner.run(
+                input=query,
+                model=model,
+                mcp_servers=[],
+                stream=True,
+            )
+            if inspect.isawaitable(stream):
+                stream = await stream
+            try:
+                async for chunk in stream:
+                    parser.feed(chunk_text(chunk))
+                    if parser.done or all(name in parser.fields for name in fields):
+                        break
+                # Taken before the parser can be fed again by a background reader.
+                parsed, complete, done = parser.result(), parser.value is not None, parser.done
+                if (
+                    not done
+                    and CALORIE_FIELD in parser.fields
+                    and not all(name in parser.fields for name in INGREDIENT_FIELDS)
+                ):
+                    rest = _StreamRest(stream, parser)
+            finally:
+                if rest is None:
+                    await _aclose(stream)
+
+    if not isinstance(parsed, dict) or CALORIE_FIELD not in parsed:
+        if rest is not None:
+            await _aclose(rest.stream)
+        REMOTE_ESTIMATES.inc(outcome="parse_error")
+        return None, None
+    if complete:
+        outcome = "success"
+    elif done:
+        outcome = "recovered"
+    else:
+        outcome = "early_exit"
+    REMOTE_ESTIMATES.inc(outcome=outcome)
+    return parsed, rest
+
+
+async def _aclose(stream) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def _index_learn(meal_name: str, dietary_restrictions, estimate: Any, model: str) -> None:
+    confidence = reported_confidence(estimate.get("confidence")) if isinstance(estimate, dict) else None
+    nutrition_index.learn(meal_name, dietary_restrictions, estimate, source=model, confidence=confidence)
+
+
+async def _learn(meal_name: str, dietary_restrictions, estimate: dict, model: str, rest: Optional[_StreamRest]):
+    """Index an accepted remote estimate; a stream stopped before its ingredients is read on in the background."""
+    if rest is None:
+        _index_learn(meal_name, dietary_restrictions, estimate, model)
+    elif len(_learning) < LEARN_MAX_PENDING:
+        task = asyncio.create_task(_learn_from_rest(rest, meal_name, dietary_restrictions, model))
+        _learning.add(task)
+        task.add_done_callback(_learning.discard)
+    else:
+        await _aclose(rest.stream)
+
+
+async def _drain_ingredients(stream, parser: JSONStreamParser) -> None:
+    # Still a Dedalus call: it counts against the concurrency cap and rate limit, behind interactive work.
+    async with scheduler.slot(priority=BACKGROUND):
+        async for chunk in stream:
+            parser.feed(chunk_text(chunk))
+            if parser.done or all(name in parser.fields for name in INGREDIENT_FIELDS):
+                return
+
+
+async def _learn_from_rest(rest: _StreamRest, meal_name: str, dietary_restrictions, model: str):
+    """Keep reading an accepted estimate's stream until its ingredients arrive, then index them."""
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        return None
+        await asyncio.wait_for(_drain_ingredients(rest.stream, rest.parser), LEARN_TIMEOUT)
+    except Exception:
+        logger.debug("Could not read ingredients for %r", meal_name, exc_info=True)
+    finally:
+        await _aclose(rest.stream)
+    _index_learn(meal_name, dietary_restrictions, rest.parser.result(), model)
+
+
+async def wait_for_learning() -> None:
+    """Wait until background ingredient reads started on this loop have finished."""
+    if _learning:
+        await asyncio.gather(*_learning, return_exceptions=True)
+
+
+def lookup_cached_calorie_estimate(meal_name: str, dietary_restrictions: list[str]):
+    """Return the cached estimate for a meal, or None on a miss. Never calls Dedalus."""
+    return calorie_cache.get(make_cache_key(meal_name, dietary_restrictions))
+
+
+async def run_cached_calorie_estimator(meal_name: str, dietary_restrictions: list[str]):
+    """
+    Return a calorie estimate from the estimate cache, calling Dedalus only on a miss.
+    Successful remote results are written back to the cache.
+    """
+    key = make_cache_key(meal_name, dietary_restrictions)
+    cached = calorie_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await run_dedalus_calorie_estimator(meal_name, dietary_restrictions)
+    if result is not None and result.get("tier") not in LOCAL_TIERS:
+        calorie_cache.set(key, result)
+    return result
+
+
+BATCH_MODEL = "openai/gpt-4.1"
+BATCH_TOKEN_BUDGET = int(os.getenv("CALORIE_BATCH_TOKEN_BUDGET", "4000"))
+# Rough output cost of one meal's JSON entry (calories plus ingredient arrays).
+BATCH_OUTPUT_TOKENS_PER_MEAL = 80
+
+BATCH_PROMPT_HEADER = """
+    You are a professional nutritionist and culinary expert. For EACH meal below, synthesize a plausible, standard recipe for a SINGLE serving that strictly adheres to that meal's dietary restrictions, then calculate its total calories from the ingredients and their standard nutritional values.
+
+    Meals (id | meal name | dietary restrictions):
+"""
+
+BATCH_PROMPT_FOOTER = """
+    Provide your final answer as a JSON array with exactly one object per meal, in any order. Each object must have the keys 'id' (integer, copied from the list above), 'meal_name' (string), 'estimated_calories' (integer), 'ingredient_list' (array of strings), and 'ingredient_calories' (array of integers, one per entry in 'ingredient_list'). Output only the JSON array.
+"""
+
+
+def _batch_line(index: int, meal_name: str, dietary_restrictions: list[str]) -> str:
+    return f"    - {index} | {meal_name} | {', '.join(dietary_restrictions) or 'None'}"
+
+
+def _chunk_meals(
+    meals: list[tuple[str, list[str]]],
+    token_budget: int,
+) -> list[list[int]]:
+    """Split meal indices into chunks whose prompt plus expected output fits ``token_budget``."""
+    base = estimate_tokens(BATCH_PROMPT_HEADER + BATCH_PROMPT_FOOTER)
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    used = base
+    for index, (meal_name, restrictions) in enumerate(meals):
+        cost = estimate_tokens(_batch_line(index, meal_name, restrictions)) + BATCH_OUTPUT_TOKENS_PER_MEAL
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], base
+        current.append(index)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_batch_output(output: str) -> list[dict]:
+    parsed = parse_json_tolerant(output, start="[")
+    if not isinstance(parsed, list):
+        return []
+    return [item for item in parsed if isinstance(item, dict)]
+
+
+async def _run_calorie_batch_chunk(
+    runner,
+    meals: list[tuple[str, list[str]]],
+    indices: list[int],
+) -> dict[int, dict]:
+    lines = "\n".join(_batch_line(i, *meals[i]) for i in indices)
+    query = f"{BATCH_PROMPT_HEADER}{lines}\n{BATCH_PROMPT_FOOTER}"
+    async with scheduler.slot():
+        with stage_timer("remote_estimate_batch"):
+            result = await runner.run(
+                input=query,
+                model=BATCH_MODEL,
+                mcp_servers=[],
+            )
+
+    items = _parse_batch_output(result.final_output)
+    if not items:
+        REMOTE_ESTIMATES.inc(outcome="parse_error")
+    wanted = set(indices)
+    by_name = {meals[i][0].strip().lower(): i for i in indices}
+    estimates: dict[int, dict] = {}
+    for item in items:
+        index = item.pop("id", None)
+        # Models sometimes echo ids as strings, lists or objects; only our integer ids count.
+        if not isinstance(index, int) or index not in wanted:
+            index = by_name.get(str(item.get("meal_name", "")).strip().lower())
+        if index is None or item.get("estimated_calories") is None:
+            continue
+        estimates[index] = item
+        _index_learn(*meals[index], item, BATCH_MODEL)
+    REMOTE_ESTIMATES.inc(len(estimates), outcome="success")
+    return estimates
+
+
+async def run_dedalus_calorie_estimator_batch(
+    meals: list[tuple[str, list[str]]],
+    token_budget: int | None = None,
+    max_concurrency: int = 4,
+) -> list[dict | None]:
+    """
+    Estimate calories for many meals with one structured prompt per token-budgeted chunk.
+    Meals the nutrition index already resolves are answered locally and left out of the prompt.
+    Returns one JSON dict (or None when the model skipped it) per input meal, in input order.
+    """
+    results: list[dict | None] = [_index_estimate(name, restrictions) for name, restrictions in meals]
+    if is_degraded():
+        return [
+            result or _local_estimate(local_calorie_range(name, restrictions))
+            for result, (name, restrictions) in zip(results, meals)
+        ]
+    novel = [index for index, result in enumerate(results) if result is None]
+    if not novel or not _ensure_api_key():
+        return results
+
+    runner = await _build_runner()
+    if runner is None:
+        return results
+
+    novel_meals = [meals[i] for i in novel]
+    chunks = _chunk_meals(novel_meals, token_budget or BATCH_TOKEN_BUDGET)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def bounded(indices: list[int]) -> dict[int, dict]:
+        async with semaphore:
+            return await _run_calorie_batch_chunk(runner, novel_meals, indices)
+
+    for chunk_result in await asyncio.gather(*(bounded(c) for c in chunks), return_exceptions=True):
+        if isinstance(chunk_result, BaseException):
+            continue
+        for index, estimate in chunk_result.items():
+            results[novel[index]] = estimate
+    return results
+
+
+async def run_cached_calorie_estimator_batch(
+    meals: list[tuple[str, list[str]]],
+    token_budget: int | None = None,
+    max_concurrency: int = 4,
+) -> list[dict | None]:
+    """
+    Batch variant of ``run_cached_calorie_estimator``: cached meals are served locally and
+    only distinct misses are sent to Dedalus, with each result cached under its own key.
+    """
+    keys = [make_cache_key(name, restrictions) for name, restrictions in meals]
+    results: list[dict | None] = [calorie_cache.get(key) for key in keys]
+
+    pending: dict[str, int] = {}
+    for index, key in enumerate(keys):
+        if results[index] is None and key not in pending:
+            pending[key] = index
+    if pending:
+        fetched = await run_dedalus_calorie_estimator_batch(
+            [meals[i] for i in pending.values()],
+            token_budget=token_budget,
+            max_concurrency=max_concurrency,
+        )
+        resolved = dict(zip(pending, fetched))
+        for key, estimate in resolved.items():
+            if estimate is not None and estimate.get("tier") not in LOCAL_TIERS:
+                calorie_cache.set(key, estimate)
+        for index, key in enumerate(keys):
+            if results[index] is None:
+                results[index] = resolved.get(key)
+    return results
 
 
 async def run_dedalus_research(query: str, config: DedalusConfig | None = None) -> str | None:
     """
     Execute a research-oriented query using Dedalus with optional MCP search providers.
     Returns the final string output or None if the SDK/API is unavailable.
+    Concurrent identical queries share one remote request.
     """
+    if is_degraded():
+        return None
+    cfg = config or DedalusConfig()
+    key = ("research", cfg.model, tuple(cfg.mcp_servers or ()), query)
+    return await inflight.do(key, lambda: _research_remote(query, cfg))
+
+
+async def _research_remote(query: str, cfg: DedalusConfig) -> str | None:
     if not _ensure_api_key():
         return None
 
-    cfg = config or DedalusConfig()
     runner = await _build_runner()
     if runner is None:
         return None
 
-    result = await runner.run(
-        input=query,
-        model=cfg.model,
-        mcp_servers=list(cfg.mcp_servers or []),
-    )
+    async with scheduler.slot():
+        result = await runner.run(
+            input=query,
+            model=cfg.model,
+            mcp_servers=list(cfg.mcp_servers or []),
+        )
     return result.final_output
 
 
+async def stream_dedalus_research(query: str, config: DedalusConfig | None = None) -> AsyncIterator[str]:
+    """
+    Stream a research query, yielding text fragments as Dedalus produces them.
+    Yields nothing if the SDK/API is unavailable.
+    """
+    if is_degraded() or not _ensure_api_key():
+        return
+
+    cfg = config or DedalusConfig()
+    runner = await _build_runner()
+    if runner is None:
+        return
+
+    # The slot is held until the stream is exhausted or abandoned.
+    async with scheduler.slot():
+        stream = runner.run(
+            input=query,
+            model=cfg.model,
+            mcp_servers=list(cfg.mcp_servers or []),
+            stream=True,
+        )
+        if inspect.isawaitable(stream):
+            stream = await stream
+        async for chunk in stream:
+            text = chunk_text(chunk)
+            if text:
+                yield text
+
+
 def run_research_sync(query: str, config: DedalusConfig | None = None) -> str | None:
     """Blocking helper that wraps the async research runner."""
     return asyncio.run(run_dedalus_research(query, config))
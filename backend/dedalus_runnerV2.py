@@ -1,13 +1,13 @@
 import asyncio
 from dedalus_labs import AsyncDedalus, DedalusRunner
-from dotenv import load_dotenv
 from dedalus_labs.utils.streaming import stream_async
 import json
 from calorie_estimatorV2 import local_calorie_estimate
+from env import load_env
 import os
 import re
 
-load_dotenv()
+load_env()
 
 # ------------------------------
 # Dedalus AI Runner
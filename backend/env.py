@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+from typing import Iterator, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent
+# Searched in order; a variable already set (in the process or by an earlier file) wins.
+ENV_FILES = (BACKEND_DIR / ".env", BACKEND_DIR.parent / ".env")
+
+_loaded = False
+
+
+def _parse(text: str) -> Iterator[Tuple[str, str]]:
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip()
+        if key.startswith("export "):
+            key = key[len("export "):].strip()
+        value = value.strip()
+        if value[:1] in ("'", '"') and value[-1:] == value[:1] and len(value) > 1:
+            value = value[1:-1]
+        elif " #" in value:
+            value = value.split(" #", 1)[0].rstrip()
+        yield key, value
+
+
+def load_env() -> None:
+    """Load the project's ``.env`` files into ``os.environ`` once per process.
+
+    Every module that reads configuration calls this, but only the first call
+    touches the filesystem.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    for path in ENV_FILES:
+        if path.is_file():
+            for key, value in _parse(path.read_text()):
+                os.environ.setdefault(key, value)
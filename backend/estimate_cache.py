@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_PATH = BACKEND_DIR / ".cache" / "calorie_estimates.sqlite3"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_meal_name(meal_name: str) -> str:
+    """Lower-case a meal name and collapse punctuation/whitespace runs."""
+    return " ".join(_WORD_RE.findall(meal_name.lower()))
+
+
+def make_cache_key(meal_name: str, dietary_restrictions: Iterable[str] | None = None) -> str:
+    """Build the cache key: normalized meal name plus sorted, de-duplicated restrictions."""
+    restrictions = sorted({r.strip().lower() for r in dietary_restrictions or [] if r.strip()})
+    return f"{normalize_meal_name(meal_name)}|{','.join(restrictions)}"
+
+
+class EstimateCache:
+    """Two-tier cache: an in-process LRU in front of an optional SQLite store.
+
+    Entries expire after ``ttl_seconds`` in both tiers. Each tier is bounded
+    independently; the memory tier evicts least-recently-used keys and the disk
+    tier evicts least-recently-accessed rows.
+
+    Disk writes and access-time updates are buffered and written in one
+    transaction once ``flush_size`` are pending or ``flush_interval`` seconds
+    have passed, so lookups do not pay for a commit each. ``close`` flushes.
+    ``stats`` only reads counters; its ``disk_entries`` is as of the last flush.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 50_000,
+        flush_size: int = 64,
+        flush_interval: float = 5.0,
+    ):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+
+        self._memory: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Buffered disk work: key -> (stored_at, value) to write, key -> accessed_at to update.
+        self._writes: dict[str, tuple[float, Any]] = {}
+        self._touched: dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self._disk_entries: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "EstimateCache":
+        """Create a cache configured from ``CALORIE_CACHE_*`` environment variables."""
+        raw_path = os.getenv("CALORIE_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+        path = None if raw_path.lower() in {"", "off", "none", ":memory:"} else raw_path
+        return cls(
+            path=path,
+            ttl_seconds=float(os.getenv("CALORIE_CACHE_TTL", 7 * 24 * 3600)),
+            max_memory_entries=int(os.getenv("CALORIE_CACHE_MEMORY_SIZE", 1024)),
+            max_disk_entries=int(os.getenv("CALORIE_CACHE_DISK_SIZE", 50_000)),
+            flush_interval=float(os.getenv("CALORIE_CACHE_FLUSH_INTERVAL", 5.0)),
+        )
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS estimates (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS estimates_accessed ON estimates (accessed_at)")
+            conn.commit()
+            (self._disk_entries,) = conn.execute("SELECT COUNT(*) FROM estimates").fetchone()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, stored_at: float, value: Any) -> None:
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for ``key`` or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            pending = self._writes.get(key)
+            if pending is not None and now - pending[0] <= self.ttl_seconds:
+                self._remember(key, *pending)
+                self.memory_hits += 1
+                return pending[1]
+
+            conn = self._connection()
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT value, stored_at FROM estimates WHERE key = ?", (key,)
+                ).fetchone()
+                # Expired rows are left for the purge in the next flush.
+                if row is not None and now - row[1] <= self.ttl_seconds:
+                    raw, stored_at = row
+                    self._touched[key] = now
+                    value = json.loads(raw)
+                    self._remember(key, stored_at, value)
+                    self.disk_hits += 1
+                    self._maybe_flush()
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` in both tiers; the disk tier is trimmed to its bounds when the buffer is flushed."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self.path is None:
+                return
+            self._writes[key] = (now, value)
+            self._touched.pop(key, None)
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        pending = len(self._writes) + len(self._touched)
+        if pending >= self.flush_size or (pending and time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush()
+
+    def flush(self) -> None:
+        """Write buffered entries and access times to disk now."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        writes, self._writes = self._writes, {}
+        touched, self._touched = self._touched, {}
+        conn = self._connection()
+        if conn is None or not (writes or touched):
+            return
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO estimates (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            [(key, json.dumps(value), stored_at, stored_at) for key, (stored_at, value) in writes.items()],
+        )
+        conn.executemany(
+            "UPDATE estimates SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in touched.items()]
+        )
+        if writes:
+            conn.execute("DELETE FROM estimates WHERE stored_at < ?", (now - self.ttl_seconds,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM estimates").fetchone()
+            overflow = count - self.max_disk_entries
+            self._disk_entries = min(count, self.max_disk_entries)
+            if overflow > 0:
+                conn.execute(
+                    """
+                    DELETE FROM estimates WHERE key IN (
+                        SELECT key FROM estimates ORDER BY accessed_at ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+        conn.commit()
+
+    def export_memory(self) -> list[tuple[str, float, Any]]:
+        """Unexpired memory-tier entries as ``(key, stored_at, value)``, least recently used first."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            return [(key, stored_at, value) for key, (stored_at, value) in self._memory.items() if stored_at >= cutoff]
+
+    def load_memory(self, entries: Iterable[tuple[str, float, Any]]) -> int:
+        """Seed the memory tier from ``export_memory`` output, skipping expired entries."""
+        cutoff = time.time() - self.ttl_seconds
+        loaded = 0
+        with self._lock:
+            for key, stored_at, value in entries:
+                if stored_at >= cutoff and key not in self._memory:
+                    self._remember(key, stored_at, value)
+                    loaded += 1
+        return loaded
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._writes.clear()
+            self._touched.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM estimates")
+                conn.commit()
+                self._disk_entries = 0
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and tier sizes; never touches disk."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries,
+                "pending_writes": len(self._writes),
+            }
+
+
+calorie_cache = EstimateCache.from_env()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import random
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+try:
+    from backend import dedalus_runner
+    from backend.calorie_estimator import local_calorie_range
+    from backend.cassette import DedalusTransport
+except ImportError:
+    import dedalus_runner  # type: ignore
+    from calorie_estimator import local_calorie_range  # type: ignore
+    from cassette import DedalusTransport  # type: ignore
+
+_BATCH_LINE = re.compile(r"^\s*-\s*(\d+)\s*\|\s*(.+?)\s*\|\s*(.+?)\s*$", re.MULTILINE)
+_MEAL_NAME = re.compile(r"Meal name:\s*(.+)")
+_RESTRICTIONS = re.compile(r"Dietary restrictions:\s*(.+)")
+
+
+@dataclass
+class LatencyProfile:
+    """Latency distribution for fake calls, in seconds.
+
+    ``kind`` is ``constant`` (always ``median``), ``uniform`` (between
+    ``median - spread`` and ``median + spread``) or ``lognormal`` (median
+    ``median`` with shape ``sigma``, which gives realistic long tails).
+    """
+
+    kind: str = "lognormal"
+    median: float = 0.05
+    spread: float = 0.02
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.median
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.median - self.spread, self.median + self.spread))
+        return rng.lognormvariate(0.0, self.sigma) * self.median
+
+
+def _restrictions(text: str) -> list[str]:
+    text = text.strip()
+    return [] if text.lower() == "none" else [r.strip() for r in text.split(",") if r.strip()]
+
+
+def canned_estimate(meal: str, restrictions: List[str]) -> Dict[str, Any]:
+    """The single-meal estimate the fake model answers with; its ingredients are the matched keywords."""
+    estimate = local_calorie_range(meal, restrictions)
+    calories = estimate["estimated_calories"]
+    ingredients = estimate["matched_terms"] or [meal.lower()]
+    share = calories // len(ingredients)
+    amounts = [share] * len(ingredients)
+    amounts[0] += calories - share * len(ingredients)
+    return {
+        "estimated_calories": calories,
+        "confidence": estimate["confidence"],
+        "ingredient_list": ingredients,
+        "ingredient_calories": amounts,
+        "justification": f"Synthesized a standard single serving. {estimate['reasoning']}",
+    }
+
+
+def canned_output(prompt: str, model: str) -> str:
+    """Plausible Dedalus output for a prompt, derived from the local estimator."""
+    batch = _BATCH_LINE.findall(prompt)
+    if batch and "JSON array" in prompt:
+        items = []
+        for index, meal, restrictions in batch:
+            estimate = canned_estimate(meal, _restrictions(restrictions))
+            del estimate["confidence"], estimate["justification"]
+            items.append({"id": int(index), "meal_name": meal, **estimate})
+        return json.dumps(items)
+
+    meal = _MEAL_NAME.search(prompt)
+    if meal:
+        restrictions = _RESTRICTIONS.search(prompt)
+        return json.dumps(
+            canned_estimate(meal.group(1).strip(), _restrictions(restrictions.group(1) if restrictions else ""))
+        )
+
+    return (
+        "Welcome aboard! Based on your goals, the top-ranked dining halls offer several meals that fit "
+        "your preferences. Start with the highest-scoring hall and try its suggested dishes.\n\n"
+        "Explore the app to see live menus and more recommendations."
+    )
+
+
+class FakeDedalusError(RuntimeError):
+    pass
+
+
+@dataclass
+class FakeDedalusRunner:
+    """Drop-in stand-in for ``DedalusRunner`` with configurable latency, errors and outputs."""
+
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    error_rate: float = 0.0
+    outputs: Callable[[str, str], str] = canned_output
+    seed: int = 0
+    chunk_size: int = 16
+    # Per-model overrides of ``latency``, e.g. a faster small model.
+    model_latency: Dict[str, LatencyProfile] = field(default_factory=dict)
+    calls: int = 0
+    calls_by_model: Dict[str, int] = field(default_factory=dict)
+    # Characters sent and received per model; streams only count the chunks actually consumed.
+    chars_by_model: Dict[str, List[int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def run(self, input: Any = None, model: Any = None, mcp_servers: Any = None, stream: bool = False, **_: Any):
+        self.calls += 1
+        model_name = str(model or "")
+        self.calls_by_model[model_name] = self.calls_by_model.get(model_name, 0) + 1
+        delay = self.model_latency.get(model_name, self.latency).sample(self._rng)
+        fail = self._rng.random() < self.error_rate
+        output = self.outputs(str(input), model_name)
+        self._count(model_name, len(str(input)), 0)
+        if stream:
+            return self._stream(output, delay, fail, model_name)
+        return self._complete(output, delay, fail, model_name)
+
+    def _count(self, model: str, sent: int, received: int) -> None:
+        chars = self.chars_by_model.setdefault(model, [0, 0])
+        chars[0] += sent
+        chars[1] += received
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """Approximate input/output tokens per model (~4 characters per token)."""
+        return {
+            model: {"input_tokens": sent // 4, "output_tokens": received // 4}
+            for model, (sent, received) in self.chars_by_model.items()
+        }
+
+    async def _complete(self, output: str, delay: float, fail: bool, model: str):
+        await asyncio.sleep(delay)
+        if fail:
+            raise FakeDedalusError("injected upstream failure")
+        self._count(model, 0, len(output))
+        return SimpleNamespace(final_output=output)
+
+    async def _stream(self, output: str, delay: float, fail: bool, model: str) -> AsyncIterator[Any]:
+        pieces = [output[i:i + self.chunk_size] for i in range(0, len(output), self.chunk_size)] or [""]
+        # Time to first token is a fraction of the full latency; the rest is spread over chunks.
+        await asyncio.sleep(delay * 0.3)
+        if fail:
+            raise FakeDedalusError("injected upstream failure")
+        per_chunk = delay * 0.7 / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(per_chunk)
+            self._count(model, 0, len(piece))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)])
+
+
+class FakeAsyncDedalus:
+    def __init__(self, *_, **__):
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@contextmanager
+def use_fake_dedalus(
+    runner: Optional[FakeDedalusRunner] = None, transport: Optional[DedalusTransport] = None
+) -> Iterator[FakeDedalusRunner]:
+    """Route every Dedalus call in ``dedalus_runner`` to ``runner`` for the duration of the block.
+
+    Calls pass straight through unless ``transport`` records them (or replays a cassette instead).
+    """
+    runner = runner or FakeDedalusRunner()
+    saved = (dedalus_runner.AsyncDedalus, dedalus_runner.DedalusRunner, dedalus_runner.DefaultAsyncHttpxClient)
+    saved_pool, saved_loaded = dedalus_runner.client_pool, dedalus_runner._sdk_loaded
+    dedalus_runner._sdk_loaded = True
+    dedalus_runner.AsyncDedalus = FakeAsyncDedalus
+    dedalus_runner.DedalusRunner = lambda _client: runner
+    dedalus_runner.DefaultAsyncHttpxClient = None
+    dedalus_runner.client_pool = dedalus_runner.DedalusClientPool(saved_pool.config, transport or DedalusTransport())
+    try:
+        yield runner
+    finally:
+        dedalus_runner.client_pool.transport.close()
+        dedalus_runner.AsyncDedalus, dedalus_runner.DedalusRunner, dedalus_runner.DefaultAsyncHttpxClient = saved
+        dedalus_runner.client_pool = saved_pool
+        dedalus_runner._sdk_loaded = saved_loaded
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Dict, Set, Tuple
+
+try:
+    from backend.metrics import registry
+except ImportError:
+    from metrics import registry  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Per-endpoint latency budgets in milliseconds; "off" or 0 waits for Dedalus indefinitely.
+DEFAULT_LATENCY_BUDGETS_MS = {
+    "calories": "1500",
+    "onboarding": "2500",
+}
+
+HEDGE_OUTCOMES = registry.counter(
+    "estimate_hedge_total",
+    "Budgeted remote estimates by endpoint and outcome (remote, budget_exceeded).",
+    ["endpoint", "outcome"],
+)
+
+
+def latency_budget(endpoint: str) -> float | None:
+    """Budget in seconds for ``endpoint`` from ``<ENDPOINT>_LATENCY_BUDGET_MS``; None means unbounded."""
+    raw = os.getenv(f"{endpoint.upper()}_LATENCY_BUDGET_MS", DEFAULT_LATENCY_BUDGETS_MS.get(endpoint, "off"))
+    if raw.strip().lower() in ("", "off", "none"):
+        return None
+    budget = float(raw) / 1000
+    return budget if budget > 0 else None
+
+
+class Hedger:
+    """Races remote calls against a latency budget without abandoning them.
+
+    A call that misses its budget keeps running as a background task, so its
+    result still lands in the estimate cache for the next request. Background
+    tasks are referenced here until they finish and cancelled on shutdown.
+    """
+
+    def __init__(self):
+        self._background: Set[asyncio.Task] = set()
+        self.within_budget = 0
+        self.budget_exceeded = 0
+
+    async def race(
+        self,
+        call: Awaitable[Any],
+        budget: float | None,
+        endpoint: str = "",
+    ) -> Tuple[bool, Any]:
+        """Return ``(True, result)`` if ``call`` finishes within ``budget`` seconds, else ``(False, None)``.
+
+        Exceptions raised by ``call`` within the budget propagate to the caller.
+        """
+        task = asyncio.ensure_future(call)
+        if budget is None:
+            return True, await task
+        try:
+            done, _ = await asyncio.wait({task}, timeout=max(0.0, budget))
+        except asyncio.CancelledError:
+            self._detach(task)
+            raise
+        if done:
+            self.within_budget += 1
+            HEDGE_OUTCOMES.inc(endpoint=endpoint, outcome="remote")
+            return True, task.result()
+        self.budget_exceeded += 1
+        HEDGE_OUTCOMES.inc(endpoint=endpoint, outcome="budget_exceeded")
+        self._detach(task)
+        return False, None
+
+    def _detach(self, task: asyncio.Task) -> None:
+        self._background.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background remote estimate failed: %r", task.exception())
+
+    async def shutdown(self) -> None:
+        tasks = list(self._background)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "within_budget": self.within_budget,
+            "budget_exceeded": self.budget_exceeded,
+            "background": len(self._background),
+        }
+
+
+hedger = Hedger()
@@ -0,0 +1,171 @@
+import json
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONStreamParser:
+    """Incremental, forgiving parser for the first JSON value in model output.
+
+    Feed text as it streams in. Anything before the first opening bracket in
+    ``start`` (prose, a ```json fence) is skipped, ``//`` and ``/* */``
+    comments and trailing commas are dropped outside of strings, and each
+    top-level object member (or array element) is decoded as soon as it is
+    complete, so callers can act on ``fields`` before the value is closed.
+    """
+
+    def __init__(self, start: str = "{["):
+        self.start = start
+        self.fields: Dict[str, Any] = {}
+        self.items: List[Any] = []
+        self.value: Any = None
+        self.done = False
+        self._clean: List[str] = []
+        self._started = False
+        self._is_object = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._slash = False
+        self._comment: Optional[str] = None
+        self._comment_star = False
+        self._expect = "value"
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start: Optional[int] = None
+
+    def feed(self, text: str) -> "JSONStreamParser":
+        for ch in text:
+            if self.done:
+                break
+            self._step(ch)
+        return self
+
+    def result(self) -> Any:
+        """The parsed value, else whatever top-level members were completed, else None."""
+        if self.value is not None:
+            return self.value
+        if self._is_object:
+            return dict(self.fields) if self.fields else None
+        return list(self.items) if self.items else None
+
+    def _step(self, ch: str) -> None:
+        if not self._started:
+            if ch in self.start:
+                self._started = True
+                self._is_object = ch == "{"
+                self._expect = "key" if self._is_object else "value"
+                self._clean.append(ch)
+                self._depth = 1
+            return
+        if self._comment == "line":
+            if ch == "\n":
+                self._comment = None
+            return
+        if self._comment == "block":
+            if self._comment_star and ch == "/":
+                self._comment = None
+            self._comment_star = ch == "*"
+            return
+        if self._in_string:
+            self._clean.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                self._string_closed()
+            return
+        if self._slash:
+            self._slash = False
+            if ch == "/":
+                self._comment = "line"
+                return
+            if ch == "*":
+                self._comment, self._comment_star = "block", False
+                return
+            self._clean.append("/")
+        if ch == "/":
+            self._slash = True
+            return
+
+        top = self._depth == 1
+        if ch == '"':
+            if top and self._expect == "key":
+                self._key_start = len(self._clean)
+            elif top and self._expect == "value" and self._value_start is None:
+                self._value_start = len(self._clean)
+            self._in_string = True
+            self._clean.append(ch)
+        elif ch in "}]":
+            self._drop_trailing_comma()
+            if top:
+                self._finish_member()
+            self._clean.append(ch)
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish()
+        elif ch == ",":
+            if top:
+                self._finish_member()
+                self._expect = "key" if self._is_object else "value"
+            self._clean.append(ch)
+        elif ch == ":" and top and self._expect == "colon":
+            self._expect = "value"
+            self._clean.append(ch)
+        elif ch in _WHITESPACE:
+            self._clean.append(ch)
+        else:
+            if top and self._expect == "value" and self._value_start is None:
+                self._value_start = len(self._clean)
+            if ch in "{[":
+                self._depth += 1
+            self._clean.append(ch)
+
+    def _string_closed(self) -> None:
+        if self._depth != 1:
+            return
+        if self._expect == "key":
+            try:
+                self._key = json.loads("".join(self._clean[self._key_start:]))
+            except ValueError:
+                self._key = None
+            self._expect = "colon"
+        elif self._expect == "value" and self._value_start is not None:
+            self._finish_member()
+
+    def _finish_member(self) -> None:
+        if self._value_start is None:
+            return
+        raw = "".join(self._clean[self._value_start:]).strip()
+        self._value_start = None
+        self._expect = "comma"
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if not self._is_object:
+            self.items.append(value)
+        elif self._key is not None:
+            self.fields[self._key] = value
+        self._key = None
+
+    def _drop_trailing_comma(self) -> None:
+        end = len(self._clean)
+        while end and self._clean[end - 1] in _WHITESPACE:
+            end -= 1
+        if end and self._clean[end - 1] == ",":
+            del self._clean[end - 1]
+
+    def _finish(self) -> None:
+        self.done = True
+        try:
+            self.value = json.loads("".join(self._clean))
+        except ValueError:
+            self.value = None
+
+
+def parse_json_tolerant(text: str, start: str = "{[") -> Any:
+    """Parse model output that should be JSON, tolerating fences, prose, comments and truncation."""
+    return JSONStreamParser(start).feed(text).result()
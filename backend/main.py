@@ -1,11 +1,16 @@
-import os
+import asyncio
+import json
+import logging
 import sys
+import time
+from contextlib import asynccontextmanager, nullcontext
 from pathlib import Path
 from typing import List
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 
 BACKEND_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BACKEND_DIR.parent
@@ -14,46 +19,101 @@ for path in {str(BACKEND_DIR), str(PROJECT_ROOT)}:
     if path not in sys.path:
         sys.path.append(path)
 
+try:
+    from backend.env import load_env
+except ImportError:
+    from env import load_env  # type: ignore
 
-def _load_env():
-    env_path = BACKEND_DIR / ".env"
-    if not env_path.exists():
-        return
-    try:
-        from dotenv import load_dotenv  # type: ignore
-    except ImportError:
-        for line in env_path.read_text().splitlines():
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            os.environ.setdefault(key.strip(), value.strip().strip('"').strip("'"))
-    else:
-        load_dotenv(env_path)
-
+load_env()
 
-_load_env()
+logger = logging.getLogger(__name__)
 
 try:
-    from backend.assistant import generate_onboarding_summary
+    from backend.admission import AdmissionMiddleware, Shed, admission_limiters, degraded_mode
+    from backend.assistant import generate_onboarding_summary, stream_onboarding_summary
+    from backend.calorie_estimator import local_calorie_estimate, numpy_available
+    from backend.chat import chat_sessions, stream_chat_reply
+    from backend.estimate_cache import calorie_cache
+    from backend.hedging import hedger, latency_budget
+    from backend.menu_registry import MenuSnapshot, menu_registry
+    from backend.menu_warmup import warmup_store, warmup_worker
+    from backend.metrics import MetricsMiddleware, registry as metrics_registry, stage_timer
+    from backend.nutrition_index import nutrition_index
+    from backend.profiling import ProfilingMiddleware, profile_store, profile_token_matches
+    from backend.scheduler import SchedulerContextMiddleware, scheduler
+    from backend.summary_cache import summary_cache
+    from backend.warm_state import fast_start_enabled, load_snapshot, save_snapshot
     from backend.dedalus_runner import (
         DedalusConfig,
-        run_dedalus_calorie_estimator,
+        client_pool,
+        inflight,
+        lookup_cached_calorie_estimate,
+        run_cached_calorie_estimator,
+        run_cached_calorie_estimator_batch,
         run_dedalus_research,
     )
 except ImportError as original_error:
     try:
-        from assistant import generate_onboarding_summary  # type: ignore
+        from admission import AdmissionMiddleware, Shed, admission_limiters, degraded_mode  # type: ignore
+        from assistant import generate_onboarding_summary, stream_onboarding_summary  # type: ignore
+        from calorie_estimator import local_calorie_estimate, numpy_available  # type: ignore
+        from chat import chat_sessions, stream_chat_reply  # type: ignore
+        from estimate_cache import calorie_cache  # type: ignore
+        from hedging import hedger, latency_budget  # type: ignore
+        from menu_registry import MenuSnapshot, menu_registry  # type: ignore
+        from menu_warmup import warmup_store, warmup_worker  # type: ignore
+        from metrics import MetricsMiddleware, registry as metrics_registry, stage_timer  # type: ignore
+        from nutrition_index import nutrition_index  # type: ignore
+        from profiling import ProfilingMiddleware, profile_store, profile_token_matches  # type: ignore
+        from scheduler import SchedulerContextMiddleware, scheduler  # type: ignore
+        from summary_cache import summary_cache  # type: ignore
+        from warm_state import fast_start_enabled, load_snapshot, save_snapshot  # type: ignore
         from dedalus_runner import (  # type: ignore
             DedalusConfig,
-            run_dedalus_calorie_estimator,
+            client_pool,
+            inflight,
+            lookup_cached_calorie_estimate,
+            run_cached_calorie_estimator,
+            run_cached_calorie_estimator_batch,
             run_dedalus_research,
         )
     except ImportError:
         raise original_error
 
-app = FastAPI(title="Dedalus Research API")
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    fast_start = fast_start_enabled()
+    if fast_start:
+        # The Dedalus client (and SDK import) is deferred to the first remote call.
+        loaded = load_snapshot()
+        if loaded:
+            logger.info("Loaded warm-state snapshot: %s", loaded)
+        # Import NumPy off the event loop so the first batch estimate does not pay for it.
+        asyncio.get_running_loop().run_in_executor(None, numpy_available)
+    else:
+        await client_pool.start()
+    warmup_worker.resume_unfinished()
+    # Off the event loop: a large index takes about a second to read and hash.
+    index_loading = asyncio.create_task(asyncio.to_thread(nutrition_index.load))
+    try:
+        yield
+    finally:
+        await index_loading
+        await warmup_worker.shutdown()
+        await hedger.shutdown()
+        await client_pool.close()
+        if fast_start:
+            save_snapshot()
+        calorie_cache.flush()
+        summary_cache.store.flush()
+        nutrition_index.flush()
+
+
+app = FastAPI(title="Dedalus Research API", lifespan=lifespan)
+
+# Innermost, so shed responses still pass through CORS, metrics and the scheduler context.
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -64,6 +124,63 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(SchedulerContextMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Outermost, so a profile covers the whole request including the other middlewares.
+app.add_middleware(ProfilingMiddleware)
+
+
+def _cache_lookups(stats: dict) -> dict:
+    # One stats() snapshot per scrape; it reads counters only.
+    return {
+        (result,): stats[key]
+        for result, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))
+    }
+
+
+metrics_registry.gauge(
+    "calorie_cache_lookups",
+    "Calorie estimate cache lookups since startup, by result.",
+    ["result"],
+).set_function(lambda: _cache_lookups(calorie_cache.stats()))
+metrics_registry.gauge(
+    "onboarding_summary_cache_lookups",
+    "Onboarding summary cache lookups since startup, by result.",
+    ["result"],
+).set_function(lambda: _cache_lookups(summary_cache.stats()))
+metrics_registry.gauge(
+    "dedalus_coalesced_calls",
+    "Estimator/research calls that joined an identical in-flight request.",
+).set_function(lambda: {(): inflight.stats()["coalesced"]})
+metrics_registry.gauge(
+    "dedalus_queue_depth",
+    "Dedalus calls waiting for a scheduler slot, by priority.",
+    ["priority"],
+).set_function(lambda: {(priority,): depth for priority, depth in scheduler.queue_depth().items()})
+metrics_registry.gauge(
+    "dedalus_active_calls",
+    "Dedalus calls currently holding a scheduler slot.",
+).set_function(lambda: {(): scheduler.stats()["active"]})
+metrics_registry.gauge(
+    "admission_queue_depth",
+    "Requests waiting for an admission slot, by endpoint.",
+    ["endpoint"],
+).set_function(lambda: {(name,): limiter.queue_depth() for name, limiter in admission_limiters.items()})
+metrics_registry.gauge(
+    "admission_in_flight",
+    "Requests holding an admission slot, by endpoint.",
+    ["endpoint"],
+).set_function(lambda: {(name,): limiter.active for name, limiter in admission_limiters.items()})
+metrics_registry.gauge(
+    "dedalus_pool_connections",
+    "Connections in the shared Dedalus HTTP pool, by state.",
+    ["state"],
+).set_function(
+    lambda: {
+        ("active",): client_pool.stats()["active_connections"],
+        ("idle",): client_pool.stats()["idle_connections"],
+    }
+)
 
 
 class SearchRequest(BaseModel):
@@ -83,6 +200,26 @@ class CalorieRequest(BaseModel):
 
 class CalorieResponse(BaseModel):
     estimated_calories: int | None
+    source: str = Field(default="dedalus", description="cache, dedalus, index or local")
+    tier: str | None = Field(default=None, description="Cascade tier that produced the estimate: index, local, fast or large")
+    provisional: bool = Field(
+        default=False,
+        description="True when Dedalus missed the latency budget; a refined estimate is being cached",
+    )
+
+
+class CalorieBatchRequest(BaseModel):
+    meals: List[CalorieRequest] = Field(default_factory=list)
+    token_budget: int | None = Field(default=None, description="Approximate token budget per LLM call")
+
+
+class CalorieBatchItem(BaseModel):
+    meal_name: str
+    estimated_calories: int | None
+
+
+class CalorieBatchResponse(BaseModel):
+    results: List[CalorieBatchItem]
 
 
 class MealInput(BaseModel):
@@ -97,7 +234,20 @@ class DiningHallInput(BaseModel):
 
 class OnboardingRequest(BaseModel):
     user_profile: dict
-    dining_halls: List[DiningHallInput]
+    dining_halls: List[DiningHallInput] | None = None
+    menu_version: str | None = Field(default=None, description="Version id returned by POST /menus")
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _timed_validation(cls, data, handler):
+        with stage_timer("parse"):
+            return handler(data)
+
+    @model_validator(mode="after")
+    def _one_menu_source(self):
+        if (self.dining_halls is None) == (self.menu_version is None):
+            raise ValueError("Provide exactly one of dining_halls or menu_version.")
+        return self
 
 
 class OnboardingResponse(BaseModel):
@@ -105,6 +255,25 @@ class OnboardingResponse(BaseModel):
     ranked_halls: list[dict]
 
 
+class MenuRegistrationRequest(BaseModel):
+    label: str | None = Field(default=None, description="Optional label, e.g. the menu date")
+    dining_halls: List[DiningHallInput]
+
+
+class MenuVersionResponse(BaseModel):
+    version: str
+    label: str | None
+    created_at: float
+    halls: int
+    meals: int
+    created: bool = Field(default=False, description="False when an identical menu was already registered")
+
+
+class MenuWarmupRequest(BaseModel):
+    label: str | None = Field(default=None, description="Optional label, e.g. the menu date")
+    dining_halls: List[DiningHallInput]
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search(req: SearchRequest):
     config = DedalusConfig(
@@ -120,26 +289,270 @@ async def search(req: SearchRequest):
 
 @app.post("/calories", response_model=CalorieResponse)
 async def estimate_calories(req: CalorieRequest):
-    result = await run_dedalus_calorie_estimator(req.meal_name, req.dietary_restrictions)
+    result = lookup_cached_calorie_estimate(req.meal_name, req.dietary_restrictions)
+    source = "cache"
+    if result is None:
+        finished, result = await hedger.race(
+            run_cached_calorie_estimator(req.meal_name, req.dietary_restrictions),
+            latency_budget("calories"),
+            "calories",
+        )
+        if not finished:
+            calories = local_calorie_estimate(req.meal_name, req.dietary_restrictions)
+            return CalorieResponse(estimated_calories=calories, source="local", tier="local", provisional=True)
+        source = "dedalus"
     if result is None:
         raise HTTPException(status_code=503, detail="Unable to estimate calories; check Dedalus configuration.")
+    tier = None
     if isinstance(result, dict):
         calories = result.get("estimated_calories")
+        tier = result.get("tier")
+        if tier in ("index", "local"):
+            source = tier
     else:
         calories = result
-    return CalorieResponse(estimated_calories=calories)
+    return CalorieResponse(estimated_calories=calories, source=source, tier=tier)
 
 
-@app.post("/onboarding-summary", response_model=OnboardingResponse)
-async def onboarding_summary(req: OnboardingRequest):
-    halls = {
+@app.post("/calories/batch", response_model=CalorieBatchResponse)
+async def estimate_calories_batch(req: CalorieBatchRequest):
+    results = await run_cached_calorie_estimator_batch(
+        [(meal.meal_name, meal.dietary_restrictions) for meal in req.meals],
+        token_budget=req.token_budget,
+    )
+    return CalorieBatchResponse(
+        results=[
+            CalorieBatchItem(
+                meal_name=meal.meal_name,
+                estimated_calories=result.get("estimated_calories") if isinstance(result, dict) else None,
+            )
+            for meal, result in zip(req.meals, results)
+        ]
+    )
+
+
+def _halls_from_request(dining_halls: List[DiningHallInput]) -> dict:
+    return {
         hall.name: [{"meal": meal.meal, "dietary": meal.dietary} for meal in hall.meals]
-        for hall in req.dining_halls
+        for hall in dining_halls
     }
-    result = await generate_onboarding_summary(req.user_profile, halls)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _onboarding_menu(req: OnboardingRequest) -> dict | MenuSnapshot:
+    if req.menu_version is None:
+        return _halls_from_request(req.dining_halls)
+    snapshot = menu_registry.get(req.menu_version)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Unknown menu version; register it with POST /menus.")
+    return snapshot
+
+
+@app.post("/onboarding-summary", response_model=OnboardingResponse)
+async def onboarding_summary(req: OnboardingRequest):
+    result = await generate_onboarding_summary(req.user_profile, _onboarding_menu(req))
     return OnboardingResponse(summary=result["summary"], ranked_halls=result["ranked_halls"])
 
 
+@app.post("/onboarding-summary/stream")
+async def onboarding_summary_stream(req: OnboardingRequest):
+    """Server-Sent Events: ``ranked_halls``, then ``summary_delta`` tokens, then ``done``."""
+    halls = _onboarding_menu(req)
+
+    async def events():
+        try:
+            async for event, data in stream_onboarding_summary(req.user_profile, halls):
+                yield _sse(event, data)
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc) or exc.__class__.__name__})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/menus", response_model=MenuVersionResponse, status_code=201)
+async def register_menu(req: MenuRegistrationRequest):
+    """Store a menu snapshot once so onboarding requests can send its ``menu_version`` instead."""
+    snapshot, created = menu_registry.register(_halls_from_request(req.dining_halls), label=req.label)
+    return MenuVersionResponse(**snapshot.describe(), created=created)
+
+
+@app.get("/menus")
+async def list_menus():
+    return {"menus": menu_registry.versions()}
+
+
+@app.get("/menus/{version}", response_model=MenuVersionResponse)
+async def get_menu(version: str):
+    snapshot = menu_registry.get(version)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Unknown menu version.")
+    return MenuVersionResponse(**snapshot.describe())
+
+
+@app.post("/menus/warmup", status_code=202)
+async def submit_menu_warmup(req: MenuWarmupRequest):
+    job_id = warmup_worker.submit(_halls_from_request(req.dining_halls), label=req.label)
+    return warmup_store.progress(job_id)
+
+
+@app.get("/menus/warmup/{job_id}")
+async def menu_warmup_progress(job_id: str):
+    progress = warmup_store.progress(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Unknown warm-up job.")
+    return progress
+
+
+CHAT_MAX_MESSAGE_CHARS = 2000
+
+
+@app.websocket("/chat/ws")
+async def chat_socket(websocket: WebSocket, session_id: str | None = None):
+    """Chat over a WebSocket; the conversation and preferences live on the server.
+
+    The server first sends ``{"type": "session", "session_id", "preferences"}``;
+    reconnect with ``?session_id=`` to resume. Clients send
+    ``{"type": "preferences", "preferences": {...}}`` to update their profile
+    and ``{"type": "message", "text": ...}`` for each new message, which is
+    answered with ``delta`` frames and a final ``done`` carrying the full reply.
+    Each reply holds a slot of the ``chat`` admission limiter. A shed message
+    gets an ``error`` frame with ``retry_after`` or, with ``CHAT_DEGRADED_MODE``
+    on, the fallback reply without a Dedalus call, as the HTTP routes do.
+    """
+    await websocket.accept()
+    session = chat_sessions.open(session_id)
+    await websocket.send_json(
+        {"type": "session", "session_id": session.session_id, "preferences": session.preferences}
+    )
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except (KeyError, ValueError):
+                # KeyError: a binary frame has no "text".
+                frame = None
+            kind = frame.get("type") if isinstance(frame, dict) else None
+            if kind == "preferences" and isinstance(frame.get("preferences"), dict):
+                try:
+                    chat_sessions.set_preferences(session, frame["preferences"])
+                except ValueError as exc:
+                    await websocket.send_json({"type": "error", "detail": str(exc)})
+                    continue
+                await websocket.send_json({"type": "preferences", "preferences": session.preferences})
+            elif kind == "message" and isinstance(frame.get("text"), str) and frame["text"].strip():
+                text = frame["text"].strip()[:CHAT_MAX_MESSAGE_CHARS]
+                limiter = admission_limiters["chat"]
+                degraded = False
+                try:
+                    await limiter.acquire()
+                except Shed as shed:
+                    if not limiter.degrade:
+                        await websocket.send_json(
+                            {
+                                "type": "error",
+                                "detail": f"chat is overloaded ({shed.reason.replace('_', ' ')}); retry later.",
+                                "retry_after": shed.retry_after,
+                            }
+                        )
+                        continue
+                    degraded = True
+                parts = []
+                start = time.monotonic()
+                try:
+                    with degraded_mode() if degraded else nullcontext():
+                        async for delta in stream_chat_reply(chat_sessions, session, text):
+                            parts.append(delta)
+                            await websocket.send_json({"type": "delta", "text": delta})
+                except WebSocketDisconnect:
+                    raise
+                except Exception as exc:
+                    logger.exception("Chat reply failed for session %s", session.session_id)
+                    await websocket.send_json({"type": "error", "detail": str(exc) or exc.__class__.__name__})
+                    continue
+                finally:
+                    if not degraded:
+                        limiter.release(time.monotonic() - start)
+                await websocket.send_json({"type": "done", "text": "".join(parts).strip()})
+            else:
+                await websocket.send_json({"type": "error", "detail": "Expected a message or preferences frame."})
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/chat/stats")
+async def chat_stats():
+    return chat_sessions.stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "calorie_estimates": calorie_cache.stats(),
+        "onboarding_summaries": summary_cache.stats(),
+        "nutrition_index": nutrition_index.stats(),
+        "coalescing": inflight.stats(),
+        "hedging": hedger.stats(),
+    }
+
+
+@app.get("/pool/stats")
+async def pool_stats():
+    return client_pool.stats()
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    return scheduler.stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    return {name: limiter.stats() for name, limiter in admission_limiters.items()}
+
+
+def _require_profile_token(x_profile: str | None = Header(default=None)) -> None:
+    # 404 rather than 401/403, so the routes look absent without the token.
+    if not profile_token_matches(x_profile):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/profiles", dependencies=[Depends(_require_profile_token)])
+async def list_profiles():
+    return profile_store.list()
+
+
+@app.get("/debug/profiles/{profile_id}", dependencies=[Depends(_require_profile_token)])
+async def get_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile id.")
+    return profile.report()
+
+
+@app.get(
+    "/debug/profiles/{profile_id}/collapsed",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(_require_profile_token)],
+)
+async def get_profile_stacks(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile id.")
+    return PlainTextResponse(profile.collapsed())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
@@ -0,0 +1,180 @@
+import logging
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+KNOWN_TAGS = (
+    "vegan",
+    "vegetarian",
+    "pescatarian",
+    "gluten-free",
+    "dairy-free",
+    "nut-free",
+    "halal",
+    "kosher",
+    "low-carb",
+    "keto",
+    "paleo",
+    "high-protein",
+    "egg-free",
+    "soy-free",
+    "shellfish-free",
+    "low-sodium",
+)
+# Bits the shared registry hands out beyond ``KNOWN_TAGS``; tags arrive in request payloads.
+MAX_EXTRA_TAGS = 16
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+class TagRegistry:
+    """Interns dietary tags into fixed bit positions (at most ``capacity`` tags).
+
+    Well-known tags are pre-registered so their bits are stable across
+    processes; unseen tags take the next free bit until capacity runs out.
+    Tags that get no bit are counted in ``overflow``; ``MenuIndex`` keeps them
+    per meal instead, so they still filter and round-trip.
+    """
+
+    def __init__(self, tags: Iterable[str] = KNOWN_TAGS, capacity: int = 64):
+        self.capacity = capacity
+        self.overflow = 0
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+        for tag in tags:
+            self.intern(tag)
+
+    def intern(self, tag: str) -> Optional[int]:
+        """Return the bit for ``tag``, registering it if there is room; None when full."""
+        tag = normalize_tag(tag)
+        bit = self._bits.get(tag)
+        if bit is None:
+            if len(self._names) >= self.capacity:
+                if not self.overflow:
+                    logger.warning("Tag registry is full (%d tags); %r and later tags get no bit", self.capacity, tag)
+                self.overflow += 1
+                return None
+            bit = len(self._names)
+            self._bits[tag] = bit
+            self._names.append(tag)
+        return bit
+
+    def mask(self, tags: Iterable[str]) -> int:
+        """Bitmask of the registered tags in ``tags``; unregistrable tags are dropped."""
+        mask = 0
+        for tag in tags:
+            bit = self.intern(tag)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def names(self) -> List[str]:
+        """Registered tags in bit order, e.g. for a warm-state snapshot."""
+        return list(self._names)
+
+    def tags(self, mask: int) -> List[str]:
+        return [name for bit, name in enumerate(self._names) if mask >> bit & 1]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+tag_registry = TagRegistry(capacity=len(KNOWN_TAGS) + MAX_EXTRA_TAGS)
+
+
+class Meal:
+    __slots__ = ("name", "mask")
+
+    def __init__(self, name: str, mask: int):
+        self.name = name
+        self.mask = mask
+
+
+class Hall:
+    __slots__ = ("name", "start", "stop")
+
+    def __init__(self, name: str, start: int, stop: int):
+        self.name = name
+        self.start = start
+        self.stop = stop
+
+
+class MenuIndex:
+    """Compact, array-backed store of halls and meals with an inverted tag index.
+
+    Meals are stored column-wise (names plus a ``uint64`` tag mask per meal),
+    and each hall is a slice of that range. For every tag the index keeps a
+    bitset of meal ids carrying it, so compatibility with a set of dietary
+    preferences is one bitwise AND per preference across the whole menu.
+    """
+
+    __slots__ = ("registry", "halls", "meal_names", "meal_masks", "_extra_tags", "_postings", "_all")
+
+    def __init__(self, dining_halls: Dict[str, List[Dict[str, Any]]], registry: TagRegistry = tag_registry):
+        self.registry = registry
+        self.halls: List[Hall] = []
+        self.meal_names: List[str] = []
+        self.meal_masks = array("Q")
+        # Meal id -> tags the registry had no bit for.
+        self._extra_tags: Dict[int, List[str]] = {}
+        self._postings: Dict[str, int] = {}
+
+        for hall_name, meals in dining_halls.items():
+            start = len(self.meal_names)
+            for meal in meals:
+                meal_id = len(self.meal_names)
+                tags = {normalize_tag(t) for t in meal.get("dietary", [])}
+                mask, extra = 0, []
+                for tag in tags:
+                    bit = registry.intern(tag)
+                    if bit is None:
+                        extra.append(tag)
+                    else:
+                        mask |= 1 << bit
+                self.meal_names.append(meal["meal"])
+                self.meal_masks.append(mask)
+                if extra:
+                    self._extra_tags[meal_id] = sorted(extra)
+                for tag in tags:
+                    self._postings[tag] = self._postings.get(tag, 0) | (1 << meal_id)
+            self.halls.append(Hall(hall_name, start, len(self.meal_names)))
+        self._all = (1 << len(self.meal_names)) - 1
+
+    def __len__(self) -> int:
+        return len(self.meal_names)
+
+    def compatible_bitset(self, prefs: Iterable[str]) -> int:
+        """Bitset of meal ids that carry every tag in ``prefs``."""
+        bits = self._all
+        for pref in prefs:
+            bits &= self._postings.get(normalize_tag(pref), 0)
+            if not bits:
+                break
+        return bits
+
+    def compatible_meals(self, prefs: Iterable[str]) -> Iterator[Tuple[Hall, Meal]]:
+        """Yield ``(hall, meal)`` for every compatible meal, in menu order."""
+        bits = self.compatible_bitset(prefs)
+        for hall in self.halls:
+            window = (bits >> hall.start) & ((1 << (hall.stop - hall.start)) - 1)
+            while window:
+                low = window & -window
+                meal_id = hall.start + low.bit_length() - 1
+                yield hall, Meal(self.meal_names[meal_id], self.meal_masks[meal_id])
+                window ^= low
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Expand back into the ``{hall: [{"meal", "dietary"}]}`` shape."""
+        return {
+            hall.name: [
+                {
+                    "meal": self.meal_names[i],
+                    "dietary": self.registry.tags(self.meal_masks[i]) + self._extra_tags.get(i, []),
+                }
+                for i in range(hall.start, hall.stop)
+            ]
+            for hall in self.halls
+        }
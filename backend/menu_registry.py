@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from backend.menu_index import MenuIndex
+    from backend.summary_cache import menu_hash
+except ImportError:
+    from menu_index import MenuIndex  # type: ignore
+    from summary_cache import menu_hash  # type: ignore
+
+
+@dataclass
+class MenuSnapshot:
+    """A registered menu with its scoring index prebuilt."""
+
+    version: str
+    label: Optional[str]
+    created_at: float
+    dining_halls: Dict[str, List[Dict[str, Any]]]
+    index: MenuIndex
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "label": self.label,
+            "created_at": self.created_at,
+            "halls": len(self.index.halls),
+            "meals": len(self.index.meal_names),
+        }
+
+
+class MenuRegistry:
+    """Keeps the ``max_versions`` most recently used menu snapshots by version id.
+
+    The version id is the menu's content hash (the same one the summary cache
+    keys on), so registering an identical menu again returns the existing
+    snapshot instead of rebuilding it.
+    """
+
+    def __init__(self, max_versions: int = 16):
+        self.max_versions = max(1, max_versions)
+        self._snapshots: "OrderedDict[str, MenuSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "MenuRegistry":
+        return cls(max_versions=int(os.getenv("MENU_REGISTRY_SIZE", "16")))
+
+    def register(
+        self,
+        dining_halls: Dict[str, List[Dict[str, Any]]],
+        label: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> Tuple[MenuSnapshot, bool]:
+        """Store ``dining_halls``; returns the snapshot and whether it is new."""
+        version = menu_hash(dining_halls)
+        with self._lock:
+            existing = self._snapshots.get(version)
+            if existing is not None:
+                self._snapshots.move_to_end(version)
+                return existing, False
+        snapshot = MenuSnapshot(
+            version=version,
+            label=label,
+            created_at=created_at or time.time(),
+            dining_halls=dining_halls,
+            index=MenuIndex(dining_halls),
+        )
+        with self._lock:
+            existing = self._snapshots.setdefault(version, snapshot)
+            self._snapshots.move_to_end(version)
+            while len(self._snapshots) > self.max_versions:
+                self._snapshots.popitem(last=False)
+        return existing, existing is snapshot
+
+    def get(self, version: str) -> Optional[MenuSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+            if snapshot is not None:
+                self._snapshots.move_to_end(version)
+            return snapshot
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Descriptions of the registered menus, most recently used first."""
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        return [snapshot.describe() for snapshot in reversed(snapshots)]
+
+    def export(self) -> List[Tuple[Optional[str], float, Dict[str, List[Dict[str, Any]]]]]:
+        """``(label, created_at, dining_halls)`` per snapshot, oldest first, for a warm-state snapshot."""
+        with self._lock:
+            return [(s.label, s.created_at, s.dining_halls) for s in self._snapshots.values()]
+
+    def restore(self, entries: List[Tuple[Optional[str], float, Dict[str, List[Dict[str, Any]]]]]) -> int:
+        for label, created_at, dining_halls in entries:
+            self.register(dining_halls, label=label, created_at=created_at)
+        return len(self._snapshots)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+menu_registry = MenuRegistry.from_env()
@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from backend.dedalus_runner import LOCAL_TIERS, run_cached_calorie_estimator
+    from backend.estimate_cache import BACKEND_DIR, make_cache_key
+    from backend.scheduler import BACKGROUND, call_context
+except ImportError:
+    from dedalus_runner import LOCAL_TIERS, run_cached_calorie_estimator  # type: ignore
+    from estimate_cache import BACKEND_DIR, make_cache_key  # type: ignore
+    from scheduler import BACKGROUND, call_context  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_PATH = BACKEND_DIR / ".cache" / "warmup.sqlite3"
+
+Estimator = Callable[[str, List[str]], Awaitable[Any]]
+
+
+def restriction_sets(dietary: Iterable[str], max_combination: int = 2) -> List[List[str]]:
+    """Restriction sets worth precomputing for a dish.
+
+    A user's preferences must all be tags of the dish for it to qualify, so
+    the keys users can hit are subsets of the dish's tags. We warm the empty
+    set plus every subset up to ``max_combination`` tags.
+    """
+    tags = sorted({t.strip().lower() for t in dietary if t.strip()})
+    sets: List[List[str]] = [[]]
+    for size in range(1, min(max_combination, len(tags)) + 1):
+        sets.extend(list(combo) for combo in itertools.combinations(tags, size))
+    return sets
+
+
+def expand_menu(
+    dining_halls: Dict[str, List[Dict[str, Any]]],
+    max_combination: int = 2,
+) -> List[Tuple[str, List[str]]]:
+    """Flatten hall menus into distinct ``(meal, restrictions)`` work items."""
+    items: Dict[str, Tuple[str, List[str]]] = {}
+    for meals in dining_halls.values():
+        for meal in meals:
+            for restrictions in restriction_sets(meal.get("dietary", []), max_combination):
+                items.setdefault(make_cache_key(meal["meal"], restrictions), (meal["meal"], restrictions))
+    return list(items.values())
+
+
+class WarmupStore:
+    """SQLite persistence for warm-up jobs and their per-dish status."""
+
+    def __init__(self, path: str | Path | None = DEFAULT_WARMUP_PATH):
+        self.path = str(path) if path else ":memory:"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_env(cls) -> "WarmupStore":
+        return cls(os.getenv("WARMUP_DB_PATH", str(DEFAULT_WARMUP_PATH)))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS warmup_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    label TEXT,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS warmup_items (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    meal TEXT NOT NULL,
+                    restrictions TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    PRIMARY KEY (job_id, idx)
+                );
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def create_job(self, items: List[Tuple[str, List[str]]], label: str | None = None) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO warmup_jobs (job_id, label, status, created_at, updated_at) VALUES (?, ?, 'pending', ?, ?)",
+                (job_id, label, now, now),
+            )
+            conn.executemany(
+                "INSERT INTO warmup_items (job_id, idx, meal, restrictions, status) VALUES (?, ?, ?, ?, 'pending')",
+                [(job_id, i, meal, json.dumps(restrictions)) for i, (meal, restrictions) in enumerate(items)],
+            )
+            conn.commit()
+        return job_id
+
+    def pending_items(self, job_id: str) -> List[Tuple[int, str, List[str], int]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT idx, meal, restrictions, attempts FROM warmup_items "
+                "WHERE job_id = ? AND status = 'pending' ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [(idx, meal, json.loads(restrictions), attempts) for idx, meal, restrictions, attempts in rows]
+
+    def update_item(self, job_id: str, idx: int, status: str, attempts: int, error: str | None = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE warmup_items SET status = ?, attempts = ?, error = ? WHERE job_id = ? AND idx = ?",
+                (status, attempts, error, job_id, idx),
+            )
+            conn.execute("UPDATE warmup_jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+            conn.commit()
+
+    def set_status(self, job_id: str, status: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE warmup_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), job_id),
+            )
+            conn.commit()
+
+    def unfinished_jobs(self) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT job_id FROM warmup_jobs WHERE status IN ('pending', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connection()
+            job = conn.execute(
+                "SELECT label, status, created_at, updated_at FROM warmup_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM warmup_items WHERE job_id = ? GROUP BY status", (job_id,)
+                ).fetchall()
+            )
+        label, status, created_at, updated_at = job
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("skipped", 0) + counts.get("failed", 0)
+        return {
+            "job_id": job_id,
+            "label": label,
+            "status": status,
+            "total": total,
+            "done": counts.get("done", 0),
+            "skipped": counts.get("skipped", 0),
+            "failed": counts.get("failed", 0),
+            "pending": counts.get("pending", 0),
+            "progress": finished / total if total else 1.0,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+
+class _RateLimiter:
+    """Spaces calls so at most ``rate`` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class WarmupWorker:
+    """Runs warm-up jobs: rate-limited, retried estimator calls with persisted progress.
+
+    Results land in the persistent estimate cache through the cached estimator,
+    which is where ``score_dining_halls`` looks before calling Dedalus live.
+    Item status is written after every dish, so a restarted process resumes
+    with only the dishes still pending. Dishes answered by a local tier
+    (nutrition index or keywords, including degraded mode) are not cached
+    and are recorded as ``skipped``.
+    """
+
+    def __init__(
+        self,
+        store: WarmupStore,
+        estimator: Estimator = run_cached_calorie_estimator,
+        rate_per_second: float = float(os.getenv("WARMUP_RATE_PER_SECOND", "2")),
+        concurrency: int = int(os.getenv("WARMUP_CONCURRENCY", "4")),
+        max_attempts: int = int(os.getenv("WARMUP_MAX_ATTEMPTS", "3")),
+        backoff_seconds: float = 1.0,
+    ):
+        self.store = store
+        self.estimator = estimator
+        self.rate_per_second = rate_per_second
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, dining_halls: Dict[str, List[Dict[str, Any]]], label: str | None = None) -> str:
+        """Persist a job for ``dining_halls`` and start it in the background."""
+        job_id = self.store.create_job(expand_menu(dining_halls), label=label)
+        self.start(job_id)
+        return job_id
+
+    def start(self, job_id: str) -> asyncio.Task:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self.run(job_id))
+            self._tasks[job_id] = task
+            task.add_done_callback(lambda _, j=job_id: self._tasks.pop(j, None))
+        return task
+
+    def resume_unfinished(self) -> List[str]:
+        """Restart every job left pending/running by a previous process."""
+        job_ids = self.store.unfinished_jobs()
+        for job_id in job_ids:
+            self.start(job_id)
+        return job_ids
+
+    async def shutdown(self) -> None:
+        """Stop running jobs; their remaining items stay pending for the next resume."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, job_id: str) -> Dict[str, Any] | None:
+        self.store.set_status(job_id, "running")
+        limiter = _RateLimiter(self.rate_per_second)
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def process(idx: int, meal: str, restrictions: List[str], attempts: int) -> None:
+            async with semaphore:
+                error = None
+                while attempts < self.max_attempts:
+                    await limiter.wait()
+                    attempts += 1
+                    try:
+                        result = await self.estimator(meal, restrictions)
+                    except Exception as exc:
+                        result, error = None, repr(exc)
+                    else:
+                        error = None if result is not None else "estimator returned no result"
+                    if result is not None:
+                        tier = result.get("tier")
+                        if tier in LOCAL_TIERS:
+                            note = f"answered by the {tier} tier; not cached"
+                            self.store.update_item(job_id, idx, "skipped", attempts, note)
+                        else:
+                            self.store.update_item(job_id, idx, "done", attempts)
+                        return
+                    if attempts < self.max_attempts:
+                        await asyncio.sleep(self.backoff_seconds * 2 ** (attempts - 1))
+                logger.warning("Warm-up of %r %s failed after %d attempts: %s", meal, restrictions, attempts, error)
+                self.store.update_item(job_id, idx, "failed", attempts, error)
+
+        # Warm-up calls queue behind interactive traffic and share fairly with other jobs.
+        with call_context(priority=BACKGROUND, user=f"warmup:{job_id}"):
+            await asyncio.gather(*(process(*item) for item in self.store.pending_items(job_id)))
+        progress = self.store.progress(job_id)
+        self.store.set_status(job_id, "completed" if progress and not progress["failed"] else "completed_with_errors")
+        return self.store.progress(job_id)
+
+
+warmup_store = WarmupStore.from_env()
+warmup_worker = WarmupWorker(warmup_store)
+
+
+async def _run_cli(args: argparse.Namespace) -> None:
+    if args.resume:
+        job_ids = warmup_store.unfinished_jobs()
+    else:
+        with open(args.menu_file) as fh:
+            payload = json.load(fh)
+        halls = payload.get("dining_halls", payload)
+        if isinstance(halls, list):
+            halls = {hall["name"]: hall.get("meals", []) for hall in halls}
+        job_ids = [warmup_store.create_job(expand_menu(halls), label=args.label)]
+
+    for job_id in job_ids:
+        task = warmup_worker.start(job_id)
+        while not task.done():
+            progress = warmup_store.progress(job_id)
+            print(f"[{job_id}] {progress['done']}/{progress['total']} done, {progress['skipped']} skipped, {progress['failed']} failed", flush=True)
+            await asyncio.wait({task}, timeout=args.report_every)
+        print(json.dumps(task.result(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute calorie estimates for a day's menus.")
+    parser.add_argument("menu_file", nargs="?", help="JSON file with dining halls and meals")
+    parser.add_argument("--label", help="Optional label, e.g. the menu date")
+    parser.add_argument("--resume", action="store_true", help="Resume unfinished jobs instead of submitting")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Progress interval in seconds")
+    cli_args = parser.parse_args()
+    if not cli_args.resume and not cli_args.menu_file:
+        parser.error("menu_file is required unless --resume is given")
+    asyncio.run(_run_cli(cli_args))
@@ -0,0 +1,513 @@
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+try:
+    from backend.estimate_cache import BACKEND_DIR
+    from backend.menu_index import normalize_tag
+except ImportError:
+    from estimate_cache import BACKEND_DIR  # type: ignore
+    from menu_index import normalize_tag  # type: ignore
+
+DEFAULT_INDEX_PATH = BACKEND_DIR / ".cache" / "nutrition_index.sqlite3"
+
+_WORD = re.compile(r"[a-z]+")
+_FREE_FROM = re.compile(r"\b(gluten|dairy|nut|egg|soy)[\s-]+free\b")
+# Dietary markers found in meal names, mapped to the restriction they stand for.
+_MARKERS = {
+    "v": "vegan",
+    "vg": "vegan",
+    "vegan": "vegan",
+    "veg": "vegetarian",
+    "vegetarian": "vegetarian",
+    "gf": "gluten-free",
+    "glutenfree": "gluten-free",
+    "df": "dairy-free",
+    "dairyfree": "dairy-free",
+    "nutfree": "nut-free",
+    "eggfree": "egg-free",
+    "soyfree": "soy-free",
+    "halal": "halal",
+    "kosher": "kosher",
+    "pescatarian": "pescatarian",
+}
+_STOPWORDS = {"a", "an", "and", "the", "with", "of", "in", "on", "or", "style", "classic", "house", "homemade", "our"}
+# Quantity words that show up in ingredient lists ("1 cup cooked brown rice").
+_UNITS = {
+    "cup", "tbsp", "tsp", "tablespoon", "teaspoon", "oz", "ounce", "g", "gram", "kg", "ml", "l", "lb", "pound",
+    "slice", "piece", "pinch", "dash", "clove", "large", "small", "medium", "serving", "whole", "chopped", "diced",
+    "sliced", "cooked", "raw", "fresh", "of", "and", "or", "to", "taste", "for", "a", "the",
+}
+
+_MERSENNE = (1 << 61) - 1
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def dish_features(meal_name: str) -> Tuple[Tuple[str, ...], Set[str]]:
+    """Return a meal name's dish tokens (stemmed, de-duplicated) and the dietary markers it carries."""
+    text = _FREE_FROM.sub(r"\1free", meal_name.lower())
+    tokens: List[str] = []
+    markers: Set[str] = set()
+    for word in _WORD.findall(text):
+        if word in _MARKERS:
+            markers.add(_MARKERS[word])
+            continue
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        word = _stem(word)
+        if word not in tokens:
+            tokens.append(word)
+    return tuple(tokens), markers
+
+
+def ingredient_tokens(ingredient: str) -> List[str]:
+    return [_stem(w) for w in _WORD.findall(ingredient.lower()) if len(w) > 1 and _stem(w) not in _UNITS]
+
+
+def shingles(tokens: Iterable[str]) -> FrozenSet[str]:
+    """Whole tokens plus character trigrams, so spelling variants still overlap."""
+    grams: Set[str] = set()
+    for token in tokens:
+        grams.add(token)
+        padded = f"^{token}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class MinHasher:
+    """MinHash signatures with ``bands`` x ``rows`` locality-sensitive buckets.
+
+    Two sets land in a shared bucket with probability ``1 - (1 - J**rows)**bands``
+    for Jaccard similarity ``J``; 32 bands of 2 rows catch nearly every pair
+    above J = 0.3 while keeping unrelated names apart.
+    """
+
+    def __init__(self, bands: int = 32, rows: int = 2, seed: int = 1):
+        rng = random.Random(seed)
+        self.bands = bands
+        self.rows = rows
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(bands * rows)]
+
+    def signature(self, grams: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams] or [0]
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms)
+
+    def buckets(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        r = self.rows
+        return [(band,) + signature[band * r:(band + 1) * r] for band in range(self.bands)]
+
+
+@dataclass
+class DishRecord:
+    """One learned meal decomposition, as returned by the model, with its self-reported confidence."""
+
+    meal_name: str
+    restrictions: Tuple[str, ...]
+    estimated_calories: int
+    ingredient_list: List[str] = field(default_factory=list)
+    ingredient_calories: List[int] = field(default_factory=list)
+    source: str = ""
+    stored_at: float = 0.0
+    confidence: Optional[float] = None
+
+
+class _Entry:
+    __slots__ = ("record", "tokens", "covered", "grams", "signature", "by_token")
+
+    def __init__(self, record: DishRecord, hasher: MinHasher):
+        self.record = record
+        tokens, _ = dish_features(record.meal_name)
+        self.tokens = frozenset(tokens)
+        self.grams = shingles(tokens)
+        self.signature = hasher.signature(self.grams)
+        # Token -> index of the ingredient it names, for subtracting dropped ingredients.
+        self.by_token: Dict[str, int] = {}
+        for index, ingredient in enumerate(record.ingredient_list):
+            for token in ingredient_tokens(ingredient):
+                self.by_token.setdefault(token, index)
+        self.covered = self.tokens | frozenset(self.by_token)
+
+
+@dataclass
+class IndexMatch:
+    meal_name: str
+    estimated_calories: int
+    confidence: float
+    similarity: float
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+def _ingredient_amounts(record: DishRecord) -> List[Tuple[str, int]]:
+    """``(name, calories)`` for each priced ingredient, by whole name and by head noun ("brown rice" -> "rice")."""
+    amounts = []
+    for index, ingredient in enumerate(record.ingredient_list[:len(record.ingredient_calories)]):
+        tokens = ingredient_tokens(ingredient)
+        if tokens:
+            amounts.extend((name, record.ingredient_calories[index]) for name in {" ".join(tokens), tokens[-1]})
+    return amounts
+
+
+def _key(tokens: Iterable[str], restrictions: Iterable[str]) -> str:
+    return f"{' '.join(sorted(tokens))}|{','.join(sorted(restrictions))}"
+
+
+class NutritionIndex:
+    """Learned meal decompositions with a fuzzy lookup over names and ingredients.
+
+    Every accepted remote estimate that carries ``ingredient_list`` (and ideally
+    ``ingredient_calories``) is stored. ``lookup`` finds candidates through
+    MinHash buckets on the meal name and scores each one on name similarity,
+    how many of the query's words the candidate's name or ingredients cover,
+    and how many of the candidate's words the query lacks. Query words that
+    are known ingredients of other meals are added at their learned median
+    calories; candidate words that name one of its ingredients are subtracted.
+    A match is never more confident than the model was about the record.
+    Records persist to SQLite and the oldest are evicted past ``max_records``.
+    Persisted records are only read by ``load``. Writes are buffered and committed
+    together once ``flush_size`` are pending or ``flush_interval`` seconds have
+    passed; ``close`` flushes.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = DEFAULT_INDEX_PATH,
+        max_records: int = 20_000,
+        hasher: Optional[MinHasher] = None,
+        flush_size: int = 64,
+        flush_interval: float = 5.0,
+    ):
+        self.path = Path(path) if path else None
+        self.max_records = max(1, max_records)
+        self.hasher = hasher or MinHasher()
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, ...], Set[str]] = {}
+        self._ingredients: Dict[str, Deque[int]] = {}
+        # Ingredient name -> how many records name it; a name is dropped with its last record.
+        self._ingredient_refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        # Buffered disk work: records to write and evicted keys to delete.
+        self._writes: Dict[str, DishRecord] = {}
+        self._evicted: Set[str] = set()
+        self._last_flush = time.monotonic()
+        self.lookups = 0
+        self.matches = 0
+        self.learned = 0
+
+    @classmethod
+    def from_env(cls) -> "NutritionIndex":
+        raw_path = os.getenv("NUTRITION_INDEX_PATH", str(DEFAULT_INDEX_PATH))
+        return cls(
+            path=None if raw_path.lower() in {"", "off", "none", ":memory:"} else raw_path,
+            max_records=int(os.getenv("NUTRITION_INDEX_SIZE", 20_000)),
+            flush_interval=float(os.getenv("NUTRITION_INDEX_FLUSH_INTERVAL", 5.0)),
+        )
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dishes (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self) -> int:
+        """Read the persisted records into memory once; returns how many were added.
+
+        This blocks for about a second per 20k records, so the server runs it in a
+        worker thread. Until it finishes, lookups see only records learned since
+        startup, and those win over older persisted copies.
+        """
+        with self._lock:
+            if self._loaded or self._connection() is None:
+                self._loaded = True
+                return 0
+            self._loaded = True
+        # A separate connection and no lock while reading and hashing, so lookups are not held up.
+        conn = sqlite3.connect(str(self.path))
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM dishes ORDER BY stored_at DESC LIMIT ?", (self.max_records,)
+            ).fetchall()
+        finally:
+            conn.close()
+        loaded = []
+        for key, raw in rows:
+            data = json.loads(raw)
+            data["restrictions"] = tuple(data["restrictions"])
+            loaded.append((key, _Entry(DishRecord(**data), self.hasher)))
+
+        added = 0
+        with self._lock:
+            # Newest first, each moved to the front, so the order stays oldest to newest.
+            for key, entry in loaded:
+                if key in self._entries:
+                    continue
+                self._insert(key, entry.record, entry)
+                self._entries.move_to_end(key, last=False)
+                added += 1
+            self._evict()
+        return added
+
+    def _insert(self, key: str, record: DishRecord, entry: Optional[_Entry] = None) -> None:
+        self._remove(key)
+        entry = entry or _Entry(record, self.hasher)
+        self._entries[key] = entry
+        for bucket in self.hasher.buckets(entry.signature):
+            self._buckets.setdefault(bucket, set()).add(key)
+        for name, calories in _ingredient_amounts(record):
+            self._ingredients.setdefault(name, deque(maxlen=25)).append(calories)
+            self._ingredient_refs[name] = self._ingredient_refs.get(name, 0) + 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket in self.hasher.buckets(entry.signature):
+            keys = self._buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+        for name, calories in _ingredient_amounts(entry.record):
+            refs = self._ingredient_refs.get(name, 0) - 1
+            if refs > 0:
+                self._ingredient_refs[name] = refs
+                try:
+                    self._ingredients[name].remove(calories)
+                except ValueError:
+                    pass  # already pushed out of the bounded history
+            else:
+                self._ingredient_refs.pop(name, None)
+                self._ingredients.pop(name, None)
+
+    def learn(
+        self,
+        meal_name: str,
+        dietary_restrictions: Iterable[str],
+        estimate: Any,
+        source: str = "",
+        confidence: Optional[float] = None,
+    ) -> Optional[DishRecord]:
+        """Store an accepted remote estimate's ingredient decomposition; ignored when it has none."""
+        if not isinstance(estimate, dict):
+            return None
+        calories = estimate.get("estimated_calories")
+        ingredients = estimate.get("ingredient_list")
+        if not isinstance(calories, (int, float)) or isinstance(calories, bool) or calories <= 0:
+            return None
+        if not isinstance(ingredients, list) or not ingredients:
+            return None
+        amounts = estimate.get("ingredient_calories")
+        if not isinstance(amounts, list) or len(amounts) != len(ingredients):
+            amounts = []
+        try:
+            amounts = [int(round(float(a))) for a in amounts]
+        except (TypeError, ValueError):
+            amounts = []
+
+        tokens, markers = dish_features(meal_name)
+        if not tokens:
+            return None
+        restrictions = tuple(sorted({normalize_tag(r) for r in dietary_restrictions if r.strip()} | markers))
+        record = DishRecord(
+            meal_name=meal_name.strip(),
+            restrictions=restrictions,
+            estimated_calories=int(round(calories)),
+            ingredient_list=[str(i) for i in ingredients],
+            ingredient_calories=amounts,
+            source=source,
+            stored_at=time.time(),
+            confidence=confidence,
+        )
+        key = _key(tokens, restrictions)
+        with self._lock:
+            self._insert(key, record)
+            self.learned += 1
+            if self.path is not None:
+                self._writes[key] = record
+                self._evicted.discard(key)
+            self._evict()
+            self._maybe_flush()
+        return record
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_records:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            if self.path is not None:
+                self._writes.pop(oldest, None)
+                self._evicted.add(oldest)
+
+    def _maybe_flush(self) -> None:
+        pending = len(self._writes) + len(self._evicted)
+        if pending >= self.flush_size or (pending and time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush()
+
+    def flush(self) -> None:
+        """Write buffered records and evictions to disk now."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        writes, self._writes = self._writes, {}
+        evicted, self._evicted = self._evicted, set()
+        conn = self._connection()
+        if conn is None or not (writes or evicted):
+            return
+        conn.executemany(
+            "INSERT OR REPLACE INTO dishes (key, value, stored_at) VALUES (?, ?, ?)",
+            [(key, json.dumps(asdict(record)), record.stored_at) for key, record in writes.items()],
+        )
+        conn.executemany("DELETE FROM dishes WHERE key = ?", [(key,) for key in evicted])
+        conn.commit()
+
+    def _ingredient_calories(self, token: str) -> Optional[int]:
+        observed = self._ingredients.get(token)
+        return int(statistics.median(observed)) if observed else None
+
+    def _score(self, tokens: Tuple[str, ...], grams: FrozenSet[str], restrictions: Set[str], entry: _Entry):
+        record = entry.record
+        # A record only stands in for requests whose restrictions it was made to satisfy.
+        if not restrictions <= set(record.restrictions):
+            return None
+        shared = [t for t in tokens if t in entry.covered]
+        if not shared:
+            return None
+        calories = record.estimated_calories
+        added = []
+        for token in tokens:
+            if token not in entry.covered:
+                extra = self._ingredient_calories(token)
+                if extra is not None:
+                    added.append(token)
+                    calories += extra
+        removed, unresolved = [], 0
+        subtracted: Set[int] = set()
+        for token in entry.tokens - set(tokens):
+            index = entry.by_token.get(token)
+            if index is not None and index < len(record.ingredient_calories):
+                if index not in subtracted:
+                    subtracted.add(index)
+                    removed.append(record.ingredient_list[index])
+                    calories -= record.ingredient_calories[index]
+            else:
+                unresolved += 1
+
+        coverage = (len(shared) + 0.75 * len(added)) / len(tokens)
+        precision = 1.0 - unresolved / len(entry.tokens) if entry.tokens else 0.0
+        similarity = 0.4 * _jaccard(grams, entry.grams) + 0.4 * coverage + 0.2 * precision
+        confidence = similarity if restrictions == set(record.restrictions) else similarity * 0.85
+        if record.confidence is not None:
+            confidence = min(confidence, record.confidence)
+        return IndexMatch(
+            meal_name=record.meal_name,
+            estimated_calories=max(int(calories), record.estimated_calories // 3),
+            confidence=round(confidence, 3),
+            similarity=round(similarity, 3),
+            added=added,
+            removed=removed,
+        )
+
+    def lookup(self, meal_name: str, dietary_restrictions: Iterable[str] = ()) -> Optional[IndexMatch]:
+        """Best learned match for a meal, or None when nothing similar has been seen."""
+        tokens, markers = dish_features(meal_name)
+        restrictions = {normalize_tag(r) for r in dietary_restrictions if r.strip()} | markers
+        with self._lock:
+            self.lookups += 1
+            if not tokens or not self._entries:
+                return None
+            exact = self._entries.get(_key(tokens, restrictions))
+            if exact is not None:
+                self.matches += 1
+                record = exact.record
+                confidence = 1.0 if record.confidence is None else record.confidence
+                return IndexMatch(record.meal_name, record.estimated_calories, confidence, 1.0)
+
+            grams = shingles(tokens)
+            candidates: Set[str] = set()
+            for bucket in self.hasher.buckets(self.hasher.signature(grams)):
+                candidates.update(self._buckets.get(bucket, ()))
+            best = None
+            for key in candidates:
+                match = self._score(tokens, grams, restrictions, self._entries[key])
+                if match is not None and (best is None or match.confidence > best.confidence):
+                    best = match
+            if best is not None:
+                self.matches += 1
+            return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._ingredients.clear()
+            self._ingredient_refs.clear()
+            self._writes.clear()
+            self._evicted.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM dishes")
+                conn.commit()
+            self.lookups = self.matches = self.learned = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "records": len(self._entries),
+                "max_records": self.max_records,
+                "ingredients": len(self._ingredients),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "learned": self.learned,
+                "loaded": self._loaded,
+                "path": str(self.path) if self.path else None,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+nutrition_index = NutritionIndex.from_env()
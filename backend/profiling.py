@@ -0,0 +1,281 @@
+import asyncio
+import hmac
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from weakref import WeakSet
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+PROFILE_HEADER = b"x-profile"
+# Profiling on demand and the /debug/profiles routes need this value in the X-Profile header;
+# both are off while it is unset.
+profile_token: Optional[str] = os.getenv("PROFILE_TOKEN", "").strip() or None
+# Leaf-first: the first matching frame decides what a request sample was busy with.
+CATEGORIES = (
+    ("validation", ("/pydantic/", "/pydantic_core/")),
+    ("json", ("/json/", "json_stream.py")),
+)
+MAX_STACK_DEPTH = 64
+
+_LIBRARY_PREFIX = re.compile(r"^.*/(?:site-packages|lib/python\d[\d.]*)/")
+_labels: Dict[Any, str] = {}
+
+
+def record_span(name: str, seconds: float) -> None:
+    """Add ``seconds`` under ``name`` to the profile of the current request, if it is being profiled."""
+    profile = _active.get()
+    if profile is not None:
+        profile.add_span(name, seconds)
+
+
+def profile_token_matches(value: Optional[str | bytes], token: Optional[str] = None) -> bool:
+    """True when a profile token is configured and ``value`` equals it."""
+    token = token if token is not None else profile_token
+    if not token or not value:
+        return False
+    if isinstance(value, str):
+        value = value.encode("latin-1", "replace")
+    return hmac.compare_digest(value.strip(), token.encode())
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename.replace("\\", "/")
+        library = _LIBRARY_PREFIX.sub("", path)
+        path = library if library != path else "/".join(path.rsplit("/", 2)[-2:])
+        label = f"{code.co_name} ({path})".replace(";", ":")
+        _labels[code] = label
+    return label
+
+
+def _stack(frame) -> List[Any]:
+    codes = []
+    while frame is not None and len(codes) < MAX_STACK_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return codes
+
+
+class RequestProfile:
+    """Sampled call stacks and wait spans of one profiled request.
+
+    The event loop thread is sampled every ``interval`` seconds. Each sample
+    is attributed to the request's own tasks (split into validation, JSON,
+    app and framework time), to other tasks sharing the loop, to the loop
+    sitting idle while the request awaits I/O, or to loop bookkeeping.
+    """
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.profile_id = secrets.token_hex(6)
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.tasks: "WeakSet[asyncio.Task]" = WeakSet()
+        self.breakdown: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.spans: Dict[str, List[float]] = {}
+        self.samples = 0
+        self.longest_busy = 0.0
+        self._busy = 0.0
+
+    def add_span(self, name: str, seconds: float) -> None:
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+    def add_sample(self, frame, task: Optional[asyncio.Task], elapsed: float) -> None:
+        codes = _stack(frame)
+        if task is not None and task in self.tasks:
+            category = "framework"
+            for code in codes:
+                path = code.co_filename.replace("\\", "/")
+                match = next((name for name, markers in CATEGORIES if any(m in path for m in markers)), None)
+                if match is None and "/backend/" in path:
+                    match = "app"
+                if match is not None:
+                    category = match
+                    break
+            self._busy += elapsed
+            self.longest_busy = max(self.longest_busy, self._busy)
+        else:
+            self._busy = 0.0
+            if task is not None:
+                category = "other_tasks"
+            elif codes and codes[0].co_name in ("select", "poll") and codes[0].co_filename.endswith("selectors.py"):
+                category = "idle"
+            else:
+                category = "loop"
+        self.samples += 1
+        self.breakdown[category] += elapsed
+        self.stacks[";".join([category] + [_frame_label(code) for code in reversed(codes)])] += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_seconds * 1000, 2),
+            "samples": self.samples,
+        }
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "interval_ms": round(self.interval * 1000, 3),
+            "breakdown_ms": {name: round(s * 1000, 2) for name, s in self.breakdown.most_common()},
+            "longest_busy_ms": round(self.longest_busy * 1000, 2),
+            "spans": {
+                name: {"count": count, "total_ms": round(total * 1000, 2)}
+                for name, (count, total) in sorted(self.spans.items(), key=lambda item: -item[1][1])
+            },
+            "top_stacks": [{"stack": stack, "samples": n} for stack, n in self.stacks.most_common(top)],
+        }
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, profile: RequestProfile, loop: asyncio.AbstractEventLoop, thread_id: int):
+        super().__init__(name=f"profiler-{profile.profile_id}", daemon=True)
+        self.profile = profile
+        self.loop = loop
+        self.thread_id = thread_id
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self.stopped.wait(self.profile.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            task = asyncio.current_task(self.loop)
+            now = time.perf_counter()
+            self.profile.add_sample(frame, task, now - last)
+            last = now
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Make tasks created inside a profiled request count as part of that request."""
+    previous = loop.get_task_factory()
+    if getattr(previous, "profiled", False):
+        return
+
+    def factory(loop, coro, **kwargs):
+        task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+        profile = _active.get()
+        if profile is not None:
+            profile.tasks.add(task)
+        return task
+
+    factory.profiled = True  # type: ignore[attr-defined]
+    loop.set_task_factory(factory)
+
+
+class ProfileStore:
+    """The most recent ``max_profiles`` request profiles, by id."""
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max(1, max_profiles)
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles[profile.profile_id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self._profiles.values())]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling HTTP requests on demand.
+
+    A request is profiled when its ``X-Profile`` header matches
+    ``PROFILE_TOKEN`` (never while no token is set) or it is picked at
+    ``PROFILE_SAMPLE_RATE``. At
+    most ``PROFILE_MAX_ACTIVE`` requests are profiled at once. The response
+    carries ``X-Profile-Id``; the result is kept in ``profile_store``.
+    Unprofiled requests only pay for the header check.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: Optional[float] = None,
+        token: Optional[str] = None,
+        interval: Optional[float] = None,
+        max_active: Optional[int] = None,
+        store: Optional[ProfileStore] = None,
+    ):
+        self.app = app
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0")) if sample_rate is None else sample_rate
+        # None defers to the module's ``profile_token``.
+        self.token = token
+        self.interval = float(os.getenv("PROFILE_INTERVAL_MS", "2")) / 1000 if interval is None else interval
+        self.max_active = int(os.getenv("PROFILE_MAX_ACTIVE", "2")) if max_active is None else max_active
+        self.store = store if store is not None else profile_store
+        self.active = 0
+
+    def _wanted(self, scope) -> bool:
+        if scope["type"] != "http" or scope.get("path", "").startswith("/debug/profiles"):
+            return False
+        if self.token or profile_token:
+            for name, value in scope.get("headers") or ():
+                if name == PROFILE_HEADER and profile_token_matches(value, self.token):
+                    return True
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if not self._wanted(scope) or self.active >= self.max_active:
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        _install_task_factory(loop)
+        profile = RequestProfile(scope.get("method", ""), scope.get("path", ""), self.interval)
+        current = asyncio.current_task()
+        if current is not None:
+            profile.tasks.add(current)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.profile_id.encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = _Sampler(profile, loop, threading.get_ident())
+        token = _active.set(profile)
+        self.active += 1
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.wall_seconds = time.perf_counter() - start
+            sampler.stopped.set()
+            sampler.join()
+            self.active -= 1
+            _active.reset(token)
+            self.store.add(profile)
+
+
+profile_store = ProfileStore(int(os.getenv("PROFILE_KEEP", "50")))
@@ -0,0 +1,152 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+try:
+    from backend.metrics import registry
+except ImportError:
+    from metrics import registry  # type: ignore
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("ONBOARDING_PROMPT_TOKEN_BUDGET", "800"))
+PROMPT_TOP_HALLS = int(os.getenv("ONBOARDING_PROMPT_TOP_HALLS", "3"))
+PROMPT_MEALS_PER_HALL = int(os.getenv("ONBOARDING_PROMPT_MEALS_PER_HALL", "5"))
+
+PROMPT_TOKENS = registry.histogram(
+    "onboarding_prompt_tokens",
+    "Estimated tokens in onboarding summary prompts.",
+    buckets=(100, 200, 400, 800, 1600, 3200, 6400),
+)
+PROMPT_TRUNCATIONS = registry.counter(
+    "onboarding_prompt_truncations_total",
+    "Onboarding prompts that dropped meals or halls to fit the token budget.",
+)
+
+PROMPT_HEADER = """You are a campus dining assistant. Craft a concise, positive message for a student who just completed onboarding.
+
+Student: {profile}
+
+Top dining halls, best fit first (score; qualifying meals with estimated kcal):
+"""
+
+PROMPT_FOOTER = """
+Respond with a short block of text (2-3 paragraphs) that:
+1. Highlights the top dining hall choices and why they match the student's goals/preferences.
+2. Suggests at least one meal item that fits their diet from each top pick.
+3. Encourages them to explore the app further.
+"""
+
+OMITTED_NOTE = "({count} more qualifying meals not listed)"
+
+# Only the fields that make up the summary cache's profile bucket, so a cached
+# summary never mentions details specific to another student.
+PROFILE_FIELDS = ("goal", "dietary_preferences")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for prompt sizing."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class OnboardingPrompt:
+    text: str
+    tokens: int
+    halls: int
+    meals: int
+    omitted_meals: int
+    truncated: bool
+
+
+def _format_profile(user_profile: Dict[str, Any]) -> str:
+    parts = []
+    for name in PROFILE_FIELDS:
+        value = user_profile.get(name)
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value) or "none"
+        if value not in (None, ""):
+            parts.append(f"{name.replace('_', ' ')}={value}")
+    return "; ".join(parts) or "no details given"
+
+
+def _distinct_meals(meals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    seen = set()
+    distinct = []
+    for meal in meals:
+        key = meal["meal"].strip().lower()
+        if key not in seen:
+            seen.add(key)
+            distinct.append(meal)
+    return distinct
+
+
+def _meal_entry(meal: Dict[str, Any]) -> str:
+    calories = meal.get("calories")
+    return f"{meal['meal']} ({calories})" if calories is not None else meal["meal"]
+
+
+def build_onboarding_prompt(
+    user_profile: Dict[str, Any],
+    ranked_halls: List[Dict[str, Any]],
+    token_budget: int | None = None,
+    top_halls: int | None = None,
+    meals_per_hall: int | None = None,
+) -> OnboardingPrompt:
+    """Build a compact onboarding prompt from the ranked halls.
+
+    Only the ``top_halls`` best halls and at most ``meals_per_hall`` distinct
+    qualifying meals each are listed, one line per hall. Content is added in
+    rank order and menu order until ``token_budget`` is reached, so when the
+    budget is tight the lowest-ranked halls and the last meals of each hall
+    are the ones dropped. The header and footer are always kept, so a
+    budget smaller than them is exceeded rather than producing no prompt.
+    """
+    budget = token_budget or PROMPT_TOKEN_BUDGET
+    top = top_halls or PROMPT_TOP_HALLS
+    per_hall = meals_per_hall or PROMPT_MEALS_PER_HALL
+
+    header = PROMPT_HEADER.format(profile=_format_profile(user_profile))
+    # Reserve room for the "N more meals" note so it never pushes the prompt over budget.
+    used = estimate_tokens(header + PROMPT_FOOTER) + estimate_tokens(OMITTED_NOTE.format(count=9999))
+    lines: List[str] = []
+    meals_listed = 0
+    truncated = False
+    omitted = sum(len(_distinct_meals(hall.get("suggested_meals", []))) for hall in ranked_halls[top:])
+
+    for rank, hall in enumerate(ranked_halls[:top], start=1):
+        meals = _distinct_meals(hall.get("suggested_meals", []))
+        line = f"{rank}. {hall['dining_hall']} (score {hall['score']:.0f}):"
+        if used + estimate_tokens(line) > budget:
+            omitted += len(meals)
+            truncated = True
+            continue
+        kept = 0
+        for meal in meals[:per_hall]:
+            candidate = f"{line}{' ' if not kept else '; '}{_meal_entry(meal)}"
+            if used + estimate_tokens(candidate) > budget:
+                truncated = True
+                break
+            line = candidate
+            kept += 1
+        if not kept:
+            line += " no qualifying meals listed"
+        lines.append(line)
+        used += estimate_tokens(line)
+        meals_listed += kept
+        omitted += len(meals) - kept
+
+    halls_listed = len(lines)
+    if omitted:
+        lines.append(OMITTED_NOTE.format(count=omitted))
+    text = header + "\n".join(lines) + "\n" + PROMPT_FOOTER
+    prompt = OnboardingPrompt(
+        text=text,
+        tokens=estimate_tokens(text),
+        halls=halls_listed,
+        meals=meals_listed,
+        omitted_meals=omitted,
+        truncated=truncated,
+    )
+    PROMPT_TOKENS.observe(prompt.tokens)
+    if truncated:
+        PROMPT_TRUNCATIONS.inc()
+    return prompt
@@ -0,0 +1,297 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+try:
+    from backend.metrics import registry
+    from backend.profiling import record_span
+except ImportError:
+    from metrics import registry  # type: ignore
+    from profiling import record_span  # type: ignore
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# Lower rank is served first.
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1}
+
+_priority: ContextVar[str] = ContextVar("dedalus_priority", default=INTERACTIVE)
+_user: ContextVar[str] = ContextVar("dedalus_user", default="anonymous")
+_shared: ContextVar[Optional["SharedCall"]] = ContextVar("dedalus_shared_call", default=None)
+
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "dedalus_queue_wait_seconds",
+    "Time Dedalus calls waited in the scheduler queue, by priority.",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+@contextmanager
+def call_context(priority: str | None = None, user: str | None = None) -> Iterator[None]:
+    """Tag Dedalus calls made inside the block with a priority class and/or user."""
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}")
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if user is not None:
+        tokens.append((_user, _user.set(user)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class SharedCall:
+    """Priority and user for Dedalus calls made on behalf of several coalesced callers.
+
+    It starts with the first caller's ``call_context``. ``join`` raises it to
+    a later caller's priority when that is higher, moving any call already
+    queued under the old priority, so a waiting interactive request is never
+    held behind a background warm-up it shares a call with. It never lowers.
+    """
+
+    __slots__ = ("priority", "user", "queued")
+
+    def __init__(self):
+        self.priority = _priority.get()
+        self.user = _user.get()
+        self.queued: Dict["_Waiter", "DedalusScheduler"] = {}
+
+    def join(self) -> None:
+        priority = _priority.get()
+        if PRIORITIES[priority] >= PRIORITIES[self.priority]:
+            return
+        self.priority, self.user = priority, _user.get()
+        for waiter, scheduler in list(self.queued.items()):
+            scheduler._requeue(waiter, self.priority, self.user)
+
+
+@contextmanager
+def shared_call(call: SharedCall) -> Iterator[None]:
+    """Make slots taken inside the block (without an explicit priority or user) follow ``call``."""
+    token = _shared.set(call)
+    try:
+        yield
+    finally:
+        _shared.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("future", "priority", "user", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, priority: str, user: str):
+        self.future = future
+        self.priority = priority
+        self.user = user
+        self.enqueued_at = time.monotonic()
+
+
+class DedalusScheduler:
+    """Admits outbound Dedalus calls under a token-bucket rate and a concurrency cap.
+
+    Waiting calls are queued per priority class and, within a class, per user.
+    A free slot goes to the highest-priority class with waiters, and users in
+    that class are served round-robin, so one user's burst cannot push
+    everyone else to the back of the queue. ``rate_per_second`` of 0 disables
+    the rate limit.
+    """
+
+    def __init__(self, rate_per_second: float = 0.0, burst: float | None = None, max_concurrency: int = 16):
+        self.rate = max(0.0, rate_per_second)
+        self.burst = max(1.0, burst if burst is not None else self.rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._active = 0
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._depth = dict.fromkeys(PRIORITIES, 0)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        self._wait_total = dict.fromkeys(PRIORITIES, 0.0)
+        self._wait_max = dict.fromkeys(PRIORITIES, 0.0)
+
+    @classmethod
+    def from_env(cls) -> "DedalusScheduler":
+        rate = float(os.getenv("DEDALUS_RATE_PER_SECOND", "0"))
+        burst = os.getenv("DEDALUS_RATE_BURST")
+        return cls(
+            rate_per_second=rate,
+            burst=float(burst) if burst else None,
+            max_concurrency=int(os.getenv("DEDALUS_MAX_CONCURRENCY", "16")),
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_start(self) -> bool:
+        return self._active < self.max_concurrency and (not self.rate or self._tokens >= 1)
+
+    def _queued(self) -> int:
+        return sum(self._depth.values())
+
+    def _start(self, priority: str, waited: float) -> None:
+        self._active += 1
+        if self.rate:
+            self._tokens -= 1
+        self.admitted[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        QUEUE_WAIT_SECONDS.observe(waited, priority=priority)
+
+    def _pop_next(self) -> Optional[_Waiter]:
+        for priority in sorted(PRIORITIES, key=PRIORITIES.get):
+            users = self._queues[priority]
+            while users:
+                user, waiters = next(iter(users.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                self._depth[priority] -= 1
+                if not waiter.future.done():
+                    return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._queued() and self._active < self.max_concurrency:
+            if self.rate and self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                self._timer_loop = asyncio.get_running_loop()
+                self._timer = self._timer_loop.call_later(delay, self._dispatch)
+                return
+            waiter = self._pop_next()
+            if waiter is None:
+                return
+            self._start(waiter.priority, time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    async def acquire(self, priority: str | None = None, user: str | None = None) -> None:
+        """Wait for a slot; defaults to the priority and user of the current ``call_context``
+        or, inside ``shared_call``, of that call."""
+        shared = _shared.get() if priority is None and user is None else None
+        if shared is not None:
+            priority, user = shared.priority, shared.user
+        priority = priority or _priority.get()
+        user = user or _user.get()
+        self._refill()
+        if not self._queued() and self._can_start():
+            self._start(priority, 0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), priority, user)
+        self._queues[priority].setdefault(user, deque()).append(waiter)
+        self._depth[priority] += 1
+        if shared is not None:
+            shared.queued[waiter] = self
+        self._kick()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as we were cancelled; hand it on.
+                self.release()
+            else:
+                self._forget(waiter)
+            raise
+        finally:
+            if shared is not None:
+                shared.queued.pop(waiter, None)
+
+    def _requeue(self, waiter: _Waiter, priority: str, user: str) -> None:
+        waiters = self._queues[waiter.priority].get(waiter.user)
+        if waiter.future.done() or not waiters or waiter not in waiters:
+            return
+        self._forget(waiter)
+        waiter.priority, waiter.user = priority, user
+        self._queues[priority].setdefault(user, deque()).append(waiter)
+        self._depth[priority] += 1
+        self._kick()
+
+    def _forget(self, waiter: _Waiter) -> None:
+        waiters = self._queues[waiter.priority].get(waiter.user)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._depth[waiter.priority] -= 1
+            if not waiters:
+                del self._queues[waiter.priority][waiter.user]
+
+    def release(self) -> None:
+        self._active -= 1
+        if self._queued():
+            self._kick()
+
+    def _kick(self) -> None:
+        """Dispatch now unless a refill timer on this loop will do it."""
+        if self._timer is not None and self._timer_loop is asyncio.get_running_loop():
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None = None, user: str | None = None) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        await self.acquire(priority, user)
+        acquired = time.perf_counter()
+        record_span("dedalus_queue", acquired - start)
+        try:
+            yield
+        finally:
+            self.release()
+            record_span("dedalus_call", time.perf_counter() - acquired)
+
+    def queue_depth(self) -> Dict[str, int]:
+        return dict(self._depth)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.rate or None,
+            "tokens": round(self._tokens, 2) if self.rate else None,
+            "queue_depth": self.queue_depth(),
+            "admitted": dict(self.admitted),
+            "mean_wait_seconds": {
+                p: self._wait_total[p] / self.admitted[p] if self.admitted[p] else 0.0 for p in PRIORITIES
+            },
+            "max_wait_seconds": dict(self._wait_max),
+        }
+
+
+class SchedulerContextMiddleware:
+    """ASGI middleware tagging each request's Dedalus calls with its user for fair queueing.
+
+    The user is the ``X-User-Id`` header when present, else the client address.
+    WebSocket connections are tagged the same way for their whole lifetime.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        user = headers.get(b"x-user-id", b"").decode("latin-1").strip()
+        if not user:
+            client = scope.get("client")
+            user = client[0] if client else "anonymous"
+        with call_context(priority=INTERACTIVE, user=user):
+            await self.app(scope, receive, send)
+
+
+scheduler = DedalusScheduler.from_env()
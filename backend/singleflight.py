@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+try:
+    from backend.scheduler import SharedCall, shared_call
+except ImportError:
+    from scheduler import SharedCall, shared_call  # type: ignore
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "call")
+
+    def __init__(self, call: SharedCall):
+        self.call = call
+        self.task: Optional["asyncio.Future[Any]"] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task. Every waiter sees the same result or
+    exception. A cancelled waiter only detaches itself; the shared task is
+    cancelled once its last waiter has gone.
+
+    The task runs in the first caller's context, but its Dedalus calls are
+    scheduled as a ``SharedCall``: each joining caller can raise their
+    priority to its own, so an interactive caller never waits at the
+    priority or in the fairness queue of a background caller it joined.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(SharedCall())
+            flight.task = asyncio.ensure_future(self._run(flight.call, fn))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, k=key, f=flight: self._forget(k, f))
+        else:
+            self.coalesced += 1
+            flight.call.join()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                # Callers arriving before the done callback runs must start afresh, not join a dying task.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    @staticmethod
+    async def _run(call: SharedCall, fn: Callable[[], Awaitable[T]]) -> T:
+        with shared_call(call):
+            return await fn()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception as retrieved even if every waiter has left.
+            flight.task.exception()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
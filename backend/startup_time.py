@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BACKEND_DIR.parent
+
+# Runs in a fresh interpreter: import the app, run its lifespan, answer one request.
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from backend.main import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+with TestClient(app) as client:
+    t3 = time.perf_counter()
+    client.post("/calories/batch", json={"meals": []})
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t3 - t2) * 1000,
+    "first_request_ms": (t4 - t3) * 1000,
+    "sdk_loaded": "dedalus_labs" in sys.modules,
+}))
+"""
+
+
+def measure(fast_start: bool, snapshot: Path) -> Dict[str, float]:
+    env = dict(os.environ, FAST_START="1" if fast_start else "0", WARM_STATE_PATH=str(snapshot))
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    wall = (time.perf_counter() - start) * 1000
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_ms"] = wall
+    return result
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    keys = ("import_ms", "lifespan_ms", "first_request_ms", "process_ms")
+    summary = {key: round(statistics.median(s[key] for s in samples), 1) for key in keys}
+    summary["sdk_loaded"] = any(s["sdk_loaded"] for s in samples)
+    return summary
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start time with and without FAST_START.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode (median is reported)")
+    parser.add_argument("--snapshot", type=Path, help="Warm-state snapshot to use (default: a temporary file)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = args.snapshot or Path(tmp) / "warm_state.pickle"
+        # One untimed fast-start run writes the snapshot the timed runs will load.
+        measure(True, snapshot)
+        results = {
+            "default": summarize([measure(False, snapshot) for _ in range(args.runs)]),
+            "fast_start": summarize([measure(True, snapshot) for _ in range(args.runs)]),
+        }
+
+    print(f"{'mode':<12}{'import':>10}{'lifespan':>10}{'1st req':>10}{'process':>10}  sdk loaded")
+    for mode, row in results.items():
+        print(
+            f"{mode:<12}{row['import_ms']:>10}{row['lifespan_ms']:>10}{row['first_request_ms']:>10}"
+            f"{row['process_ms']:>10}  {row['sdk_loaded']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+try:
+    from backend.estimate_cache import BACKEND_DIR, EstimateCache
+except ImportError:
+    from estimate_cache import BACKEND_DIR, EstimateCache  # type: ignore
+
+DEFAULT_SUMMARY_CACHE_PATH = BACKEND_DIR / ".cache" / "onboarding_summaries.sqlite3"
+
+
+def menu_hash(dining_halls: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Content hash of a menu snapshot, independent of hall, meal and tag ordering."""
+    canonical = sorted(
+        (
+            hall.strip().lower(),
+            sorted(
+                (meal["meal"].strip().lower(), sorted({t.strip().lower() for t in meal.get("dietary", [])}))
+                for meal in meals
+            ),
+        )
+        for hall, meals in dining_halls.items()
+    )
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def profile_bucket(user_profile: Dict[str, Any]) -> str:
+    """Goal plus sorted dietary preferences; exact age and weight are left out on purpose."""
+    goal = str(user_profile.get("goal") or "maintain weight").strip().lower()
+    prefs = sorted({p.strip().lower() for p in user_profile.get("dietary_preferences", []) if p.strip()})
+    return f"{goal}|{','.join(prefs)}"
+
+
+class SummaryCache:
+    """Onboarding summaries keyed on ``menu hash | profile bucket``.
+
+    The menu hash is a content hash, so a changed menu gets new keys and never
+    serves stale text; summaries for menus no longer in use simply age out of
+    the store's LRU and TTL.
+    """
+
+    def __init__(self, store: EstimateCache):
+        self.store = store
+
+    @classmethod
+    def from_env(cls) -> "SummaryCache":
+        """Create a cache configured from ``SUMMARY_CACHE_*`` environment variables."""
+        raw_path = os.getenv("SUMMARY_CACHE_PATH", str(DEFAULT_SUMMARY_CACHE_PATH))
+        path = None if raw_path.lower() in {"", "off", "none", ":memory:"} else raw_path
+        store = EstimateCache(
+            path=path,
+            ttl_seconds=float(os.getenv("SUMMARY_CACHE_TTL", 24 * 3600)),
+            max_memory_entries=int(os.getenv("SUMMARY_CACHE_MEMORY_SIZE", 512)),
+            max_disk_entries=int(os.getenv("SUMMARY_CACHE_DISK_SIZE", 5_000)),
+        )
+        return cls(store)
+
+    def key(self, dining_halls: Dict[str, List[Dict[str, Any]]], user_profile: Dict[str, Any]) -> str:
+        return self.key_for_menu(menu_hash(dining_halls), user_profile)
+
+    def key_for_menu(self, menu: str, user_profile: Dict[str, Any]) -> str:
+        """Like ``key`` for a menu whose hash is already known."""
+        return f"{menu}|{profile_bucket(user_profile)}"
+
+    def get(self, key: str) -> Optional[str]:
+        return self.store.get(key)
+
+    def set(self, key: str, summary: str) -> None:
+        self.store.set(key, summary)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
+
+summary_cache = SummaryCache.from_env()
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import admission
+from backend.admission import AdmissionLimiter, Shed
+from backend.main import app
+
+client = TestClient(app)
+
+
+def test_limiter_queues_then_sheds_and_hands_slots_over():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_in_flight=1, max_queue=1, queue_timeout=1.0, degrade=False)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth() == 1
+
+        with pytest.raises(Shed) as full:
+            await limiter.acquire()
+        assert full.value.reason == "queue_full" and full.value.retry_after >= 1
+
+        limiter.release(0.5)
+        await queued
+        assert (limiter.active, limiter.queue_depth(), limiter.admitted) == (1, 0, 2)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.rejected == {"queue_full": 1, "queue_timeout": 0}
+
+
+def test_queue_wait_times_out():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_in_flight=1, max_queue=4, queue_timeout=0.01, degrade=False)
+        await limiter.acquire()
+        with pytest.raises(Shed) as timed_out:
+            await limiter.acquire()
+        return limiter, timed_out.value
+
+    limiter, shed = asyncio.run(scenario())
+    assert shed.reason == "queue_timeout"
+    assert limiter.queue_depth() == 0
+
+
+def _saturated(degrade: bool) -> AdmissionLimiter:
+    limiter = AdmissionLimiter("calories", max_in_flight=1, max_queue=0, queue_timeout=1.0, degrade=degrade)
+    limiter.active = 1
+    return limiter
+
+
+def test_saturated_endpoint_rejects_fast_with_retry_after(monkeypatch):
+    monkeypatch.setitem(admission.admission_limiters, "calories", _saturated(degrade=False))
+    resp = client.post("/calories", json={"meal_name": "Unheard Of Dish"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+
+
+def test_degraded_mode_serves_local_estimates(monkeypatch):
+    monkeypatch.setitem(admission.admission_limiters, "calories", _saturated(degrade=True))
+    resp = client.post("/calories", json={"meal_name": "Unheard Of Dish"})
+    assert resp.status_code == 200
+    assert resp.json()["source"] == "local" and resp.json()["tier"] == "local"
+    assert admission.admission_limiters["calories"].degraded == 1
@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+from backend import assistant
+
+
+HALLS = {
+    "John Jay": [
+        {"meal": "Vegan Tofu Bowl", "dietary": ["vegan"]},
+        {"meal": "Tofu Stir Fry", "dietary": ["vegan"]},
+    ],
+    "Ferris Booth": [
+        {"meal": "Lentil Soup", "dietary": ["vegan"]},
+        {"meal": "Beef Burger", "dietary": []},
+    ],
+}
+PROFILE = {"dietary_preferences": ["vegan"], "goal": "Build Muscle"}
+
+
+async def empty_batch(meals, **_):
+    return [None] * len(meals)
+
+
+def test_score_dining_halls_runs_meals_concurrently(monkeypatch):
+    """Total latency tracks the slowest call, not the sum of calls."""
+    calls = {"active": 0, "peak": 0}
+    calories = {"Vegan Tofu Bowl": 400, "Tofu Stir Fry": 500, "Lentil Soup": 300}
+
+    async def fake_estimator(meal_name, restrictions):
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        await asyncio.sleep(0.2)
+        calls["active"] -= 1
+        return {"estimated_calories": calories[meal_name]}
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator", fake_estimator)
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", empty_batch)
+
+    start = time.perf_counter()
+    ranked = asyncio.run(assistant.score_dining_halls(HALLS, PROFILE, concurrency=2))
+    elapsed = time.perf_counter() - start
+
+    assert calls["peak"] == 2
+    assert elapsed < 0.5
+    assert [hall["dining_hall"] for hall in ranked] == ["John Jay", "Ferris Booth"]
+    assert [m["meal"] for m in ranked[0]["suggested_meals"]] == ["Vegan Tofu Bowl", "Tofu Stir Fry"]
+
+
+def test_score_dining_halls_isolates_per_meal_failures(monkeypatch):
+    """A failing remote estimate falls back locally instead of failing the batch."""
+
+    async def flaky_estimator(meal_name, restrictions):
+        if meal_name == "Tofu Stir Fry":
+            raise RuntimeError("upstream exploded")
+        return {"estimated_calories": 350}
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator", flaky_estimator)
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", empty_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(HALLS, PROFILE))
+    john_jay = next(hall for hall in ranked if hall["dining_hall"] == "John Jay")
+    assert [m["meal"] for m in john_jay["suggested_meals"]] == ["Vegan Tofu Bowl", "Tofu Stir Fry"]
+
+
+def test_score_dining_halls_prefers_batch_estimates(monkeypatch):
+    """Qualifying meals are estimated in one batch; only gaps fall back to single calls."""
+    batches = []
+    singles = []
+
+    async def fake_batch(meals, **_):
+        batches.append([name for name, _ in meals])
+        return [None if name == "Lentil Soup" else {"estimated_calories": 450} for name, _ in meals]
+
+    async def fake_estimator(meal_name, restrictions):
+        singles.append(meal_name)
+        return {"estimated_calories": 250}
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator", fake_estimator)
+
+    ranked = asyncio.run(assistant.score_dining_halls(HALLS, PROFILE))
+
+    # "Beef Burger" is not vegan, so the tag index drops it before any estimate.
+    assert batches == [["Vegan Tofu Bowl", "Tofu Stir Fry", "Lentil Soup"]]
+    assert singles == ["Lentil Soup"]
+    assert ranked[0]["score"] == 900.0
+
+
+def test_top_k_ranking_skips_remote_estimates_for_hopeless_halls(monkeypatch):
+    halls = {
+        "Big Plates": [{"meal": "Loaded Beef Burger", "dietary": []}, {"meal": "Pasta Alfredo", "dietary": []}],
+        "Mid": [{"meal": "Chicken Burrito", "dietary": []}],
+        "Snacks": [{"meal": "Side Salad", "dietary": []}],
+    }
+    requested = []
+
+    async def fake_batch(meals, **_):
+        requested.extend(name for name, _ in meals)
+        return [{"estimated_calories": 900} for _ in meals]
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(halls, {"goal": "Build Muscle"}, top_k=1))
+
+    assert requested == ["Loaded Beef Burger", "Pasta Alfredo"]
+    assert ranked[0]["dining_hall"] == "Big Plates"
+    assert ranked[0]["score"] == 1800 and ranked[0]["approximate"] is False
+    for hall in ranked[1:]:
+        assert hall["approximate"] is True
+        assert hall["score_low"] <= hall["score"] <= hall["score_high"] < 1800
+        assert all(meal["source"] == "local" for meal in hall["suggested_meals"])
+
+
+def test_top_k_refines_again_when_remote_estimate_breaks_local_bounds(monkeypatch):
+    halls = {
+        "Big Plates": [{"meal": "Loaded Beef Burger", "dietary": []}],
+        "Snacks": [{"meal": "Side Salad", "dietary": []}],
+    }
+
+    async def fake_batch(meals, **_):
+        # The burger turns out far lighter than its local range allows.
+        return [{"estimated_calories": 50 if "Burger" in name else 400} for name, _ in meals]
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(halls, {"goal": "Build Muscle"}, top_k=1))
+
+    assert [(h["dining_hall"], h["score"], h["approximate"]) for h in ranked] == [
+        ("Snacks", 400.0, False),
+        ("Big Plates", 50.0, False),
+    ]
+
+
+def test_top_k_stops_refining_once_the_deadline_has_passed(monkeypatch):
+    halls = {
+        "Big Plates": [{"meal": "Loaded Beef Burger", "dietary": []}],
+        "Snacks": [{"meal": "Side Salad", "dietary": []}],
+    }
+    requested = []
+
+    async def slow_batch(meals, **_):
+        requested.extend(name for name, _ in meals)
+        # Answers in time, but the budget is gone by the time it is scored.
+        time.sleep(0.03)
+        return [{"estimated_calories": 50 if "Burger" in name else 400} for name, _ in meals]
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", slow_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(halls, {"goal": "Build Muscle"}, budget=0.02, top_k=1))
+
+    assert requested == ["Loaded Beef Burger"]
+    snacks = next(h for h in ranked if h["dining_hall"] == "Snacks")
+    assert snacks["approximate"] is True
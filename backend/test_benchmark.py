@@ -0,0 +1,63 @@
+import asyncio
+import math
+
+from backend import dedalus_runner
+from backend.benchmark import Scenario, compare, run_benchmark, run_cascade_benchmark, run_index_benchmark
+from backend.cascade import CascadePolicy
+from backend.estimate_cache import EstimateCache
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+
+FAST = LatencyProfile(kind="constant", median=0.0)
+
+
+def test_fake_runner_serves_single_and_batch_estimates(monkeypatch):
+    monkeypatch.setattr(dedalus_runner, "calorie_cache", EstimateCache(path=None))
+    # Large model only, so the single estimate reaches the fake runner.
+    monkeypatch.setattr(dedalus_runner, "cascade_policy", CascadePolicy(local_confidence=math.inf, fast_model=None))
+
+    async def scenario():
+        single = await dedalus_runner.run_dedalus_calorie_estimator("Tofu Bowl", ["vegan"])
+        batch = await dedalus_runner.run_dedalus_calorie_estimator_batch([("Tofu Bowl", []), ("Beef Burger", [])])
+        return single, batch
+
+    with use_fake_dedalus(FakeDedalusRunner(latency=FAST)) as runner:
+        single, batch = asyncio.run(scenario())
+
+    assert single["estimated_calories"] > 0
+    assert [item["meal_name"] for item in batch] == ["Tofu Bowl", "Beef Burger"]
+    assert runner.calls == 2
+
+
+def test_run_benchmark_reports_every_scenario():
+    scenarios = [Scenario("calories", 6, 3), Scenario("onboarding", 2, 2, halls=2, meals_per_hall=3)]
+    report = asyncio.run(run_benchmark(scenarios, FAST, trace_memory=False))
+
+    assert [s["name"] for s in report["scenarios"]] == ["calories", "onboarding"]
+    assert all(s["errors"] == 0 and s["upstream_calls"] > 0 for s in report["scenarios"])
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {"scenarios": [{"name": "calories", "p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "throughput_rps": 100}]}
+    report = {"scenarios": [{"name": "calories", "p50_ms": 11, "p95_ms": 40, "p99_ms": 30, "throughput_rps": 50}]}
+
+    regressions = compare(report, baseline, tolerance=0.2)
+
+    assert regressions == ["calories p95_ms: 20 -> 40", "calories throughput_rps: 100 -> 50"]
+
+
+def test_cascade_benchmark_prices_each_policy():
+    results = asyncio.run(run_cascade_benchmark(20, FAST, FAST))
+
+    by_policy = {r["policy"]: r for r in results}
+    assert set(by_policy) == {"large-only", "fast-then-large", "cascade", "cascade+index"}
+    assert by_policy["large-only"]["tiers"] == {"large": 20}
+    assert by_policy["cascade"]["cost_usd_per_1k_estimates"] < by_policy["large-only"]["cost_usd_per_1k_estimates"]
+    assert by_policy["cascade+index"]["cost_usd_per_1k_estimates"] <= by_policy["cascade"]["cost_usd_per_1k_estimates"]
+
+
+def test_index_benchmark_resolves_near_duplicates_only():
+    result = run_index_benchmark(filler=200, lookups=200)
+
+    assert result["hit_rate"] > 0.5
+    assert result["false_hit_rate"] < 0.1
+    assert 0 < result["lookup_p50_us"] <= result["lookup_p95_us"]
@@ -0,0 +1,37 @@
+from backend import calorie_estimator
+from backend.calorie_estimator import (
+    local_calorie_estimate,
+    local_calorie_estimate_batch,
+    local_calorie_range,
+)
+
+
+def test_local_estimate_is_deterministic_and_bounded():
+    first = local_calorie_range("Vegan Tofu Bowl", ["vegan"])
+    assert first == local_calorie_range("Vegan Tofu Bowl", ["vegan"])
+    assert first["low"] <= first["estimated_calories"] <= first["high"]
+    assert local_calorie_estimate("Vegan Tofu Bowl", ["vegan"]) == first["estimated_calories"]
+
+
+def test_all_matched_terms_contribute():
+    """Components add to the dish range instead of stopping at the first match."""
+    salad = local_calorie_range("Salad")
+    chicken_salad = local_calorie_range("Crispy Chicken Caesar Salad")
+    assert chicken_salad["matched_terms"] == ["crispy", "chicken", "caesar", "salad"]
+    assert chicken_salad["low"] > salad["low"]
+    assert chicken_salad["confidence"] > local_calorie_range("Mystery Meal")["confidence"]
+
+
+def test_multi_word_keywords_win_over_their_parts():
+    assert local_calorie_range("Vegetable Fried Rice")["matched_terms"] == ["vegetable", "fried rice"]
+
+
+def test_batch_matches_single_estimates(monkeypatch):
+    names = ["Vegan Tofu Bowl", "Double Bacon Cheeseburger", "Mystery Meal", "Grilled Chicken"] * 25
+    batch = local_calorie_estimate_batch(names, ["gluten-free"])
+    expected = [local_calorie_range(name, ["gluten-free"]) for name in names]
+    for key in ("estimated_calories", "low", "high", "confidence"):
+        assert batch[key] == [e[key] for e in expected]
+
+    monkeypatch.setattr(calorie_estimator, "np", None)
+    assert local_calorie_estimate_batch(names, ["gluten-free"]) == batch
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from backend import dedalus_runner
+from backend.calorie_estimator import local_calorie_range
+from backend.cascade import CascadePolicy, local_confidence, reported_confidence
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+
+FAST = LatencyProfile(kind="constant", median=0.0)
+POLICY = CascadePolicy(local_confidence=0.75, fast_model="small", fast_confidence=0.7, large_model="large")
+
+
+def _estimate(meal, outputs, monkeypatch):
+    monkeypatch.setattr(dedalus_runner, "cascade_policy", POLICY)
+    runner = FakeDedalusRunner(latency=FAST, outputs=outputs)
+    with use_fake_dedalus(runner):
+        result = asyncio.run(dedalus_runner.run_dedalus_calorie_estimator(meal, []))
+    return result, runner.calls_by_model
+
+
+def test_confident_local_estimate_skips_the_models(monkeypatch):
+    result, calls = _estimate("Beef Burger", lambda *_: "unused", monkeypatch)
+    assert result["tier"] == "local"
+    assert calls == {}
+
+
+def test_wide_local_range_is_not_trusted_despite_keyword_matches(monkeypatch):
+    # Dish and component both match, but 350-800 kcal is too rough to answer with.
+    assert local_confidence(local_calorie_range("Chicken Caesar Salad")) < POLICY.local_confidence
+    result, calls = _estimate(
+        "Chicken Caesar Salad", lambda *_: json.dumps({"estimated_calories": 470, "confidence": 0.9}), monkeypatch
+    )
+    assert result["tier"] == "fast"
+    assert calls == {"small": 1}
+
+
+def test_confident_fast_answer_is_kept(monkeypatch):
+    result, calls = _estimate(
+        "Shakshuka", lambda _, model: json.dumps({"estimated_calories": 420, "confidence": 0.9}), monkeypatch
+    )
+    assert result == {"estimated_calories": 420, "confidence": 0.9, "tier": "fast"}
+    assert calls == {"small": 1}
+
+
+def test_low_confidence_or_unparseable_fast_answers_escalate(monkeypatch):
+    def outputs(_, model):
+        if model == "small":
+            return '{"estimated_calories": 300, "confidence": "low"}'
+        return '{"estimated_calories": 510, "confidence": 0.8}'
+
+    result, calls = _estimate("Shakshuka", outputs, monkeypatch)
+    assert (result["estimated_calories"], result["tier"]) == (510, "large")
+    assert calls == {"small": 1, "large": 1}
+
+    result, calls = _estimate(
+        "Bibimbap", lambda _, model: "no json" if model == "small" else '{"estimated_calories": 600}', monkeypatch
+    )
+    assert (result["estimated_calories"], result["tier"]) == (600, "large")
+
+
+def test_reported_confidence_normalizes_common_forms():
+    assert [reported_confidence(v) for v in (0.8, "85%", 90, "high", "unsure", None, True)] == [
+        0.8, 0.85, 0.9, 0.9, None, None, None,
+    ]
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from backend import dedalus_runner
+from backend.cascade import CascadePolicy
+from backend.cassette import RECORD, REPLAY, Cassette, CassetteMiss, DedalusTransport
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+
+FAST = LatencyProfile(kind="constant", median=0.01)
+LARGE_ONLY = CascadePolicy(index_confidence=float("inf"), local_confidence=float("inf"), fast_model=None)
+
+
+async def _workload():
+    estimate = await dedalus_runner.run_dedalus_calorie_estimator("Shakshuka", ["vegetarian"])
+    research = await dedalus_runner.run_dedalus_research("Dining highlights")
+    streamed = [text async for text in dedalus_runner.stream_dedalus_research("Late night options")]
+    return estimate, research, "".join(streamed)
+
+
+def _run(runner, transport):
+    with use_fake_dedalus(runner, transport):
+        return asyncio.run(_workload())
+
+
+def test_recorded_calls_replay_without_the_runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedalus_runner, "cascade_policy", LARGE_ONLY)
+    path = tmp_path / "calls.jsonl.gz"
+    recorded = _run(FakeDedalusRunner(latency=FAST), DedalusTransport(RECORD, Cassette(path)))
+
+    cassette = Cassette.load(path)
+    assert len(cassette) == 3
+    estimate_call = cassette.entries[0]
+    # The estimator stops streaming once the calorie field arrives; the cut is recorded too.
+    assert estimate_call["complete"] is False and estimate_call["chunks"] >= 1
+    assert estimate_call["latency"] > 0
+
+    replay_runner = FakeDedalusRunner(error_rate=1.0)
+    transport = DedalusTransport(REPLAY, cassette)
+    assert _run(replay_runner, transport) == recorded
+    assert replay_runner.calls == 0
+    assert (transport.calls, transport.misses) == (3, 0)
+
+
+def test_unrecorded_calls_miss_and_latency_is_optional(tmp_path):
+    cassette = Cassette(tmp_path / "calls.jsonl")
+    transport = DedalusTransport(RECORD, cassette)
+
+    async def record():
+        runner = transport.wrap(FakeDedalusRunner(latency=LatencyProfile(kind="constant", median=0.05)))
+        await runner.run(input="hello", model="m")
+
+    asyncio.run(record())
+    cassette.save()
+
+    async def replay(latency):
+        runner = DedalusTransport(REPLAY, Cassette.load(cassette.path), replay_latency=latency).wrap(None)
+        start = time.perf_counter()
+        await runner.run(input="hello", model="m")
+        elapsed = time.perf_counter() - start
+        with pytest.raises(CassetteMiss):
+            await runner.run(input="hello", model="other")
+        return elapsed
+
+    assert asyncio.run(replay(False)) < 0.04
+    assert asyncio.run(replay(True)) >= 0.05
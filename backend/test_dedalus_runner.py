@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend import dedalus_runner
+from backend.estimate_cache import EstimateCache
+
+
+def test_chunk_meals_respects_token_budget():
+    """Large batches are split so each chunk stays within the token budget."""
+    meals = [(f"Meal number {i}", ["vegan"]) for i in range(50)]
+    chunks = dedalus_runner._chunk_meals(meals, token_budget=1000)
+    assert len(chunks) > 1
+    assert [i for chunk in chunks for i in chunk] == list(range(50))
+
+
+def test_parse_batch_output_tolerates_surrounding_text():
+    output = 'Here you go:\n```json\n[{"id": 0, "estimated_calories": 410}, "junk"]\n```'
+    assert dedalus_runner._parse_batch_output(output) == [{"id": 0, "estimated_calories": 410}]
+
+
+def test_cached_batch_only_sends_distinct_misses(monkeypatch):
+    """Cached meals and duplicates are not re-sent, and results are cached per meal."""
+    cache = EstimateCache(path=None)
+    cache.set(dedalus_runner.make_cache_key("Tofu Bowl", ["vegan"]), {"estimated_calories": 400})
+    monkeypatch.setattr(dedalus_runner, "calorie_cache", cache)
+    sent = []
+
+    async def fake_batch(meals, **_):
+        sent.extend(meals)
+        return [{"estimated_calories": 300 + i} for i in range(len(meals))]
+
+    monkeypatch.setattr(dedalus_runner, "run_dedalus_calorie_estimator_batch", fake_batch)
+
+    meals = [("Tofu Bowl", ["vegan"]), ("Lentil Soup", ["vegan"]), ("lentil soup", ["vegan"])]
+    results = asyncio.run(dedalus_runner.run_cached_calorie_estimator_batch(meals))
+
+    assert sent == [("Lentil Soup", ["vegan"])]
+    assert [r["estimated_calories"] for r in results] == [400, 300, 300]
+    assert cache.get(dedalus_runner.make_cache_key("Lentil Soup", ["vegan"])) == {"estimated_calories": 300}
+
+
+def test_batch_items_with_malformed_ids_fall_back_to_meal_names():
+    output = '[{"id": [0], "meal_name": "Tofu Bowl", "estimated_calories": 410}, {"id": {"n": 1}, "estimated_calories": 9}]'
+
+    class Runner:
+        async def run(self, **_):
+            return SimpleNamespace(final_output=output)
+
+    meals = [("Tofu Bowl", []), ("Beef Burger", [])]
+    estimates = asyncio.run(dedalus_runner._run_calorie_batch_chunk(Runner(), meals, [0, 1]))
+    assert estimates == {0: {"meal_name": "Tofu Bowl", "estimated_calories": 410}}
+
+
+def test_client_rebuilt_for_a_new_loop_leaves_the_old_loop_and_transport_alone(monkeypatch):
+    closed = []
+
+    class FakeClient:
+        async def close(self):
+            closed.append(self)
+
+    class FakeTransport:
+        mode = "passthrough"
+        closes = 0
+
+        def wrap(self, runner):
+            return runner
+
+        def close(self):
+            self.closes += 1
+
+    monkeypatch.setattr(dedalus_runner, "_load_sdk", lambda: True)
+    monkeypatch.setattr(dedalus_runner, "AsyncDedalus", FakeClient)
+    monkeypatch.setattr(dedalus_runner, "DedalusRunner", lambda client: SimpleNamespace(client=client))
+    monkeypatch.setattr(dedalus_runner, "DefaultAsyncHttpxClient", None)
+    pool = dedalus_runner.DedalusClientPool(transport=FakeTransport())
+
+    first = asyncio.run(pool.get_runner())
+    second = asyncio.run(pool.get_runner())
+    assert second.client is not first.client
+    assert closed == [] and pool.transport.closes == 0
+
+    asyncio.run(pool.close())
+    assert closed == [second.client] and pool.transport.closes == 1
@@ -0,0 +1,56 @@
+import time
+
+from backend.estimate_cache import EstimateCache, make_cache_key
+
+
+def test_cache_key_normalizes_name_and_restrictions():
+    """Equivalent meal names and restriction orderings share one key."""
+    a = make_cache_key("  Vegan Tofu-Bowl ", ["vegan", "Gluten-Free"])
+    b = make_cache_key("vegan tofu bowl", ["gluten-free", "vegan", "vegan"])
+    assert a == b
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """A fresh cache instance pointed at the same file serves earlier entries."""
+    path = tmp_path / "cache.sqlite3"
+    first = EstimateCache(path=path)
+    first.set("tofu|vegan", {"estimated_calories": 420})
+    first.close()
+
+    second = EstimateCache(path=path)
+    assert second.get("tofu|vegan") == {"estimated_calories": 420}
+    assert second.get("missing|") is None
+    stats = second.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_ttl_and_size_eviction(tmp_path, monkeypatch):
+    """Entries expire after the TTL and both tiers stay within their bounds."""
+    cache = EstimateCache(path=tmp_path / "cache.sqlite3", ttl_seconds=60, max_memory_entries=2, max_disk_entries=3)
+    for i in range(5):
+        cache.set(f"meal-{i}|", i)
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.stats()["pending_writes"] == 5
+    cache.flush()
+    assert cache.stats()["disk_entries"] == 3
+    assert cache.get("meal-0|") is None
+    assert cache.get("meal-4|") == 4
+
+    now = time.time()
+    monkeypatch.setattr("backend.estimate_cache.time.time", lambda: now + 120)
+    assert cache.get("meal-4|") is None
+
+
+def test_disk_writes_and_access_times_are_batched(tmp_path):
+    """Writes reach disk in one flush; until then they are served from the buffer."""
+    path = tmp_path / "cache.sqlite3"
+    cache = EstimateCache(path=path, max_memory_entries=1, flush_size=3, flush_interval=3600)
+    cache.set("a|", 1)
+    cache.set("b|", 2)
+    assert cache.get("a|") == 1
+    assert cache.stats()["pending_writes"] == 2  # stats() does not flush
+    assert EstimateCache(path=path).get("a|") is None
+
+    cache.set("c|", 3)
+    assert EstimateCache(path=path).get("a|") == 1
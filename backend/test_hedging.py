@@ -0,0 +1,86 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend import assistant, main
+from backend.hedging import Hedger, latency_budget
+
+HALLS = {"John Jay": [{"meal": "Vegan Tofu Bowl", "dietary": ["vegan"]}]}
+PROFILE = {"dietary_preferences": ["vegan"], "goal": "Build Muscle"}
+
+
+def test_latency_budget_reads_per_endpoint_env(monkeypatch):
+    monkeypatch.setenv("CALORIES_LATENCY_BUDGET_MS", "250")
+    monkeypatch.setenv("ONBOARDING_LATENCY_BUDGET_MS", "off")
+    assert latency_budget("calories") == 0.25
+    assert latency_budget("onboarding") is None
+
+
+def test_race_keeps_slow_call_running_in_background():
+    finished_calls = []
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        finished_calls.append("done")
+        return 1
+
+    async def scenario():
+        hedger = Hedger()
+        finished, result = await hedger.race(slow(), 0.01)
+        assert (finished, result) == (False, None)
+        assert hedger.stats()["background"] == 1
+        await asyncio.sleep(0.1)
+        return hedger.stats()
+
+    stats = asyncio.run(scenario())
+    assert finished_calls == ["done"]
+    assert stats == {"within_budget": 0, "budget_exceeded": 1, "background": 0}
+
+
+def test_slow_batch_serves_provisional_local_estimates(monkeypatch):
+    async def slow_batch(meals, **_):
+        await asyncio.sleep(0.2)
+        return [{"estimated_calories": 999}] * len(meals)
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", slow_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(HALLS, PROFILE, budget=0.01))
+
+    meal = ranked[0]["suggested_meals"][0]
+    assert meal["source"] == "local" and meal["provisional"] is True
+    assert meal["calories"] != 999
+
+
+def test_fast_batch_reports_dedalus_source(monkeypatch):
+    async def fast_batch(meals, **_):
+        return [{"estimated_calories": 640}] * len(meals)
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fast_batch)
+
+    ranked = asyncio.run(assistant.score_dining_halls(HALLS, PROFILE, budget=1.0))
+
+    meal = ranked[0]["suggested_meals"][0]
+    assert meal == {"meal": "Vegan Tofu Bowl", "calories": 640, "source": "dedalus", "provisional": False}
+
+
+def test_calories_endpoint_falls_back_when_budget_exceeded(monkeypatch):
+    async def slow_estimate(meal_name, restrictions):
+        await asyncio.sleep(0.2)
+        return {"estimated_calories": 999}
+
+    monkeypatch.setenv("CALORIES_LATENCY_BUDGET_MS", "10")
+    monkeypatch.setattr(main, "lookup_cached_calorie_estimate", lambda *_: None)
+    monkeypatch.setattr(main, "run_cached_calorie_estimator", slow_estimate)
+
+    resp = TestClient(main.app).post("/calories", json={"meal_name": "Tofu Bowl"})
+
+    body = resp.json()
+    assert resp.status_code == 200
+    # Same shape as a local-tier answer, plus the provisional flag.
+    assert body == {
+        "estimated_calories": body["estimated_calories"],
+        "source": "local",
+        "tier": "local",
+        "provisional": True,
+    }
+    assert body["estimated_calories"] != 999
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from backend import dedalus_runner
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+from backend.json_stream import JSONStreamParser, parse_json_tolerant
+
+FAST = LatencyProfile(kind="constant", median=0.001)
+
+
+def test_urls_inside_strings_survive_comment_stripping():
+    text = '{"estimated_calories": 500, // per serving\n "source": "https://example.com/recipe"}'
+    assert parse_json_tolerant(text) == {"estimated_calories": 500, "source": "https://example.com/recipe"}
+
+
+def test_fenced_output_with_block_comments_and_trailing_commas():
+    text = 'Sure!\n```json\n{/* note */ "estimated_calories": 620, "ingredient_list": ["rice", "beans",],}\n```'
+    assert parse_json_tolerant(text) == {"estimated_calories": 620, "ingredient_list": ["rice", "beans"]}
+
+
+def test_members_are_available_before_the_object_closes():
+    parser = JSONStreamParser()
+    for piece in ['{"estimated_', 'calories": 41', '0, "justifica', 'tion": "A long te']:
+        parser.feed(piece)
+    assert parser.fields == {"estimated_calories": 410}
+    assert not parser.done
+    # Truncated output still yields the completed members.
+    assert parser.result() == {"estimated_calories": 410}
+
+
+def test_truncated_array_keeps_complete_items():
+    assert parse_json_tolerant('[{"id": 0}, {"id": 1}, {"id"', start="[") == [{"id": 0}, {"id": 1}]
+
+
+def test_remote_estimate_stops_streaming_once_calories_arrive():
+    justification = "x" * 2000
+    output = json.dumps({"estimated_calories": 480, "ingredient_list": ["tofu"], "justification": justification})
+    runner = FakeDedalusRunner(latency=FAST, outputs=lambda *_: output, chunk_size=8)
+    received = []
+    original_stream = runner._stream
+
+    async def counting_stream(*args):
+        async for chunk in original_stream(*args):
+            received.append(chunk)
+            yield chunk
+
+    runner._stream = counting_stream
+    with use_fake_dedalus(runner):
+        result = asyncio.run(dedalus_runner._estimate_calories_remote("Tofu Bowl", ["vegan"]))
+
+    assert result == {"estimated_calories": 480}
+    assert len(received) < len(output) // 8 // 10
@@ -0,0 +1,52 @@
+from backend.menu_index import MenuIndex, TagRegistry
+
+
+HALLS = {
+    "John Jay": [
+        {"meal": "Vegan Tofu Bowl", "dietary": ["vegan", "gluten-free"]},
+        {"meal": "Chicken Caesar Salad", "dietary": ["gluten-free"]},
+    ],
+    "Ferris Booth": [
+        {"meal": "Cheese Pizza", "dietary": ["vegetarian"]},
+    ],
+    "JJ's": [
+        {"meal": "Quinoa Salad", "dietary": ["Vegan", "Gluten-Free"]},
+        {"meal": "Beef Burger", "dietary": []},
+    ],
+}
+
+
+def test_compatible_meals_require_every_preference_in_menu_order():
+    index = MenuIndex(HALLS, registry=TagRegistry())
+    matches = [(hall.name, meal.name) for hall, meal in index.compatible_meals(["vegan", "gluten-free"])]
+    assert matches == [("John Jay", "Vegan Tofu Bowl"), ("JJ's", "Quinoa Salad")]
+    assert len(list(index.compatible_meals([]))) == 5
+    assert list(index.compatible_meals(["kosher"])) == []
+
+
+def test_meal_masks_use_registry_bits():
+    registry = TagRegistry(tags=["vegan", "gluten-free"])
+    index = MenuIndex(HALLS, registry=registry)
+    assert index.meal_masks[0] == 0b11
+    assert index.meal_masks[1] == 0b10
+    assert index.to_dict()["JJ's"][0] == {"meal": "Quinoa Salad", "dietary": ["vegan", "gluten-free"]}
+
+
+def test_registry_capacity_is_bounded():
+    registry = TagRegistry(tags=[], capacity=2)
+    assert registry.intern("vegan") == 0
+    assert registry.intern("halal") == 1
+    assert registry.intern("kosher") is None
+    assert registry.mask(["vegan", "kosher"]) == 0b01
+    assert len(registry) == 2
+
+
+def test_tags_without_a_bit_still_filter_and_round_trip():
+    registry = TagRegistry(tags=["vegan"], capacity=2)
+    halls = {"Late Night": [{"meal": "Mystery Bowl", "dietary": ["vegan", "spicy", "house-made"]}]}
+    index = MenuIndex(halls, registry=registry)
+
+    assert len(registry) == 2
+    assert registry.overflow == 1
+    assert sorted(index.to_dict()["Late Night"][0]["dietary"]) == ["house-made", "spicy", "vegan"]
+    assert [meal.name for _, meal in index.compatible_meals(["spicy", "house-made"])] == ["Mystery Bowl"]
@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+from backend import assistant, main
+from backend.menu_registry import MenuRegistry
+
+client = TestClient(main.app)
+
+HALLS = {
+    "John Jay": [{"meal": "Vegan Tofu Bowl", "dietary": ["vegan"]}],
+    "JJ's": [{"meal": "Beef Burger", "dietary": []}],
+}
+
+
+def test_identical_menus_share_a_version_and_old_versions_are_evicted():
+    registry = MenuRegistry(max_versions=2)
+    first, created = registry.register(HALLS, label="monday")
+    again, created_again = registry.register({"JJ's": HALLS["JJ's"], "John Jay": HALLS["John Jay"]})
+    assert created and not created_again
+    assert again is first
+    assert len(first.index) == 2
+
+    registry.register({"Ferris": [{"meal": "Soup", "dietary": []}]})
+    registry.register({"Hewitt": [{"meal": "Salad", "dietary": []}]})
+    assert registry.get(first.version) is None
+    assert len(registry) == 2
+
+
+def test_onboarding_accepts_a_registered_menu_version(monkeypatch):
+    registry = MenuRegistry()
+    monkeypatch.setattr(main, "menu_registry", registry)
+
+    async def fake_batch(meals, **_):
+        return [{"estimated_calories": 450} for _ in meals]
+
+    async def fake_research(query, config=None):
+        return "Try John Jay!"
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+    monkeypatch.setattr(assistant, "run_dedalus_research", fake_research)
+
+    resp = client.post(
+        "/menus",
+        json={"label": "monday", "dining_halls": [{"name": n, "meals": m} for n, m in HALLS.items()]},
+    )
+    assert resp.status_code == 201
+    version = resp.json()["version"]
+    assert resp.json()["meals"] == 2
+
+    profile = {"dietary_preferences": ["vegan"], "goal": "Build Muscle"}
+    resp = client.post("/onboarding-summary", json={"user_profile": profile, "menu_version": version})
+    assert resp.status_code == 200
+    assert resp.json()["ranked_halls"][0]["dining_hall"] == "John Jay"
+
+    resp = client.post("/onboarding-summary", json={"user_profile": profile, "menu_version": "missing"})
+    assert resp.status_code == 404
+    resp = client.post("/onboarding-summary", json={"user_profile": profile})
+    assert resp.status_code == 422
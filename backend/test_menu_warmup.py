@@ -0,0 +1,70 @@
+import asyncio
+
+from backend.menu_warmup import WarmupStore, WarmupWorker, expand_menu, restriction_sets
+
+
+HALLS = {
+    "John Jay": [{"meal": "Vegan Tofu Bowl", "dietary": ["vegan", "gluten-free"]}],
+    "JJ's": [{"meal": "vegan tofu bowl", "dietary": ["vegan"]}, {"meal": "Beef Burger", "dietary": []}],
+}
+
+
+def test_expand_menu_covers_restriction_subsets_once():
+    assert restriction_sets(["vegan", "gluten-free"]) == [[], ["gluten-free"], ["vegan"], ["gluten-free", "vegan"]]
+    items = expand_menu(HALLS)
+    assert ("Beef Burger", []) in items
+    assert len(items) == 5
+
+
+def test_worker_retries_then_records_progress(tmp_path):
+    store = WarmupStore(tmp_path / "warmup.sqlite3")
+    attempts = {}
+
+    async def flaky(meal, restrictions):
+        key = (meal, tuple(restrictions))
+        attempts[key] = attempts.get(key, 0) + 1
+        if meal == "Beef Burger":
+            raise RuntimeError("quota")
+        if attempts[key] == 1:
+            return None
+        if meal == "Vegan Tofu Bowl" and restrictions == ["vegan"]:
+            return {"estimated_calories": 400, "tier": "index"}
+        return {"estimated_calories": 400, "tier": "large"}
+
+    worker = WarmupWorker(store, estimator=flaky, rate_per_second=0, max_attempts=2, backoff_seconds=0)
+    job_id = store.create_job(expand_menu(HALLS))
+    progress = asyncio.run(worker.run(job_id))
+
+    assert progress["total"] == 5
+    assert progress["done"] == 3
+    assert progress["skipped"] == 1
+    assert progress["failed"] == 1
+    assert progress["progress"] == 1.0
+    assert progress["status"] == "completed_with_errors"
+    assert attempts[("Beef Burger", ())] == 2
+
+
+def test_unfinished_job_resumes_only_pending_items(tmp_path):
+    path = tmp_path / "warmup.sqlite3"
+    store = WarmupStore(path)
+    job_id = store.create_job([("Tofu Bowl", []), ("Lentil Soup", [])])
+    store.set_status(job_id, "running")
+    store.update_item(job_id, 0, "done", 1)
+
+    restarted = WarmupStore(path)
+    assert restarted.unfinished_jobs() == [job_id]
+    seen = []
+
+    async def estimator(meal, restrictions):
+        seen.append(meal)
+        return {"estimated_calories": 300}
+
+    worker = WarmupWorker(restarted, estimator=estimator, rate_per_second=0)
+
+    async def main():
+        worker.resume_unfinished()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert seen == ["Lentil Soup"]
+    assert restarted.progress(job_id)["status"] == "completed"
@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from backend import assistant
+from backend.main import app
+from backend.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    text = registry.render()
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{stage="a"} 2' in text
+
+
+def test_metrics_route_reports_stages_and_endpoint_latency(monkeypatch):
+    async def fake_batch(meals, **_):
+        return [None] * len(meals)
+
+    async def no_remote(meal_name, restrictions):
+        return None
+
+    async def fake_research(query, config=None):
+        return "Enjoy John Jay."
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator", no_remote)
+    monkeypatch.setattr(assistant, "run_dedalus_research", fake_research)
+
+    client = TestClient(app)
+    resp = client.post(
+        "/onboarding-summary",
+        json={
+            "user_profile": {"dietary_preferences": [], "goal": "Build Muscle"},
+            "dining_halls": [{"name": "John Jay", "meals": [{"meal": "Tofu Bowl"}]}],
+        },
+    )
+    assert resp.status_code == 200
+
+    text = client.get("/metrics").text
+    for stage in ("parse", "scoring", "local_estimate", "ranking", "summary"):
+        assert f'stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert "calorie_estimator_local_fallbacks_total" in text
+    assert 'http_request_duration_seconds_count{method="POST",route="/onboarding-summary",status="200"}' in text
+    assert 'http_requests_in_flight{route="/onboarding-summary"} 0' in text
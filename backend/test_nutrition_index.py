@@ -0,0 +1,146 @@
+import asyncio
+import json
+import math
+
+from backend import dedalus_runner
+from backend.cascade import CascadePolicy
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+from backend.nutrition_index import NutritionIndex
+from backend.scheduler import BACKGROUND, scheduler
+
+TOFU_BOWL = {
+    "estimated_calories": 550,
+    "ingredient_list": ["6 oz firm tofu", "1 cup cooked brown rice", "1 cup broccoli", "1 tbsp soy sauce"],
+    "ingredient_calories": [220, 215, 55, 60],
+}
+CAESAR = {
+    "estimated_calories": 470,
+    "ingredient_list": ["grilled chicken breast", "romaine lettuce", "caesar dressing", "croutons", "parmesan"],
+    "ingredient_calories": [200, 15, 150, 60, 45],
+}
+
+
+def test_near_duplicate_names_resolve_and_novel_dishes_do_not():
+    index = NutritionIndex(path=None)
+    index.learn("Vegan Tofu Bowl", [], TOFU_BOWL)
+    index.learn("Chicken Caesar Salad", [], CAESAR)
+    assert index.learn("Mystery Plate", [], {"estimated_calories": 300}) is None
+
+    tofu = index.lookup("Tofu Rice Bowl (V)")
+    assert tofu.meal_name == "Vegan Tofu Bowl" and tofu.confidence >= 0.75
+    assert index.lookup("tofu bowl", ["Vegan"]).confidence == 1.0
+
+    caesar = index.lookup("Caesar Salad")
+    assert caesar.removed == ["grilled chicken breast"] and caesar.estimated_calories == 270
+    assert index.lookup("Beef Burger") is None
+    assert index.stats()["records"] == 2
+
+
+def test_records_never_answer_for_stricter_restrictions():
+    index = NutritionIndex(path=None)
+    index.learn("Tofu Bowl", [], TOFU_BOWL)
+    assert index.lookup("Tofu Bowl", ["vegan"]) is None
+    assert index.lookup("Tofu Rice Bowl (V)") is None
+
+    index.learn("Tofu Bowl", ["vegan", "gluten-free"], TOFU_BOWL)
+    assert index.lookup("Tofu Rice Bowl (V)").meal_name == "Tofu Bowl"
+
+
+def test_records_persist_and_oldest_are_evicted(tmp_path):
+    path = tmp_path / "index.sqlite3"
+    index = NutritionIndex(path=path, max_records=2)
+    index.learn("Vegan Tofu Bowl", [], TOFU_BOWL)
+    index.learn("Chicken Caesar Salad", [], CAESAR)
+    index.learn("Lentil Soup", [], {"estimated_calories": 320, "ingredient_list": ["lentils", "carrot"]})
+    index.close()
+
+    reopened = NutritionIndex(path=path, max_records=2)
+    assert len(reopened) == 0 and reopened.lookup("Lentil Soup") is None
+    assert reopened.load() == 2 and len(reopened) == 2
+    assert reopened.lookup("Vegan Tofu Bowl") is None
+    assert reopened.lookup("Lentil Soup").estimated_calories == 320
+
+
+def test_evicted_records_take_their_ingredient_names_along():
+    index = NutritionIndex(path=None, max_records=1)
+    index.learn("Vegan Tofu Bowl", [], TOFU_BOWL)
+    assert index.stats()["ingredients"] > 0
+    for calories in (320, 300):
+        soup = {"estimated_calories": calories, "ingredient_list": ["lentils"], "ingredient_calories": [calories]}
+        index.learn("Lentil Soup", [], soup)
+        assert index.stats()["ingredients"] == 1
+    # The replaced record's amount left the history with it.
+    assert list(index._ingredients["lentil"]) == [300]
+
+
+def test_writes_are_batched_and_learned_records_win_over_loaded_ones(tmp_path):
+    path = tmp_path / "index.sqlite3"
+    index = NutritionIndex(path=path, flush_size=2, flush_interval=3600)
+    index.learn("Vegan Tofu Bowl", [], TOFU_BOWL)
+    assert NutritionIndex(path=path).load() == 0
+    index.learn("Chicken Caesar Salad", [], CAESAR)
+    assert NutritionIndex(path=path).load() == 2
+
+    reopened = NutritionIndex(path=path)
+    reopened.learn("Chicken Caesar Salad", [], {**CAESAR, "estimated_calories": 500})
+    assert reopened.load() == 1
+    assert reopened.lookup("Chicken Caesar Salad").estimated_calories == 500
+    assert list(reopened._entries) == ["bowl tofu|vegan", "caesar chicken salad|"]
+
+
+def test_streamed_estimates_are_learned_and_repeats_skip_the_model(monkeypatch, isolated_nutrition_index):
+    monkeypatch.setattr(dedalus_runner, "cascade_policy", CascadePolicy(local_confidence=math.inf, fast_model=None))
+
+    async def scenario():
+        first = await dedalus_runner.run_dedalus_calorie_estimator("Vegan Tofu Bowl", [])
+        # The stream stopped at the calories; its ingredients are read in the background.
+        await dedalus_runner.wait_for_learning()
+        second = await dedalus_runner.run_dedalus_calorie_estimator("Tofu Bowl (V)", [])
+        return first, second
+
+    runner = FakeDedalusRunner(latency=LatencyProfile(kind="constant", median=0.0))
+    background = scheduler.admitted[BACKGROUND]
+    with use_fake_dedalus(runner):
+        first, second = asyncio.run(scenario())
+
+    assert first["tier"] == "large"
+    # The background read took its own scheduler slot.
+    assert scheduler.admitted[BACKGROUND] == background + 1
+    # An exact repeat is only as confident as the model that answered it.
+    assert second == {
+        "estimated_calories": first["estimated_calories"],
+        "confidence": 0.85,
+        "tier": "index",
+        "matched_meal": "Vegan Tofu Bowl",
+    }
+    assert sum(runner.calls_by_model.values()) == 1
+    assert isolated_nutrition_index.stats()["learned"] == 1
+
+
+def test_rejected_fast_answers_are_not_learned(monkeypatch, isolated_nutrition_index):
+    policy = CascadePolicy(local_confidence=math.inf, fast_model="small", fast_confidence=0.7, large_model="large")
+    monkeypatch.setattr(dedalus_runner, "cascade_policy", policy)
+
+    def outputs(_, model):
+        calories, confidence = (2400, 0.1) if model == "small" else (640, 0.8)
+        return json.dumps(
+            {
+                "estimated_calories": calories,
+                "confidence": confidence,
+                "ingredient_list": ["zorblax", "stock"],
+                "ingredient_calories": [calories - 40, 40],
+            }
+        )
+
+    async def scenario():
+        first = await dedalus_runner.run_dedalus_calorie_estimator("Zorblax Stew", [])
+        await dedalus_runner.wait_for_learning()
+        return first, await dedalus_runner.run_dedalus_calorie_estimator("Zorblax Stews", [])
+
+    runner = FakeDedalusRunner(latency=LatencyProfile(kind="constant", median=0.0), outputs=outputs)
+    with use_fake_dedalus(runner):
+        first, second = asyncio.run(scenario())
+
+    assert (first["estimated_calories"], first["tier"]) == (640, "large")
+    assert second == {"estimated_calories": 640, "confidence": 0.8, "tier": "index", "matched_meal": "Zorblax Stew"}
+    assert isolated_nutrition_index.stats()["learned"] == 1
@@ -0,0 +1,46 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend import assistant
+from backend.main import app
+
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "user_profile": {"dietary_preferences": ["vegan"], "goal": "Build Muscle"},
+    "dining_halls": [
+        {"name": "John Jay", "meals": [{"meal": "Vegan Tofu Bowl", "dietary": ["vegan"]}]},
+        {"name": "JJ's", "meals": [{"meal": "Beef Burger", "dietary": []}]},
+    ],
+}
+
+
+def _parse_sse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_onboarding_stream_emits_halls_then_tokens_then_done(monkeypatch):
+    async def fake_batch(meals, **_):
+        return [{"estimated_calories": 450} for _ in meals]
+
+    async def fake_stream(query, config=None):
+        for text in ["Try ", "John Jay!"]:
+            yield text
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+    monkeypatch.setattr(assistant, "stream_dedalus_research", fake_stream)
+
+    resp = client.post("/onboarding-summary/stream", json=PAYLOAD)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(resp.text)
+    assert [name for name, _ in events] == ["ranked_halls", "summary_delta", "summary_delta", "done"]
+    assert events[0][1]["ranked_halls"][0]["dining_hall"] == "John Jay"
+    assert events[-1][1] == {"summary": "Try John Jay!", "source": "dedalus"}
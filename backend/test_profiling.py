@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend import profiling
+from backend.fake_dedalus import FakeDedalusRunner, LatencyProfile, use_fake_dedalus
+from backend.main import app
+from backend.profiling import ProfileStore, ProfilingMiddleware
+
+client = TestClient(app)
+
+
+async def _slow_app(scope, receive, send):
+    time.sleep(0.1)  # blocks the event loop
+    await asyncio.sleep(0.1)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _get(middleware, headers=None):
+    async def call():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.get("/slow", headers=headers)
+
+    return asyncio.run(call())
+
+
+def test_profile_separates_blocking_from_waiting():
+    store = ProfileStore()
+    middleware = ProfilingMiddleware(_slow_app, sample_rate=0, token="secret", interval=0.002, store=store)
+    resp = _get(middleware, {"X-Profile": "secret"})
+
+    report = store.get(resp.headers["x-profile-id"]).report()
+    assert report["status"] == 200 and report["samples"] > 5
+    # 100 ms of each; the sampler thread may be starved on a busy machine, so leave slack.
+    assert report["breakdown_ms"]["app"] >= 30 and report["longest_busy_ms"] >= 30
+    assert report["breakdown_ms"]["idle"] >= 30
+
+
+def test_profiling_needs_the_configured_token(monkeypatch):
+    monkeypatch.setattr(profiling, "profile_token", None)
+    store = ProfileStore()
+    for token, header in ((None, "1"), ("secret", "1"), ("secret", "")):
+        middleware = ProfilingMiddleware(_slow_app, sample_rate=0, token=token, store=store)
+        resp = _get(middleware, {"X-Profile": header})
+        assert "x-profile-id" not in resp.headers
+    assert store.list() == []
+
+
+def test_profiles_are_served_under_the_debug_routes(monkeypatch):
+    monkeypatch.setattr(profiling, "profile_token", "secret")
+    auth = {"X-Profile": "secret"}
+    runner = FakeDedalusRunner(latency=LatencyProfile(kind="constant", median=0.03))
+    with use_fake_dedalus(runner):
+        resp = client.post("/search", json={"query": "profiled lunch search"}, headers=auth)
+    profile_id = resp.headers["x-profile-id"]
+
+    assert client.get("/debug/profiles").status_code == 404
+    assert client.get(f"/debug/profiles/{profile_id}", headers={"X-Profile": "guess"}).status_code == 404
+    assert client.get("/debug/profiles", headers=auth).json()[0]["id"] == profile_id
+    report = client.get(f"/debug/profiles/{profile_id}", headers=auth).json()
+    assert report["path"] == "/search" and report["status"] == 200
+    assert report["spans"]["dedalus_call"]["count"] == 1
+    stacks = client.get(f"/debug/profiles/{profile_id}/collapsed", headers=auth).text.splitlines()
+    assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert client.get("/debug/profiles/missing", headers=auth).status_code == 404
@@ -0,0 +1,46 @@
+from backend.prompt_builder import build_onboarding_prompt, estimate_tokens
+
+PROFILE = {"age": 20, "dietary_preferences": ["vegan"], "goal": "Build Muscle", "notes": "ignored"}
+
+
+def ranked(halls: int, meals: int):
+    return [
+        {
+            "dining_hall": f"Hall {h}",
+            "score": 1000.0 - h,
+            "suggested_meals": [{"meal": f"Dish {h}-{m}", "calories": 500 + m} for m in range(meals)],
+        }
+        for h in range(halls)
+    ]
+
+
+def test_lists_top_halls_with_distinct_meals_only():
+    halls = ranked(5, 2)
+    halls[0]["suggested_meals"].append({"meal": "dish 0-0 ", "calories": 500})
+
+    prompt = build_onboarding_prompt(PROFILE, halls, token_budget=2000, top_halls=2)
+
+    assert "1. Hall 0 (score 1000): Dish 0-0 (500); Dish 0-1 (501)\n" in prompt.text
+    assert "Hall 2" not in prompt.text
+    assert "Student: goal=Build Muscle; dietary preferences=vegan\n" in prompt.text
+    assert "notes" not in prompt.text and "age=" not in prompt.text
+    assert (prompt.halls, prompt.meals, prompt.omitted_meals, prompt.truncated) == (2, 4, 6, False)
+
+
+def test_budget_drops_trailing_meals_first_and_is_respected():
+    full = build_onboarding_prompt(PROFILE, ranked(3, 5), token_budget=10_000)
+    tight = build_onboarding_prompt(PROFILE, ranked(3, 5), token_budget=full.tokens - 20)
+
+    assert tight.truncated and not full.truncated
+    assert tight.tokens <= full.tokens - 20
+    assert "Dish 0-4" in tight.text and "Dish 2-4" not in tight.text
+    assert f"({tight.omitted_meals} more qualifying meals not listed)" in tight.text
+
+
+def test_prompt_size_does_not_grow_with_menu_size():
+    small = build_onboarding_prompt(PROFILE, ranked(3, 5))
+    large = build_onboarding_prompt(PROFILE, ranked(40, 60))
+
+    # Only the "N more meals" note is added for the bigger menu.
+    assert large.tokens - small.tokens <= estimate_tokens("(2385 more qualifying meals not listed)")
+    assert large.tokens == estimate_tokens(large.text)
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.scheduler import BACKGROUND, INTERACTIVE, DedalusScheduler, call_context
+
+
+def test_interactive_calls_jump_ahead_of_queued_background_calls():
+    order = []
+
+    async def call(scheduler, name, priority):
+        async with scheduler.slot(priority=priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        scheduler = DedalusScheduler(max_concurrency=1)
+        tasks = [asyncio.create_task(call(scheduler, f"bg{i}", BACKGROUND)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call(scheduler, "user", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["bg0", "user", "bg1", "bg2"]
+
+
+def test_users_in_the_same_class_are_served_round_robin():
+    order = []
+
+    async def call(scheduler, user, n):
+        async with scheduler.slot(user=user):
+            order.append(f"{user}{n}")
+            await asyncio.sleep(0.005)
+
+    async def scenario():
+        scheduler = DedalusScheduler(max_concurrency=1)
+        tasks = [asyncio.create_task(call(scheduler, "a", n)) for n in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(call(scheduler, "b", n)) for n in range(2)]
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["a0", "a1", "b0", "a2", "b1", "a3"]
+
+
+def test_token_bucket_spaces_calls_beyond_the_burst():
+    async def scenario():
+        scheduler = DedalusScheduler(rate_per_second=50, burst=2, max_concurrency=10)
+        start = time.monotonic()
+        for _ in range(5):
+            async with scheduler.slot():
+                pass
+        return time.monotonic() - start, scheduler.stats()
+
+    elapsed, stats = asyncio.run(scenario())
+    # Two calls ride the burst; the other three wait ~20 ms each for a token.
+    assert elapsed >= 0.05
+    assert stats["admitted"][INTERACTIVE] == 5
+    assert stats["queue_depth"] == {INTERACTIVE: 0, BACKGROUND: 0}
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = DedalusScheduler(max_concurrency=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth()[INTERACTIVE] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queue_depth"][INTERACTIVE] == 0
+
+
+def test_call_context_sets_defaults_for_slots():
+    async def scenario():
+        scheduler = DedalusScheduler()
+        with call_context(priority=BACKGROUND, user="warmup:1"):
+            async with scheduler.slot():
+                pass
+        return scheduler.stats()["admitted"]
+
+    assert asyncio.run(scenario()) == {INTERACTIVE: 0, BACKGROUND: 1}
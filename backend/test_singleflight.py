@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from backend.scheduler import BACKGROUND, INTERACTIVE, DedalusScheduler, call_context
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"estimated_calories": 420}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("tofu|vegan", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"estimated_calories": 420}] * 5
+    assert flights.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelling_one_waiter_keeps_the_shared_call_alive():
+    flights = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert len(started) == 1
+
+
+def test_last_waiter_cancelling_cancels_the_shared_call():
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(1)
+        finished.append(1)
+
+    async def main():
+        waiter = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        return flights.stats()["in_flight"]
+
+    assert asyncio.run(main()) == 0
+    assert finished == []
+
+
+def test_caller_arriving_right_after_the_last_cancel_starts_a_new_call():
+    flights = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return "fresh"
+
+    async def main():
+        waiter = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        return await flights.do("k", work)
+
+    assert asyncio.run(main()) == "fresh"
+    assert len(started) == 2
+
+
+def test_interactive_caller_raises_the_priority_of_a_background_flight():
+    order = []
+
+    async def call(scheduler, name):
+        async with scheduler.slot():
+            order.append(name)
+            await asyncio.sleep(0.005)
+        return name
+
+    async def background(coro_fn):
+        with call_context(priority=BACKGROUND, user="warmup"):
+            return await coro_fn()
+
+    async def main():
+        scheduler = DedalusScheduler(max_concurrency=1)
+        flights = SingleFlight()
+        await scheduler.acquire()
+        other = asyncio.ensure_future(background(lambda: call(scheduler, "other warm-up")))
+        await asyncio.sleep(0.001)
+        shared = asyncio.ensure_future(background(lambda: flights.do("k", lambda: call(scheduler, "shared"))))
+        await asyncio.sleep(0.001)
+        assert scheduler.queue_depth() == {INTERACTIVE: 0, BACKGROUND: 2}
+
+        with call_context(priority=INTERACTIVE, user="student"):
+            joined = asyncio.ensure_future(flights.do("k", lambda: call(scheduler, "unused")))
+            await asyncio.sleep(0.001)
+        assert scheduler.queue_depth() == {INTERACTIVE: 1, BACKGROUND: 1}
+        scheduler.release()
+        return await asyncio.gather(joined, shared, other)
+
+    assert asyncio.run(main()) == ["shared", "shared", "other warm-up"]
+    assert order == ["shared", "other warm-up"]
@@ -0,0 +1,60 @@
+import asyncio
+
+from backend import assistant
+from backend.estimate_cache import EstimateCache
+from backend.summary_cache import SummaryCache, menu_hash, profile_bucket
+
+MENU = {
+    "John Jay": [{"meal": "Vegan Tofu Bowl", "dietary": ["vegan", "gluten-free"]}],
+    "JJ's": [{"meal": "Beef Burger", "dietary": []}],
+}
+
+
+def test_menu_hash_ignores_ordering_but_not_content():
+    reordered = {
+        "JJ's": [{"meal": "beef burger", "dietary": []}],
+        "John Jay": [{"meal": "Vegan Tofu Bowl", "dietary": ["gluten-free", "vegan"]}],
+    }
+    changed = {**MENU, "JJ's": [{"meal": "Veggie Burger", "dietary": []}]}
+
+    assert menu_hash(MENU) == menu_hash(reordered)
+    assert menu_hash(MENU) != menu_hash(changed)
+
+
+def test_profile_bucket_excludes_age_and_weight():
+    a = {"age": 19, "weight": 140, "goal": "Build Muscle", "dietary_preferences": ["Vegan", "halal"]}
+    b = {"age": 24, "weight": 190, "goal": "build muscle ", "dietary_preferences": ["halal", "vegan"]}
+
+    assert profile_bucket(a) == profile_bucket(b) == "build muscle|halal,vegan"
+
+
+def test_menus_in_rotation_keep_their_summaries():
+    cache = SummaryCache(EstimateCache(path=None))
+    profile = {"goal": "Lose Weight"}
+    menus = [MENU, {"Ferris": [{"meal": "Salmon"}]}, {"Chef Mike's": [{"meal": "Falafel Wrap"}]}]
+    keys = [cache.key(menu, profile) for menu in menus]
+    for key, text in zip(keys, ["Try John Jay.", "Try Ferris.", "Try Chef Mike's."]):
+        cache.set(key, text)
+
+    assert len(set(keys)) == 3
+    assert [cache.get(key) for key in keys] == ["Try John Jay.", "Try Ferris.", "Try Chef Mike's."]
+
+
+def test_generate_summary_reuses_cached_text_for_same_bucket(monkeypatch):
+    calls = []
+
+    async def fake_batch(meals, **_):
+        return [{"estimated_calories": 500} for _ in meals]
+
+    async def fake_research(query, config=None):
+        calls.append(query)
+        return "Head to John Jay."
+
+    monkeypatch.setattr(assistant, "run_cached_calorie_estimator_batch", fake_batch)
+    monkeypatch.setattr(assistant, "run_dedalus_research", fake_research)
+
+    first = asyncio.run(assistant.generate_onboarding_summary({"age": 19, "goal": "Build Muscle"}, MENU))
+    second = asyncio.run(assistant.generate_onboarding_summary({"age": 22, "goal": "Build Muscle"}, MENU))
+
+    assert first["summary"] == second["summary"] == "Head to John Jay."
+    assert len(calls) == 1
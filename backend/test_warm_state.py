@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from backend import calorie_estimator, dedalus_runner, warm_state
+from backend.env import _parse
+from backend.estimate_cache import EstimateCache
+from backend.menu_index import TagRegistry
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_app_does_not_load_the_sdk():
+    out = subprocess.run(
+        [sys.executable, "-c", "import sys, backend.main; print('dedalus_labs' in sys.modules)"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out.strip() == "False"
+
+
+def test_env_parser_handles_quotes_exports_and_comments():
+    text = "# comment\nexport A=1\nB='two words'\nC=\"x # y\"\nD=plain # note\nbroken line\n"
+    assert dict(_parse(text)) == {"A": "1", "B": "two words", "C": "x # y", "D": "plain"}
+
+
+def test_snapshot_round_trip_restores_caches_and_tags(tmp_path, monkeypatch):
+    source = EstimateCache(path=None)
+    source.set("tofu bowl|vegan", {"estimated_calories": 480})
+    registry = TagRegistry()
+    registry.intern("spicy")
+    monkeypatch.setattr(dedalus_runner, "calorie_cache", source)
+    monkeypatch.setattr(warm_state, "tag_registry", registry)
+
+    path = warm_state.save_snapshot(tmp_path / "warm.pickle")
+
+    restored_cache, restored_tags = EstimateCache(path=None), TagRegistry()
+    monkeypatch.setattr(dedalus_runner, "calorie_cache", restored_cache)
+    monkeypatch.setattr(warm_state, "tag_registry", restored_tags)
+    loaded = warm_state.load_snapshot(path)
+
+    assert loaded["calorie_estimates"] == 1 and loaded["matcher"] == 1
+    assert restored_cache.get("tofu bowl|vegan") == {"estimated_calories": 480}
+    assert restored_tags.names() == registry.names()
+    assert calorie_estimator.local_calorie_estimate("Tofu Bowl") > 0
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "warm.pickle"
+    path.write_bytes(b"not a pickle")
+    assert warm_state.load_snapshot(path) is None
@@ -0,0 +1,94 @@
+import logging
+import mmap
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    from backend import calorie_estimator, dedalus_runner
+    from backend.estimate_cache import BACKEND_DIR
+    from backend.menu_index import tag_registry
+    from backend.menu_registry import menu_registry
+    from backend.summary_cache import summary_cache
+except ImportError:
+    import calorie_estimator  # type: ignore
+    import dedalus_runner  # type: ignore
+    from estimate_cache import BACKEND_DIR  # type: ignore
+    from menu_index import tag_registry  # type: ignore
+    from menu_registry import menu_registry  # type: ignore
+    from summary_cache import summary_cache  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARM_STATE_PATH = BACKEND_DIR / ".cache" / "warm_state.pickle"
+SNAPSHOT_VERSION = 1
+
+
+def fast_start_enabled() -> bool:
+    return os.getenv("FAST_START", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def warm_state_path() -> Optional[Path]:
+    raw = os.getenv("WARM_STATE_PATH", str(DEFAULT_WARM_STATE_PATH))
+    return None if raw.strip().lower() in {"", "off", "none"} else Path(raw)
+
+
+def collect() -> Dict[str, Any]:
+    """Gather the in-process state worth keeping across restarts."""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "calorie_estimates": dedalus_runner.calorie_cache.export_memory(),
+        "onboarding_summaries": summary_cache.store.export_memory(),
+        "registered_menus": menu_registry.export(),
+        "tags": tag_registry.names(),
+        "matcher": calorie_estimator.keyword_matcher(),
+    }
+
+
+def save_snapshot(path: Optional[Path] = None) -> Optional[Path]:
+    """Write the warm-state snapshot atomically; returns the path, or None when disabled."""
+    path = path or warm_state_path()
+    if path is None:
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as fh:
+        pickle.dump(collect(), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(path: Optional[Path] = None) -> Optional[Dict[str, int]]:
+    """Restore a snapshot written by ``save_snapshot``; returns what was loaded, or None.
+
+    The file is memory-mapped and unpickled straight from the mapping, so it
+    is never copied into a separate read buffer. Snapshots are only ever
+    written by this process's own shutdown hook; never point this at an
+    untrusted file.
+    """
+    path = path or warm_state_path()
+    if path is None or not path.is_file() or path.stat().st_size == 0:
+        return None
+    try:
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            state = pickle.loads(mapped)
+    except Exception:
+        logger.warning("Ignoring unreadable warm-state snapshot at %s", path, exc_info=True)
+        return None
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+        logger.warning("Ignoring warm-state snapshot with unexpected version at %s", path)
+        return None
+
+    for tag in state.get("tags", []):
+        tag_registry.intern(tag)
+    matcher = state.get("matcher")
+    return {
+        "calorie_estimates": dedalus_runner.calorie_cache.load_memory(state.get("calorie_estimates", [])),
+        "onboarding_summaries": summary_cache.store.load_memory(state.get("onboarding_summaries", [])),
+        "registered_menus": menu_registry.restore(state.get("registered_menus", [])),
+        "tags": len(tag_registry),
+        "matcher": int(matcher is not None and calorie_estimator.install_matcher(matcher)),
+    }
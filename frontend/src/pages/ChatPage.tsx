@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 // Inline ChatBubble component (temporary): creates a simple styled bubble for bot/user messages
 function ChatBubble({ from, text }: { from: 'bot' | 'user'; text: string }) {
   const isUser = from === 'user';
@@ -37,6 +37,11 @@ const diningData = [
   },
 ];
 
+const BACKEND_URL =
+  process.env.REACT_APP_BACKEND_URL?.replace(/\/$/, '') || 'http://localhost:8000';
+const CHAT_URL = `${BACKEND_URL.replace(/^http/, 'ws')}/chat/ws`;
+const SESSION_KEY = 'chatSessionId';
+
 export default function ChatPage() {
   const [hall, setHall] = useState('');
   const [station, setStation] = useState('');
@@ -44,9 +49,42 @@ export default function ChatPage() {
   const [stations, setStations] = useState<string[]>([]);
   const [items, setItems] = useState<string[]>([]);
   const [messages, setMessages] = useState<{ from: 'bot' | 'user'; text: string }[]>([
-    { from: 'bot', text: 'Hi! (dev mode) select a hall/station/item or type a message. Recommendations are blank until backend provides them.' },
+    { from: 'bot', text: 'Hi! Select a hall/station/item or type a message to get recommendations.' },
   ]);
   const [input, setInput] = useState('');
+  const [connected, setConnected] = useState(false);
+  const [replying, setReplying] = useState(false);
+  const socketRef = useRef<WebSocket | null>(null);
+
+  useEffect(() => {
+    // The conversation lives on the server; only the session id is kept here.
+    const sessionId = localStorage.getItem(SESSION_KEY);
+    const ws = new WebSocket(sessionId ? `${CHAT_URL}?session_id=${encodeURIComponent(sessionId)}` : CHAT_URL);
+    socketRef.current = ws;
+    ws.onopen = () => setConnected(true);
+    ws.onclose = () => {
+      setConnected(false);
+      setReplying(false);
+    };
+    ws.onmessage = (event) => {
+      const frame = JSON.parse(event.data);
+      if (frame.type === 'session') {
+        localStorage.setItem(SESSION_KEY, frame.session_id);
+      } else if (frame.type === 'delta') {
+        // Append streamed text to the bot bubble opened when the message was sent.
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + frame.text }];
+        });
+      } else if (frame.type === 'done') {
+        setReplying(false);
+      } else if (frame.type === 'error') {
+        setReplying(false);
+        setMessages(prev => [...prev, { from: 'bot', text: `Error: ${frame.detail}` }]);
+      }
+    };
+    return () => ws.close();
+  }, []);
 
   useEffect(() => {
     // update stations when hall changes
@@ -79,25 +117,21 @@ export default function ChatPage() {
 
   const sendMessage = async () => {
     if (!input && !item) return;
+    const ws = socketRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN || replying) return;
 
     const text = input ? input : `Selected: ${hall} > ${station} > ${item}`;
-    setMessages(prev => [...prev, { from: 'user', text }]);
-
-    // Placeholder - call to your backend recommendation function goes here.
-    // Example:
-    // const res = await fetch('http://localhost:5000/api/recommend', { method: 'POST', body: JSON.stringify({ preferences, query: text }) })
-    // const data = await res.json();
-    // setMessages(prev => [...prev, { from: 'bot', text: data.reply || 'No recommendations yet.' }]);
-
-    // For now show blank recommendation message (per requirement)
-    setMessages(prev => [...prev, { from: 'bot', text: 'Recommendations area is intentionally blank until backend provides results.' }]);
+    // Only the new message is sent; the server keeps the history.
+    setMessages(prev => [...prev, { from: 'user', text }, { from: 'bot', text: '' }]);
+    setReplying(true);
+    ws.send(JSON.stringify({ type: 'message', text }));
 
     setInput('');
   };
 
   return (
     <div style={{ padding: 16, maxWidth: 980, margin: '0 auto' }}>
-      <h2 style={{ marginTop: 8 }}>Chat & Recommendation (Dev Mode)</h2>
+      <h2 style={{ marginTop: 8 }}>Chat & Recommendation</h2>
 
       <div style={{ display: 'flex', gap: 12, marginTop: 12, flexWrap: 'wrap' }}>
         <select value={hall} onChange={(e) => setHall(e.target.value)} style={{ padding: 8 }}>
@@ -132,7 +166,7 @@ export default function ChatPage() {
       </div>
 
       <div style={{ marginTop: 10, color: '#666', fontSize: 13 }}>
-        Note: Recommendations are intentionally blank until the backend returns results. Replace the placeholder block in <code>sendMessage</code> with a call to your team's backend endpoint.
+        {connected ? (replying ? 'Thinking…' : 'Connected.') : 'Connecting to the recommendation service…'}
       </div>
     </div>
   );
@@ -4,13 +4,31 @@ import { Link } from "react-router-dom";
 type RankedHall = {
   dining_hall: string;
   score: number;
-  suggested_meals: { meal: string; calories: number }[];
+  suggested_meals: { meal: string; calories: number; source?: string; provisional?: boolean }[];
 };
 
-type SummaryResponse = {
-  summary: string;
-  ranked_halls: RankedHall[];
-};
+type StreamEvent =
+  | { event: "ranked_halls"; data: { ranked_halls: RankedHall[] } }
+  | { event: "summary_delta"; data: { text: string } }
+  | { event: "done"; data: { summary: string; source: string } }
+  | { event: "error"; data: { detail: string } };
+
+// Split a Server-Sent Events buffer into complete frames plus the unfinished remainder.
+function parseSseFrames(buffer: string): { events: StreamEvent[]; rest: string } {
+  const frames = buffer.split("\n\n");
+  const rest = frames.pop() ?? "";
+  const events: StreamEvent[] = [];
+  for (const frame of frames) {
+    let event = "";
+    let data = "";
+    for (const line of frame.split("\n")) {
+      if (line.startsWith("event: ")) event = line.slice(7);
+      else if (line.startsWith("data: ")) data += line.slice(6);
+    }
+    if (event && data) events.push({ event, data: JSON.parse(data) } as StreamEvent);
+  }
+  return { events, rest };
+}
 
 const BACKEND_URL =
   process.env.REACT_APP_BACKEND_URL?.replace(/\/$/, "") || "http://localhost:8000";
@@ -18,7 +36,7 @@ const BACKEND_URL =
 export default function RecommendedMeals() {
   const [summary, setSummary] = useState<string>("");
   const [ranked, setRanked] = useState<RankedHall[]>([]);
-  const [status, setStatus] = useState<"idle" | "loading" | "ready" | "error">("idle");
+  const [status, setStatus] = useState<"idle" | "loading" | "streaming" | "ready" | "error">("idle");
   const [error, setError] = useState<string | null>(null);
 
   const payload = useMemo(
@@ -61,23 +79,43 @@ export default function RecommendedMeals() {
     const fetchData = async () => {
       setStatus("loading");
       setError(null);
+      setSummary("");
 
       try {
-        const resp = await fetch(`${BACKEND_URL}/onboarding-summary`, {
+        const resp = await fetch(`${BACKEND_URL}/onboarding-summary/stream`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify(payload),
         });
 
-        if (!resp.ok) {
+        if (!resp.ok || !resp.body) {
           throw new Error(`Request failed (${resp.status})`);
         }
 
-        const data: SummaryResponse = await resp.json();
-        if (!active) return;
-        setSummary(data.summary.trim());
-        setRanked(data.ranked_halls || []);
-        setStatus("ready");
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (active) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const parsed = parseSseFrames(buffer);
+          buffer = parsed.rest;
+          for (const item of parsed.events) {
+            if (item.event === "ranked_halls") {
+              setRanked(item.data.ranked_halls || []);
+              setStatus("streaming");
+            } else if (item.event === "summary_delta") {
+              setSummary((prev) => prev + item.data.text);
+            } else if (item.event === "done") {
+              setSummary(item.data.summary.trim());
+              setStatus("ready");
+            } else if (item.event === "error") {
+              throw new Error(item.data.detail);
+            }
+          }
+        }
+        if (!active) reader.cancel();
       } catch (err: any) {
         if (!active) return;
         setError(err?.message || "Unable to reach the recommendation service.");
@@ -220,6 +258,7 @@ export default function RecommendedMeals() {
               Ensure the backend is running at {BACKEND_URL}.
             </span>
           )}
+          {status === "streaming" && (summary || "Writing your personalized summary…")}
           {status === "ready" && summary}
         </div>
 
@@ -246,7 +285,7 @@ export default function RecommendedMeals() {
                     {hall.suggested_meals.length ? (
                       hall.suggested_meals.map((meal) => (
                         <li key={meal.meal}>
-                          {meal.meal} — {meal.calories} kcal (est.)
+                          {meal.meal} — {meal.calories} kcal ({meal.provisional ? "rough est." : "est."})
                         </li>
                       ))
                     ) : (